@@ -1,20 +1,34 @@
 from __future__ import annotations
 
-from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-import json
+import os
 from pathlib import Path
-from typing import Any
+import signal
+import socket
+import sqlite3
+import threading
+from typing import Any, Callable, ClassVar
 
+from markdownkeeper.cache.semantic import SemanticCache
+from markdownkeeper.jsonio import dumps_bytes, loads, to_dict
+from markdownkeeper.storage.connections import thread_connection
 from markdownkeeper.storage.repository import (
     find_documents_by_concept,
     get_document,
+    get_documents_bulk,
+    get_index_version,
     search_documents,
     semantic_search_documents,
 )
 
+MAX_BODY_BYTES = 1 << 20  # 1 MiB
+KEEPALIVE_TIMEOUT_SECONDS = 5.0
 
-def _rpc_success(request_id: Any, result: dict[str, Any]) -> dict[str, Any]:
+
+def _rpc_success(request_id: Any, result: Any) -> dict[str, Any]:
     return {"jsonrpc": "2.0", "result": result, "id": request_id}
 
 
@@ -22,111 +36,385 @@ def _rpc_error(request_id: Any, code: int, message: str) -> dict[str, Any]:
     return {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": request_id}
 
 
-def build_handler(database_path: Path):
-    class Handler(BaseHTTPRequestHandler):
-        def _write_json(self, status: int, payload: dict[str, Any]) -> None:
-            body = json.dumps(payload).encode("utf-8")
-            self.send_response(status)
-            self.send_header("Content-Type", "application/json")
-            self.send_header("Content-Length", str(len(body)))
-            self.end_headers()
-            self.wfile.write(body)
+# Payloads that never vary are encoded once at import and written as-is.
+_HEALTH_OK = dumps_bytes({"status": "ok"})
+_NOT_FOUND = dumps_bytes({"error": "not found"})
+_INVALID_CONTENT_LENGTH = dumps_bytes(_rpc_error(None, -32600, "invalid content length"))
+_REQUEST_TOO_LARGE = dumps_bytes(_rpc_error(None, -32600, "request too large"))
+_INVALID_JSON = dumps_bytes(_rpc_error(None, -32700, "invalid json"))
+_INVALID_REQUEST = dumps_bytes(_rpc_error(None, -32600, "invalid request"))
+
+RpcResponse = tuple[int, dict[str, Any]]
+RpcCall = tuple[Any, dict[str, Any]]
+
+
+@dataclass(slots=True)
+class RouteContext:
+    database_path: Path
+    query_cache: SemanticCache | None = None
+    embedding_dtype: str = "fp32"
+
+    def connection(self) -> sqlite3.Connection:
+        """The calling worker thread's reused connection to the index database."""
+        return thread_connection(self.database_path)
+
+
+def _search(ctx: RouteContext, query: str, limit: int) -> list[Any]:
+    if ctx.query_cache is None or not query:
+        return semantic_search_documents(
+            ctx.database_path,
+            query,
+            limit=limit,
+            embedding_dtype=ctx.embedding_dtype,
+            connection=ctx.connection(),
+        )
+    version = get_index_version(ctx.database_path, connection=ctx.connection())
+    docs = ctx.query_cache.get(query, limit, version)
+    if docs is None:
+        docs = semantic_search_documents(
+            ctx.database_path,
+            query,
+            limit=limit,
+            embedding_dtype=ctx.embedding_dtype,
+            connection=ctx.connection(),
+        )
+        ctx.query_cache.put(query, limit, version, docs)
+    return docs
+
+
+def _do_semantic_query(ctx: RouteContext, request_id: Any, params: dict[str, Any]) -> RpcResponse:
+    query = str(params.get("query", "")).strip()
+    max_results = min(int(params.get("max_results", 10)), 100)
+    include_content = bool(params.get("include_content", False))
+    max_tokens = min(int(params.get("max_tokens", 200)), 10_000)
+    docs = _search(ctx, query, max(1, max_results))
+    documents: list[Any] = list(docs)
+    if include_content:
+        details = get_documents_bulk(
+            ctx.database_path,
+            [item.id for item in docs],
+            include_content=True,
+            max_tokens=max(1, max_tokens),
+            section=params.get("section"),
+            connection=ctx.connection(),
+        )
+        documents = []
+        for item in docs:
+            payload = to_dict(item)
+            detail = details.get(item.id)
+            payload["content"] = detail.content if detail else ""
+            documents.append(payload)
+    return 200, _rpc_success(request_id, {"query": query, "documents": documents, "count": len(docs)})
+
+
+def _do_get_document(ctx: RouteContext, request_id: Any, params: dict[str, Any]) -> RpcResponse:
+    doc = get_document(
+        ctx.database_path,
+        int(params.get("document_id", 0)),
+        include_content=bool(params.get("include_content", False)),
+        max_tokens=int(params.get("max_tokens", 200)),
+        section=params.get("section"),
+        connection=ctx.connection(),
+    )
+    if doc is None:
+        return 404, _rpc_error(request_id, -32004, "document not found")
+    return 200, _rpc_success(request_id, doc)
+
+
+def _do_get_document_batch(ctx: RouteContext, calls: list[RpcCall]) -> list[RpcResponse]:
+    """Answer many get_document calls with one bulk fetch per distinct content option set."""
+    responses: list[RpcResponse | None] = [None] * len(calls)
+    groups: dict[tuple[bool, int, str | None], list[tuple[int, Any, int]]] = {}
+    for idx, (request_id, params) in enumerate(calls):
+        try:
+            section = params.get("section")
+            options = (
+                bool(params.get("include_content", False)),
+                int(params.get("max_tokens", 200)),
+                None if section is None else str(section),
+            )
+            document_id = int(params.get("document_id", 0))
+        except (AttributeError, TypeError, ValueError):
+            responses[idx] = (400, _rpc_error(request_id, -32602, "invalid params"))
+            continue
+        groups.setdefault(options, []).append((idx, request_id, document_id))
+
+    for (include_content, max_tokens, section), members in groups.items():
+        found = get_documents_bulk(
+            ctx.database_path,
+            [document_id for _, _, document_id in members],
+            include_content=include_content,
+            max_tokens=max_tokens,
+            section=section,
+            connection=ctx.connection(),
+        )
+        for idx, request_id, document_id in members:
+            doc = found.get(document_id)
+            if doc is None:
+                responses[idx] = (404, _rpc_error(request_id, -32004, "document not found"))
+            else:
+                responses[idx] = (200, _rpc_success(request_id, doc))
+    return [response for response in responses if response is not None]
+
+
+def _do_find_by_concept(ctx: RouteContext, request_id: Any, params: dict[str, Any]) -> RpcResponse:
+    concept = str(params.get("concept", "")).strip()
+    max_results = int(params.get("max_results", 10))
+    docs = find_documents_by_concept(ctx.database_path, concept, limit=max(1, max_results), connection=ctx.connection())
+    return 200, _rpc_success(request_id, {"concept": concept, "documents": docs, "count": len(docs)})
+
+
+# (path, JSON-RPC method) -> route function. build_handler binds the RouteContext once.
+ROUTES: dict[tuple[str, str], Callable[[RouteContext, Any, dict[str, Any]], RpcResponse]] = {
+    ("/api/v1/query", "semantic_query"): _do_semantic_query,
+    ("/api/v1/get_doc", "get_document"): _do_get_document,
+    ("/api/v1/find_concept", "find_by_concept"): _do_find_by_concept,
+}
+
+# Routes that can answer a whole JSON-RPC batch at once (e.g. one SQL query for N ids).
+BATCH_ROUTES: dict[tuple[str, str], Callable[[RouteContext, list[RpcCall]], list[RpcResponse]]] = {
+    ("/api/v1/get_doc", "get_document"): _do_get_document_batch,
+}
+
+
+def default_http_threads() -> int:
+    return max(8, 2 * (os.cpu_count() or 1) + 2)
+
+
+class WorkerPoolHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer that hands connections to a bounded worker pool instead of spawning a thread each.
+
+    A worker stays with its connection while a keep-alive client is idle, so the
+    server counts open connections and handlers stop offering keep-alive once
+    they fill the pool; an idle client can then never hold the last free worker.
+    """
+
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        handler_class: type,
+        max_workers: int | None = None,
+        reuse_port: bool = False,
+    ) -> None:
+        self.reuse_port = reuse_port
+        super().__init__(server_address, handler_class)
+        self.max_workers = max(1, max_workers or default_http_threads())
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="mdkeeper-http")
+        self._open_connections = 0
+        self._connections_lock = threading.Lock()
+
+    def server_bind(self) -> None:
+        if self.reuse_port:
+            # Several processes bind the same address; the kernel spreads accepts across them.
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def process_request(self, request, client_address) -> None:  # type: ignore[override]
+        with self._connections_lock:
+            self._open_connections += 1
+        self._pool.submit(self._process_counted, request, client_address)
+
+    def _process_counted(self, request: socket.socket, client_address: Any) -> None:
+        try:
+            self.process_request_thread(request, client_address)
+        finally:
+            with self._connections_lock:
+                self._open_connections -= 1
 
-        def do_GET(self) -> None:  # noqa: N802
-            if self.path == "/health":
-                self._write_json(200, {"status": "ok"})
-                return
-            self._write_json(404, {"error": "not found"})
+    def saturated(self) -> bool:
+        """True when open connections, queued ones included, occupy every worker."""
+        return self._open_connections >= self.max_workers
 
-        def do_POST(self) -> None:  # noqa: N802
+    def server_close(self) -> None:
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """JSON-RPC request handler; build_handler binds routes for one database in a subclass."""
+
+    # Persistent connections; an idle client is dropped after the timeout, and
+    # WorkerPoolHTTPServer closes connections instead once its pool is full.
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT_SECONDS
+    max_body_bytes: ClassVar[int] = MAX_BODY_BYTES
+    routes: ClassVar[dict[tuple[str, str], Callable[[Any, dict[str, Any]], RpcResponse]]] = {}
+    batch_routes: ClassVar[dict[tuple[str, str], Callable[[list[RpcCall]], list[RpcResponse]]]] = {}
+
+    def setup(self) -> None:
+        super().setup()
+        try:
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        except OSError:
+            pass
+
+    def _write_json(self, status: int, payload: dict[str, Any] | list[dict[str, Any]]) -> None:
+        self._write_body(status, dumps_bytes(payload))
+
+    def _write_body(self, status: int, body: bytes) -> None:
+        saturated = getattr(self.server, "saturated", None)
+        if saturated is not None and saturated():
+            self.close_connection = True
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Connection", "close" if self.close_connection else "keep-alive")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path == "/health":
+            self._write_body(200, _HEALTH_OK)
+            return
+        self._write_body(404, _NOT_FOUND)
+
+    def do_POST(self) -> None:  # noqa: N802
+        try:
             length = int(self.headers.get("Content-Length", "0"))
-            if length > 1_048_576:  # 1 MiB upper bound
-                self._write_json(413, _rpc_error(None, -32600, "request too large"))
-                return
-            raw = self.rfile.read(length)
-            try:
-                req = json.loads(raw.decode("utf-8"))
-            except json.JSONDecodeError:
-                self._write_json(400, _rpc_error(None, -32700, "invalid json"))
-                return
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body is left unread, so the connection cannot be reused.
+            self.close_connection = True
+            self._write_body(400, _INVALID_CONTENT_LENGTH)
+            return
+        if length > self.max_body_bytes:
+            self.close_connection = True
+            self._write_body(413, _REQUEST_TOO_LARGE)
+            return
+        # Read into one preallocated buffer and parse the bytes directly,
+        # without an intermediate decoded str copy.
+        buf = bytearray(length)
+        received = self.rfile.readinto(buf) if length else 0
+        if received < length:
+            self.close_connection = True
+        try:
+            req = loads(memoryview(buf)[:received])
+        except ValueError:
+            self._write_body(400, _INVALID_JSON)
+            return
 
-            request_id = req.get("id")
-            method = req.get("method")
-            params = req.get("params") or {}
-
-            if self.path == "/api/v1/query" and method == "semantic_query":
-                query = str(params.get("query", "")).strip()
-                max_results = min(int(params.get("max_results", 10)), 100)
-                include_content = bool(params.get("include_content", False))
-                max_tokens = min(int(params.get("max_tokens", 200)), 10_000)
-                docs = semantic_search_documents(database_path, query, limit=max(1, max_results))
-                documents: list[dict[str, Any]] = []
-                for item in docs:
-                    payload = asdict(item)
-                    if include_content:
-                        detail = get_document(
-                            database_path,
-                            item.id,
-                            include_content=True,
-                            max_tokens=max(1, max_tokens),
-                            section=params.get("section"),
-                        )
-                        payload["content"] = detail.content if detail else ""
-                    documents.append(payload)
-
-                self._write_json(
-                    200,
-                    _rpc_success(
-                        request_id,
-                        {
-                            "query": query,
-                            "documents": documents,
-                            "count": len(docs),
-                        },
-                    ),
-                )
-                return
-
-            if self.path == "/api/v1/get_doc" and method == "get_document":
-                document_id = int(params.get("document_id", 0))
-                doc = get_document(
-                    database_path,
-                    document_id,
-                    include_content=bool(params.get("include_content", False)),
-                    max_tokens=int(params.get("max_tokens", 200)),
-                    section=params.get("section"),
-                )
-                if doc is None:
-                    self._write_json(404, _rpc_error(request_id, -32004, "document not found"))
-                else:
-                    self._write_json(200, _rpc_success(request_id, asdict(doc)))
-                return
-
-            if self.path == "/api/v1/find_concept" and method == "find_by_concept":
-                concept = str(params.get("concept", "")).strip()
-                max_results = int(params.get("max_results", 10))
-                docs = find_documents_by_concept(database_path, concept, limit=max(1, max_results))
-                self._write_json(
-                    200,
-                    _rpc_success(
-                        request_id,
-                        {
-                            "concept": concept,
-                            "documents": [asdict(item) for item in docs],
-                            "count": len(docs),
-                        },
-                    ),
-                )
-                return
-
-            self._write_json(404, _rpc_error(request_id, -32601, "method not found"))
-
-        def log_message(self, fmt: str, *args: Any) -> None:  # silence tests
+        if isinstance(req, list):
+            self._write_json(*self._dispatch_batch(req))
             return
+        if not isinstance(req, dict):
+            self._write_body(400, _INVALID_REQUEST)
+            return
+        self._write_json(*self._dispatch(req))
+
+    def _dispatch(self, req: dict[str, Any]) -> RpcResponse:
+        request_id = req.get("id")
+        method = req.get("method")
+        route = self.routes.get((self.path, method)) if isinstance(method, str) else None
+        if route is None:
+            return 404, _rpc_error(request_id, -32601, "method not found")
+        try:
+            return route(request_id, req.get("params") or {})
+        except (AttributeError, TypeError, ValueError):
+            return 400, _rpc_error(request_id, -32602, "invalid params")
+
+    def _dispatch_batch(self, batch: list[Any]) -> tuple[int, Any]:
+        if not batch:
+            return 400, _rpc_error(None, -32600, "empty batch")
+        responses: list[dict[str, Any] | None] = [None] * len(batch)
+        pending: dict[tuple[str, str], list[tuple[int, RpcCall]]] = {}
+        for idx, req in enumerate(batch):
+            if not isinstance(req, dict):
+                responses[idx] = _rpc_error(None, -32600, "invalid request")
+                continue
+            method = req.get("method")
+            key = (self.path, method) if isinstance(method, str) else None
+            if key in self.batch_routes:
+                pending.setdefault(key, []).append((idx, (req.get("id"), req.get("params") or {})))
+                continue
+            responses[idx] = self._dispatch(req)[1]
+        for key, members in pending.items():
+            answered = self.batch_routes[key]([call for _, call in members])
+            for (idx, _), (_, payload) in zip(members, answered):
+                responses[idx] = payload
+        return 200, responses
+
+    def log_message(self, fmt: str, *args: Any) -> None:  # silence tests
+        return
+
+
+def build_handler(
+    database_path: Path,
+    max_body_bytes: int = MAX_BODY_BYTES,
+    query_cache: SemanticCache | None = None,
+    embedding_dtype: str = "fp32",
+    keepalive_timeout: float = KEEPALIVE_TIMEOUT_SECONDS,
+) -> type[ApiRequestHandler]:
+    """Handler class for one database. Only class attributes vary; the methods are shared."""
+    context = RouteContext(database_path=database_path, query_cache=query_cache, embedding_dtype=embedding_dtype)
+    attributes = {
+        "routes": {key: partial(route, context) for key, route in ROUTES.items()},
+        "batch_routes": {key: partial(route, context) for key, route in BATCH_ROUTES.items()},
+        "max_body_bytes": max_body_bytes,
+        "timeout": keepalive_timeout,
+    }
+    return type("Handler", (ApiRequestHandler,), attributes)
 
-    return Handler
 
+def _serve(
+    host: str,
+    port: int,
+    handler: type[BaseHTTPRequestHandler],
+    threads: int | None,
+    reuse_port: bool,
+) -> None:
+    server = WorkerPoolHTTPServer((host, port), handler, max_workers=threads, reuse_port=reuse_port)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
 
-def run_api_server(host: str, port: int, database_path: Path) -> None:
-    server = ThreadingHTTPServer((host, port), build_handler(database_path))
-    server.serve_forever()
+
+def _exit_on_sigterm(signum: int, frame: Any) -> None:
+    raise SystemExit(0)
+
+
+def run_api_server(
+    host: str,
+    port: int,
+    database_path: Path,
+    threads: int | None = None,
+    query_cache: SemanticCache | None = None,
+    embedding_dtype: str = "fp32",
+    workers: int = 1,
+) -> None:
+    """Serve the API; ``workers > 1`` forks that many processes sharing the port via SO_REUSEPORT.
+
+    Each worker process has its own thread pool, connections and query cache. The
+    parent serves too and terminates the children when it stops.
+    """
+    handler = build_handler(database_path, query_cache=query_cache, embedding_dtype=embedding_dtype)
+    workers = max(1, workers)
+    if workers == 1:
+        _serve(host, port, handler, threads, reuse_port=False)
+        return
+    if not hasattr(socket, "SO_REUSEPORT") or not hasattr(os, "fork"):
+        raise RuntimeError("multiple API workers need fork() and SO_REUSEPORT")
+
+    children: list[int] = []
+    previous_handler = signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    try:
+        for _ in range(workers - 1):
+            pid = os.fork()
+            if pid == 0:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                try:
+                    _serve(host, port, handler, threads, reuse_port=True)
+                finally:
+                    os._exit(0)
+            children.append(pid)
+        _serve(host, port, handler, threads, reuse_port=True)
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ChildProcessError, ProcessLookupError):
+                pass
+        signal.signal(signal.SIGTERM, previous_handler)
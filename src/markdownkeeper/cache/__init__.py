@@ -0,0 +1 @@
+"""Module scaffold for MarkdownKeeper."""
@@ -0,0 +1,144 @@
+"""In-process semantic query cache for the long-running API server.
+
+Sits in front of ``semantic_search_documents``. Lookups try an exact match on
+``(normalized query, limit)`` first, then fall back to the nearest cached query
+embedding whose cosine distance is within ``distance_threshold``. Entries expire
+after ``ttl_seconds`` and the least recently used entry is evicted beyond
+``max_entries``. Every entry belongs to one index version (see
+``storage.repository.get_index_version``); a version change drops the cache.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+import time
+from types import ModuleType
+from typing import Any
+
+from markdownkeeper.query.embeddings import cosine_similarity, embed_query
+
+np: ModuleType | None
+try:
+    import numpy as np  # type: ignore[import-not-found, no-redef]
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    key: tuple[str, int]
+    vector: list[float]
+    results: list[Any]
+    expires_at: float
+
+
+class SemanticCache:
+    """Thread-safe LRU/TTL cache keyed by query text with an embedding-similarity fallback."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: int = 3600, distance_threshold: float = 0.05) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.distance_threshold = distance_threshold
+        self.hits = 0
+        self.misses = 0
+        self._version: int | None = None
+        self._entries: OrderedDict[tuple[str, int], _CacheEntry] = OrderedDict()
+        self._matrix: Any = None
+        self._matrix_entries: list[_CacheEntry] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self._matrix_entries = []
+
+    def _sync_version(self, version: int) -> None:
+        if version != self._version:
+            self._entries.clear()
+            self._matrix = None
+            self._matrix_entries = []
+            self._version = version
+
+    def _nearest(self, vector: list[float], limit: int, now: float) -> _CacheEntry | None:
+        if self._matrix is None:
+            self._matrix_entries = list(self._entries.values())
+            if np is not None and self._matrix_entries:
+                self._matrix = np.asarray([entry.vector for entry in self._matrix_entries], dtype=np.float32)
+        candidates = self._matrix_entries
+        if not candidates:
+            return None
+
+        if np is not None and self._matrix is not None and self._matrix.shape[1] == len(vector):
+            # Vectors are L2-normalized, so one matmul yields every cosine similarity.
+            scores = self._matrix @ np.asarray(vector, dtype=np.float32)
+            order = np.argsort(-scores)
+            ranked = [(float(scores[idx]), candidates[int(idx)]) for idx in order]
+        else:
+            ranked = sorted(
+                ((cosine_similarity(vector, entry.vector), entry) for entry in candidates),
+                key=lambda item: item[0],
+                reverse=True,
+            )
+
+        for score, entry in ranked:
+            if 1.0 - score > self.distance_threshold:
+                return None
+            if entry.key[1] == limit and entry.expires_at > now and entry.key in self._entries:
+                return entry
+        return None
+
+    def get(self, query: str, limit: int, version: int) -> list[Any] | None:
+        key = (normalize_query(query), limit)
+        now = time.monotonic()
+        with self._lock:
+            self._sync_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._entries[key]
+                self._matrix = None
+                entry = None
+            if entry is not None:
+                return self._hit(entry)
+            if self.distance_threshold <= 0:
+                self.misses += 1
+                return None
+
+        # Embed outside the lock; a model forward pass must not serialize other lookups.
+        vector, _ = embed_query(key[0])
+        with self._lock:
+            entry = self._nearest(vector, limit, now) if version == self._version else None
+            if entry is None:
+                self.misses += 1
+                return None
+            return self._hit(entry)
+
+    def _hit(self, entry: _CacheEntry) -> list[Any]:
+        self._entries.move_to_end(entry.key)
+        self.hits += 1
+        return list(entry.results)
+
+    def put(self, query: str, limit: int, version: int, results: list[Any]) -> None:
+        key = (normalize_query(query), limit)
+        vector, _ = embed_query(key[0])
+        with self._lock:
+            self._sync_version(version)
+            self._entries[key] = _CacheEntry(
+                key=key,
+                vector=vector,
+                results=list(results),
+                expires_at=time.monotonic() + self.ttl_seconds,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
@@ -1,24 +1,192 @@
 from __future__ import annotations
 
 import argparse
-from dataclasses import asdict
-import json
 import sys
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Callable, Sequence
 
-from markdownkeeper.api.server import run_api_server
-from markdownkeeper.config import DEFAULT_CONFIG_PATH, load_config
+# Only light modules are imported here. Handlers import the repository, parser,
+# API server and watcher (and through them numpy/faiss/watchdog) when they run.
+from markdownkeeper.config import DEFAULT_CONFIG_PATH, AppConfig, load_config
 from markdownkeeper.daemon import reload_background, restart_background, start_background, status_background, stop_background
-from markdownkeeper.indexer.generator import generate_all_indexes
-from markdownkeeper.links.validator import validate_links
-from markdownkeeper.processor.parser import parse_markdown
+from markdownkeeper.jsonio import dump, dumps, loads, to_dict
 from markdownkeeper.service import write_systemd_units
-from markdownkeeper.storage.repository import benchmark_semantic_queries, embedding_coverage, evaluate_semantic_precision, find_documents_by_concept, generate_health_report, get_document, regenerate_embeddings, search_documents, semantic_search_documents, system_stats, upsert_document
-from markdownkeeper.storage.schema import initialize_database
-from markdownkeeper.watcher.service import is_watchdog_available, watch_loop, watch_loop_watchdog
-
-
-def build_parser() -> argparse.ArgumentParser:
+from markdownkeeper.storage.schema import EMBEDDING_DTYPES, initialize_database
+
+
+@dataclass(frozen=True, slots=True)
+class _Arg:
+    """One subcommand argument: ``--name`` options or a bare positional name."""
+
+    name: str
+    type: Callable[[str], Any] = str
+    default: Any = None
+    choices: tuple[str, ...] | None = None
+    flag: bool = False
+    help: str | None = None
+    # Hashed copy of ``choices`` for validation; the tuple keeps help output ordered.
+    allowed: frozenset[str] | None = field(init=False, default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.choices is not None:
+            object.__setattr__(self, "allowed", frozenset(self.choices))
+
+    @property
+    def dest(self) -> str:
+        return self.name.lstrip("-").replace("-", "_")
+
+    def add_to(self, parser: argparse.ArgumentParser) -> None:
+        if self.flag:
+            parser.add_argument(self.name, action="store_true", default=False, help=self.help)
+            return
+        kwargs: dict[str, Any] = {"type": self.type, "choices": self.choices, "help": self.help}
+        if self.name.startswith("-"):
+            kwargs["default"] = self.default
+        parser.add_argument(self.name, **kwargs)
+
+
+_DB_PATH = _Arg("--db-path", Path, help="Override DB path")
+_TEXT_FORMAT = _Arg("--format", default="text", choices=("text", "json"))
+_JSON_FORMAT = _Arg("--format", default="json", choices=("text", "json"))
+_DAEMON_TARGET = _Arg("target", choices=("watch", "api"))
+_PID_FILE = _Arg("--pid-file", Path)
+_CASES_FILE = _Arg("cases_file", Path, help="JSON file with [{query, expected_ids}] entries")
+
+# Subcommand name -> (help, arguments). build_parser and fast_parse both read this
+# table, so the two parsers cannot drift apart.
+_COMMAND_SPECS: dict[str, tuple[str, tuple[_Arg, ...]]] = {
+    "init-db": ("Initialize SQLite database", (_DB_PATH,)),
+    "show-config": ("Print resolved configuration as JSON", ()),
+    "scan-file": (
+        "Parse and index a markdown file",
+        (_Arg("file", Path, help="Markdown file to scan"), _DB_PATH, _TEXT_FORMAT),
+    ),
+    "scan-dir": (
+        "Parse and index every markdown file under a directory",
+        (
+            _Arg("root", Path, help="Directory to scan recursively"),
+            _DB_PATH,
+            _Arg("--workers", int, help="Parser processes (default: CPU count)"),
+            _TEXT_FORMAT,
+        ),
+    ),
+    "query": (
+        "Search indexed documents",
+        (
+            _Arg("query", help="Search phrase"),
+            _DB_PATH,
+            _Arg("--limit", int, 10, help="Max results"),
+            _TEXT_FORMAT,
+            _Arg("--include-content", flag=True),
+            _Arg("--max-tokens", int, 200),
+            _Arg("--search-mode", default="semantic", choices=("semantic", "lexical")),
+        ),
+    ),
+    "get-doc": (
+        "Retrieve document metadata by id",
+        (
+            _Arg("id", int, help="Document id"),
+            _DB_PATH,
+            _JSON_FORMAT,
+            _Arg("--include-content", flag=True),
+            _Arg("--max-tokens", int),
+            _Arg("--section"),
+        ),
+    ),
+    "check-links": (
+        "Validate indexed links",
+        (_DB_PATH, _TEXT_FORMAT, _Arg("--check-external", flag=True, help="Also validate external HTTP links")),
+    ),
+    "find-concept": (
+        "Find docs by concept",
+        (_Arg("concept"), _DB_PATH, _Arg("--limit", int, 10), _JSON_FORMAT),
+    ),
+    "build-index": (
+        "Generate markdown index files",
+        (_DB_PATH, _Arg("--output-dir", Path, Path("_index"))),
+    ),
+    "watch": (
+        "Watch docs and auto-index changes",
+        (
+            _DB_PATH,
+            _Arg("--interval", float, help="Polling interval (default 2.0) or watchdog debounce (default 1.0), seconds"),
+            _Arg("--iterations", int),
+            _Arg("--mode", default="auto", choices=("auto", "polling", "watchdog")),
+            _Arg("--duration", float, help="Max seconds to run in watchdog mode"),
+        ),
+    ),
+    "serve-api": (
+        "Run JSON-RPC API server",
+        (
+            _DB_PATH,
+            _Arg("--host"),
+            _Arg("--port", int),
+            _Arg("--threads-http", int, help="HTTP worker pool size"),
+            _Arg("--workers", int, 1, help="Server processes sharing the port (SO_REUSEPORT)"),
+            _Arg(
+                "--embedding-dtype",
+                default="fp32",
+                choices=EMBEDDING_DTYPES,
+                help="Document embedding precision used for semantic scoring",
+            ),
+        ),
+    ),
+    "daemon-start": (
+        "Start watch/api as background daemon",
+        (_DAEMON_TARGET, _PID_FILE, _Arg("--db-path", Path)),
+    ),
+    "daemon-stop": ("Stop background daemon", (_DAEMON_TARGET, _PID_FILE)),
+    "daemon-status": ("Show daemon status", (_DAEMON_TARGET, _PID_FILE)),
+    "daemon-restart": (
+        "Restart background daemon",
+        (_DAEMON_TARGET, _PID_FILE, _Arg("--db-path", Path)),
+    ),
+    "daemon-reload": ("Reload background daemon config via SIGHUP", (_DAEMON_TARGET, _PID_FILE)),
+    "embeddings-generate": (
+        "Generate/rebuild document embeddings",
+        (_DB_PATH, _Arg("--model", default="all-MiniLM-L6-v2")),
+    ),
+    "embeddings-status": ("Show embedding coverage", (_DB_PATH, _TEXT_FORMAT)),
+    "embeddings-eval": (
+        "Evaluate semantic precision@k from JSON cases",
+        (_CASES_FILE, _DB_PATH, _Arg("--k", int, 5), _JSON_FORMAT),
+    ),
+    "semantic-benchmark": (
+        "Run semantic latency/precision benchmark",
+        (_CASES_FILE, _DB_PATH, _Arg("--k", int, 5), _Arg("--iterations", int, 3), _JSON_FORMAT),
+    ),
+    "stats": ("Show operational metrics summary", (_DB_PATH, _JSON_FORMAT)),
+    "report": ("Show health report", (_DB_PATH, _TEXT_FORMAT)),
+    "write-systemd": (
+        "Generate systemd service unit files",
+        (
+            _Arg("--output-dir", Path, Path("deploy/systemd")),
+            _Arg("--exec-path", default="/usr/local/bin/mdkeeper"),
+            _Arg("--config-path", default="/etc/markdownkeeper/config.toml"),
+        ),
+    ),
+}
+
+
+def _selected_command(argv: Sequence[str]) -> str | None:
+    """First positional token of argv, skipping the global --config option and its value."""
+    skip_next = False
+    for token in argv:
+        if skip_next:
+            skip_next = False
+        elif token == "--config":
+            skip_next = True
+        elif not token.startswith("-"):
+            return token
+    return None
+
+
+def build_parser(argv: Sequence[str] | None = None) -> argparse.ArgumentParser:
+    """CLI parser; with ``argv`` only the subcommand named there gets its arguments, otherwise all do.
+
+    Every subparser is registered so ``--help`` and "invalid choice" errors list all commands.
+    """
     parser = argparse.ArgumentParser(prog="mdkeeper", description="MarkdownKeeper CLI")
     parser.add_argument(
         "--config",
@@ -28,124 +196,125 @@ def build_parser() -> argparse.ArgumentParser:
     )
 
     subparsers = parser.add_subparsers(dest="command", required=True)
-
-    init_db = subparsers.add_parser("init-db", help="Initialize SQLite database")
-    init_db.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-
-    subparsers.add_parser("show-config", help="Print resolved configuration as JSON")
-
-    scan_file = subparsers.add_parser("scan-file", help="Parse and index a markdown file")
-    scan_file.add_argument("file", type=Path, help="Markdown file to scan")
-    scan_file.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    scan_file.add_argument("--format", choices=["text", "json"], default="text")
-
-    query = subparsers.add_parser("query", help="Search indexed documents")
-    query.add_argument("query", type=str, help="Search phrase")
-    query.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    query.add_argument("--limit", type=int, default=10, help="Max results")
-    query.add_argument("--format", choices=["text", "json"], default="text")
-    query.add_argument("--include-content", action="store_true")
-    query.add_argument("--max-tokens", type=int, default=200)
-    query.add_argument("--search-mode", choices=["semantic", "lexical"], default="semantic")
-
-    get_doc = subparsers.add_parser("get-doc", help="Retrieve document metadata by id")
-    get_doc.add_argument("id", type=int, help="Document id")
-    get_doc.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    get_doc.add_argument("--format", choices=["text", "json"], default="json")
-    get_doc.add_argument("--include-content", action="store_true")
-    get_doc.add_argument("--max-tokens", type=int, default=None)
-    get_doc.add_argument("--section", type=str, default=None)
-
-    check_links = subparsers.add_parser("check-links", help="Validate indexed links")
-    check_links.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    check_links.add_argument("--format", choices=["text", "json"], default="text")
-    check_links.add_argument("--check-external", action="store_true", default=False,
-                             help="Also validate external HTTP links")
-
-    find_concept = subparsers.add_parser("find-concept", help="Find docs by concept")
-    find_concept.add_argument("concept", type=str)
-    find_concept.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    find_concept.add_argument("--limit", type=int, default=10)
-    find_concept.add_argument("--format", choices=["text", "json"], default="json")
-
-    build_index = subparsers.add_parser("build-index", help="Generate markdown index files")
-    build_index.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    build_index.add_argument("--output-dir", type=Path, default=Path("_index"))
-
-    watch = subparsers.add_parser("watch", help="Watch docs and auto-index changes")
-    watch.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    watch.add_argument("--interval", type=float, default=1.0)
-    watch.add_argument("--iterations", type=int, default=None)
-    watch.add_argument("--mode", choices=["auto", "polling", "watchdog"], default="auto")
-    watch.add_argument("--duration", type=float, default=None, help="Max seconds to run in watchdog mode")
-
-    api = subparsers.add_parser("serve-api", help="Run JSON-RPC API server")
-    api.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    api.add_argument("--host", type=str, default=None)
-    api.add_argument("--port", type=int, default=None)
-
-    daemon_start = subparsers.add_parser("daemon-start", help="Start watch/api as background daemon")
-    daemon_start.add_argument("target", choices=["watch", "api"])
-    daemon_start.add_argument("--pid-file", type=Path, default=None)
-    daemon_start.add_argument("--db-path", type=Path, default=None)
-
-    daemon_stop = subparsers.add_parser("daemon-stop", help="Stop background daemon")
-    daemon_stop.add_argument("target", choices=["watch", "api"])
-    daemon_stop.add_argument("--pid-file", type=Path, default=None)
-
-    daemon_status = subparsers.add_parser("daemon-status", help="Show daemon status")
-    daemon_status.add_argument("target", choices=["watch", "api"])
-    daemon_status.add_argument("--pid-file", type=Path, default=None)
-
-    daemon_restart = subparsers.add_parser("daemon-restart", help="Restart background daemon")
-    daemon_restart.add_argument("target", choices=["watch", "api"])
-    daemon_restart.add_argument("--pid-file", type=Path, default=None)
-    daemon_restart.add_argument("--db-path", type=Path, default=None)
-
-    daemon_reload = subparsers.add_parser("daemon-reload", help="Reload background daemon config via SIGHUP")
-    daemon_reload.add_argument("target", choices=["watch", "api"])
-    daemon_reload.add_argument("--pid-file", type=Path, default=None)
-
-    embeddings_generate = subparsers.add_parser("embeddings-generate", help="Generate/rebuild document embeddings")
-    embeddings_generate.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    embeddings_generate.add_argument("--model", type=str, default="all-MiniLM-L6-v2")
-
-    embeddings_status = subparsers.add_parser("embeddings-status", help="Show embedding coverage")
-    embeddings_status.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    embeddings_status.add_argument("--format", choices=["text", "json"], default="text")
-
-    embeddings_eval = subparsers.add_parser("embeddings-eval", help="Evaluate semantic precision@k from JSON cases")
-    embeddings_eval.add_argument("cases_file", type=Path, help="JSON file with [{query, expected_ids}] entries")
-    embeddings_eval.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    embeddings_eval.add_argument("--k", type=int, default=5)
-    embeddings_eval.add_argument("--format", choices=["text", "json"], default="json")
-
-    semantic_benchmark = subparsers.add_parser("semantic-benchmark", help="Run semantic latency/precision benchmark")
-    semantic_benchmark.add_argument("cases_file", type=Path, help="JSON file with [{query, expected_ids}] entries")
-    semantic_benchmark.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    semantic_benchmark.add_argument("--k", type=int, default=5)
-    semantic_benchmark.add_argument("--iterations", type=int, default=3)
-    semantic_benchmark.add_argument("--format", choices=["text", "json"], default="json")
-
-    stats = subparsers.add_parser("stats", help="Show operational metrics summary")
-    stats.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    stats.add_argument("--format", choices=["text", "json"], default="json")
-
-    report = subparsers.add_parser("report", help="Show health report")
-    report.add_argument("--db-path", type=Path, default=None, help="Override DB path")
-    report.add_argument("--format", choices=["text", "json"], default="text")
-
-    systemd = subparsers.add_parser("write-systemd", help="Generate systemd service unit files")
-    systemd.add_argument("--output-dir", type=Path, default=Path("deploy/systemd"))
-    systemd.add_argument("--exec-path", type=str, default="/usr/local/bin/mdkeeper")
-    systemd.add_argument("--config-path", type=str, default="/etc/markdownkeeper/config.toml")
+    selected = _selected_command(argv) if argv is not None else None
+    for name, (help_text, arguments) in _COMMAND_SPECS.items():
+        command = subparsers.add_parser(name, help=help_text)
+        if argv is None or name == selected:
+            for argument in arguments:
+                argument.add_to(command)
 
     return parser
 
 
-def _resolve_db_path(config_path: Path, db_path_override: Path | None) -> Path:
-    config = load_config(config_path)
-    return db_path_override or Path(config.storage.database_path)
+@dataclass(frozen=True, slots=True)
+class _FastTable:
+    options: dict[str, _Arg]
+    positionals: tuple[_Arg, ...]
+    defaults: dict[str, Any]
+
+
+def _fast_table(arguments: tuple[_Arg, ...]) -> _FastTable:
+    return _FastTable(
+        options={argument.name: argument for argument in arguments if argument.name.startswith("-")},
+        positionals=tuple(argument for argument in arguments if not argument.name.startswith("-")),
+        defaults={argument.dest: False if argument.flag else argument.default for argument in arguments},
+    )
+
+
+# Built once at import so fast_parse does one dict lookup per option token.
+_FAST_TABLES: dict[str, _FastTable] = {name: _fast_table(arguments) for name, (_, arguments) in _COMMAND_SPECS.items()}
+
+
+def _convert(argument: _Arg, raw: str) -> Any:
+    value = argument.type(raw)
+    if argument.allowed is not None and value not in argument.allowed:
+        raise ValueError(f"invalid choice: {raw!r}")
+    return value
+
+
+def fast_parse(argv: Sequence[str]) -> argparse.Namespace | None:
+    """Single-pass parse of the common argv shapes; ``None`` means "let argparse handle it".
+
+    Accepts exact ``--option value``/``--option=value`` spellings, flags and positionals
+    in order. Help requests, abbreviations, unknown options and any conversion or
+    choice error return ``None`` so argparse produces its usual output and messages.
+    """
+    tokens = list(argv)
+    config: Path = DEFAULT_CONFIG_PATH
+    index = 0
+    while index < len(tokens) and tokens[index].startswith("--config"):
+        token = tokens[index]
+        if token == "--config" and index + 1 < len(tokens):
+            config, index = Path(tokens[index + 1]), index + 2
+        elif token.startswith("--config="):
+            config, index = Path(token.partition("=")[2]), index + 1
+        else:
+            return None
+    command = tokens[index] if index < len(tokens) else None
+    table = _FAST_TABLES.get(command) if command is not None else None
+    if table is None:
+        return None
+
+    options = table.options
+    positionals = table.positionals
+    values: dict[str, Any] = {"config": config, "command": command, **table.defaults}
+    filled = 0
+    index += 1
+    try:
+        while index < len(tokens):
+            token = tokens[index]
+            index += 1
+            if token in ("-h", "--help", "--"):
+                return None
+            if token.startswith("--"):
+                name, has_value, inline = token.partition("=")
+                argument = options.get(name)
+                if argument is None:
+                    return None
+                if argument.flag:
+                    if has_value:
+                        return None
+                    values[argument.dest] = True
+                    continue
+                if not has_value:
+                    if index >= len(tokens):
+                        return None
+                    inline, index = tokens[index], index + 1
+                values[argument.dest] = _convert(argument, inline)
+            elif token.startswith("-") and token != "-":
+                return None
+            elif filled < len(positionals):
+                argument = positionals[filled]
+                filled += 1
+                values[argument.dest] = _convert(argument, token)
+            else:
+                return None
+    except (TypeError, ValueError):
+        return None
+    if filled < len(positionals):
+        return None
+    return argparse.Namespace(**values)
+
+
+def _emit_json(payload: object, pretty: bool | None = None) -> None:
+    """Write JSON to stdout: indented on a terminal, compact bytes when piped."""
+    if pretty is None:
+        pretty = sys.stdout.isatty()
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        print(dumps(payload, indent=pretty))
+        return
+    sys.stdout.flush()
+    dump(payload, buffer, indent=pretty)
+    buffer.write(b"\n")
+    buffer.flush()
+
+
+def _resolve_db_path(config_path: Path, db_path_override: Path | None, config: AppConfig | None = None) -> Path:
+    if db_path_override is not None:
+        return db_path_override
+    config = config or load_config(config_path)
+    return Path(config.storage.database_path)
 
 
 def _handle_init_db(args: argparse.Namespace) -> int:
@@ -166,35 +335,34 @@ def _handle_show_config(args: argparse.Namespace) -> int:
         "storage": {"database_path": config.storage.database_path},
         "api": {"host": config.api.host, "port": config.api.port},
     }
-    print(json.dumps(payload, indent=2))
+    _emit_json(payload)
     return 0
 
 
 def _handle_scan_file(args: argparse.Namespace) -> int:
-    if not args.file.exists() or not args.file.is_file():
+    from markdownkeeper.processor.parser import parse_markdown_file
+    from markdownkeeper.storage.repository import upsert_document
+
+    parsed = parse_markdown_file(args.file)
+    if parsed is None:
         print(f"File not found: {args.file}")
         return 1
 
     db_path = _resolve_db_path(args.config, args.db_path)
     initialize_database(db_path)
 
-    content = args.file.read_text(encoding="utf-8")
-    parsed = parse_markdown(content)
     document_id = upsert_document(db_path, args.file.resolve(), parsed)
 
     if args.format == "json":
-        print(
-            json.dumps(
-                {
-                    "document_id": document_id,
-                    "path": str(args.file),
-                    "title": parsed.title,
-                    "headings": len(parsed.headings),
-                    "links": len(parsed.links),
-                    "token_estimate": parsed.token_estimate,
-                },
-                indent=2,
-            )
+        _emit_json(
+            {
+                "document_id": document_id,
+                "path": str(args.file),
+                "title": parsed.title,
+                "headings": len(parsed.headings),
+                "links": len(parsed.links),
+                "token_estimate": parsed.token_estimate,
+            }
         )
     else:
         print(
@@ -205,7 +373,33 @@ def _handle_scan_file(args: argparse.Namespace) -> int:
     return 0
 
 
+def _handle_scan_dir(args: argparse.Namespace) -> int:
+    from markdownkeeper.processor.parser import parse_markdown_files
+    from markdownkeeper.storage.repository import upsert_documents
+
+    if not args.root.is_dir():
+        print(f"Directory not found: {args.root}")
+        return 1
+
+    config = load_config(args.config)
+    db_path = _resolve_db_path(args.config, args.db_path, config)
+    initialize_database(db_path)
+
+    extensions = {ext.lower() for ext in config.watch.extensions}
+    files = sorted(path.resolve() for path in args.root.rglob("*") if path.suffix.lower() in extensions)
+    parsed = parse_markdown_files(files, max_workers=args.workers)
+    document_ids = upsert_documents(db_path, [(path, doc) for path, doc in zip(files, parsed) if doc is not None])
+
+    if args.format == "json":
+        _emit_json({"root": str(args.root), "indexed": len(document_ids), "document_ids": document_ids})
+    else:
+        print(f"Indexed {len(document_ids)} files under {args.root}")
+    return 0
+
+
 def _handle_query(args: argparse.Namespace) -> int:
+    from markdownkeeper.storage.repository import get_documents_bulk, search_documents, semantic_search_documents
+
     db_path = _resolve_db_path(args.config, args.db_path)
     initialize_database(db_path)
     if args.search_mode == "semantic":
@@ -213,30 +407,35 @@ def _handle_query(args: argparse.Namespace) -> int:
     else:
         results = search_documents(db_path, args.query, limit=max(1, args.limit))
 
-    docs_payload: list[dict[str, object]] = []
-    for result in results:
-        payload = asdict(result)
-        if args.include_content:
-            detail = get_document(
-                db_path,
-                result.id,
-                include_content=True,
-                max_tokens=max(1, int(args.max_tokens or 200)),
-            )
-            payload["content"] = detail.content if detail else ""
-        docs_payload.append(payload)
-
-    if args.format == "json":
-        print(json.dumps({"query": args.query, "search_mode": args.search_mode, "count": len(results), "documents": docs_payload}, indent=2))
-    else:
+    if args.format != "json":
         if not results:
             print("No documents matched query")
         for result in results:
             print(f"[{result.id}] {result.title} ({result.path})")
+        return 0
+
+    docs_payload: list[object] = list(results)
+    if args.include_content:
+        details = get_documents_bulk(
+            db_path,
+            [result.id for result in results],
+            include_content=True,
+            max_tokens=max(1, int(args.max_tokens or 200)),
+        )
+        docs_payload = []
+        for result in results:
+            payload = to_dict(result)
+            detail = details.get(result.id)
+            payload["content"] = detail.content if detail else ""
+            docs_payload.append(payload)
+
+    _emit_json({"query": args.query, "search_mode": args.search_mode, "count": len(results), "documents": docs_payload})
     return 0
 
 
 def _handle_get_doc(args: argparse.Namespace) -> int:
+    from markdownkeeper.storage.repository import get_document
+
     db_path = _resolve_db_path(args.config, args.db_path)
     initialize_database(db_path)
     result = get_document(db_path, args.id, include_content=args.include_content, max_tokens=args.max_tokens, section=args.section)
@@ -246,7 +445,7 @@ def _handle_get_doc(args: argparse.Namespace) -> int:
         return 1
 
     if args.format == "json":
-        print(json.dumps(asdict(result), indent=2))
+        _emit_json(result)
     else:
         print(f"[{result.id}] {result.title}")
         print(f"Path: {result.path}")
@@ -260,36 +459,37 @@ def _handle_get_doc(args: argparse.Namespace) -> int:
 
 
 def _handle_check_links(args: argparse.Namespace) -> int:
+    from markdownkeeper.links.validator import validate_links
+
     db_path = _resolve_db_path(args.config, args.db_path)
     initialize_database(db_path)
     results = validate_links(db_path, check_external=args.check_external)
-    broken = [asdict(item) for item in results if item.status != "ok"]
+    broken = [item for item in results if item.status != "ok"]
 
     if args.format == "json":
-        print(
-            json.dumps(
-                {
-                    "checked": len(results),
-                    "broken": len(broken),
-                    "broken_links": broken,
-                },
-                indent=2,
-            )
+        _emit_json(
+            {
+                "checked": len(results),
+                "broken": len(broken),
+                "broken_links": broken,
+            }
         )
     else:
         print(f"Checked {len(results)} links; broken={len(broken)}")
         for item in broken:
-            print(f"- [{item['link_id']}] {item['target']}")
+            print(f"- [{item.link_id}] {item.target}")
 
     return 0 if not broken else 1
 
 
 def _handle_find_concept(args: argparse.Namespace) -> int:
+    from markdownkeeper.storage.repository import find_documents_by_concept
+
     db_path = _resolve_db_path(args.config, args.db_path)
     initialize_database(db_path)
     results = find_documents_by_concept(db_path, args.concept, limit=max(1, args.limit))
     if args.format == "json":
-        print(json.dumps({"concept": args.concept, "count": len(results), "documents": [asdict(item) for item in results]}, indent=2))
+        _emit_json({"concept": args.concept, "count": len(results), "documents": results})
     else:
         for result in results:
             print(f"[{result.id}] {result.title} ({result.path})")
@@ -297,6 +497,8 @@ def _handle_find_concept(args: argparse.Namespace) -> int:
 
 
 def _handle_build_index(args: argparse.Namespace) -> int:
+    from markdownkeeper.indexer.generator import generate_all_indexes
+
     db_path = _resolve_db_path(args.config, args.db_path)
     initialize_database(db_path)
     outs = generate_all_indexes(db_path, args.output_dir)
@@ -306,38 +508,61 @@ def _handle_build_index(args: argparse.Namespace) -> int:
 
 
 def _handle_watch(args: argparse.Namespace) -> int:
+    from markdownkeeper.watcher.service import (
+        POLL_INTERVAL_SECONDS,
+        WATCHDOG_DEBOUNCE_SECONDS,
+        WatchRunResult,
+        is_watchdog_available,
+        watch_loop,
+        watch_loop_watchdog,
+    )
+
     config = load_config(args.config)
-    db_path = _resolve_db_path(args.config, args.db_path)
+    db_path = _resolve_db_path(args.config, args.db_path, config)
     initialize_database(db_path)
 
     roots = [Path(root) for root in config.watch.roots]
     mode = args.mode
     if mode == "auto":
         mode = "watchdog" if is_watchdog_available() else "polling"
+        if mode == "polling":
+            print("polling mode active: install 'watchdog' for event-driven watching", file=sys.stderr)
+
+    def poll() -> WatchRunResult:
+        return watch_loop(
+            database_path=db_path,
+            roots=roots,
+            extensions=config.watch.extensions,
+            interval_s=max(0.1, args.interval if args.interval is not None else POLL_INTERVAL_SECONDS),
+            iterations=args.iterations,
+        )
 
     if mode == "watchdog":
+        debounce = max(0.05, args.interval if args.interval is not None else WATCHDOG_DEBOUNCE_SECONDS)
         duration = args.duration
         if duration is None and args.iterations is not None:
-            duration = args.iterations * max(0.05, args.interval)
+            duration = args.iterations * debounce
             print(
                 f"watchdog mode: --iterations approximated as --duration {duration:.1f}s",
                 file=sys.stderr,
             )
-        result = watch_loop_watchdog(
-            database_path=db_path,
-            roots=roots,
-            extensions=config.watch.extensions,
-            debounce_s=max(0.05, args.interval),
-            duration_s=duration,
-        )
+        try:
+            result = watch_loop_watchdog(
+                database_path=db_path,
+                roots=roots,
+                extensions=config.watch.extensions,
+                debounce_s=debounce,
+                duration_s=duration,
+            )
+        except OSError as exc:
+            # Typically inotify watch/instance limits; only "auto" may silently degrade.
+            if args.mode != "auto":
+                raise
+            print(f"watchdog failed to start ({exc}); falling back to polling mode", file=sys.stderr)
+            mode = "polling"
+            result = poll()
     else:
-        result = watch_loop(
-            database_path=db_path,
-            roots=roots,
-            extensions=config.watch.extensions,
-            interval_s=max(0.1, args.interval),
-            iterations=args.iterations,
-        )
+        result = poll()
     print(
         f"watch summary mode={mode} created={result.created} modified={result.modified} deleted={result.deleted}"
     )
@@ -345,13 +570,31 @@ def _handle_watch(args: argparse.Namespace) -> int:
 
 
 def _handle_serve_api(args: argparse.Namespace) -> int:
+    from markdownkeeper.api.server import run_api_server
+    from markdownkeeper.cache.semantic import SemanticCache
+
     config = load_config(args.config)
-    db_path = _resolve_db_path(args.config, args.db_path)
+    db_path = _resolve_db_path(args.config, args.db_path, config)
     initialize_database(db_path)
     host = args.host or config.api.host
     port = args.port or config.api.port
+    query_cache = None
+    if config.cache.enabled:
+        query_cache = SemanticCache(
+            max_entries=config.cache.max_entries,
+            ttl_seconds=config.cache.ttl_seconds,
+            distance_threshold=config.cache.distance_threshold,
+        )
     print(f"Starting API server on {host}:{port}")
-    run_api_server(host, port, db_path)
+    run_api_server(
+        host,
+        port,
+        db_path,
+        threads=args.threads_http,
+        query_cache=query_cache,
+        embedding_dtype=args.embedding_dtype,
+        workers=args.workers,
+    )
     return 0
 
 
@@ -421,6 +664,8 @@ def _handle_daemon_reload(args: argparse.Namespace) -> int:
 
 
 def _handle_embeddings_generate(args: argparse.Namespace) -> int:
+    from markdownkeeper.storage.repository import regenerate_embeddings
+
     db_path = _resolve_db_path(args.config, args.db_path)
     initialize_database(db_path)
     count = regenerate_embeddings(db_path, model_name=args.model)
@@ -429,11 +674,13 @@ def _handle_embeddings_generate(args: argparse.Namespace) -> int:
 
 
 def _handle_embeddings_status(args: argparse.Namespace) -> int:
+    from markdownkeeper.storage.repository import embedding_coverage
+
     db_path = _resolve_db_path(args.config, args.db_path)
     initialize_database(db_path)
     coverage = embedding_coverage(db_path)
     if args.format == "json":
-        print(json.dumps(coverage, indent=2))
+        _emit_json(coverage)
     else:
         print(
             f"Embedding coverage documents={coverage['documents']} "
@@ -444,11 +691,13 @@ def _handle_embeddings_status(args: argparse.Namespace) -> int:
 
 
 def _handle_stats(args: argparse.Namespace) -> int:
+    from markdownkeeper.storage.repository import system_stats
+
     db_path = _resolve_db_path(args.config, args.db_path)
     initialize_database(db_path)
     payload = system_stats(db_path)
     if args.format == "json":
-        print(json.dumps(payload, indent=2))
+        _emit_json(payload)
     else:
         queue = payload["queue"]
         print(
@@ -460,12 +709,14 @@ def _handle_stats(args: argparse.Namespace) -> int:
 
 
 def _handle_report(args: argparse.Namespace) -> int:
+    from markdownkeeper.storage.repository import generate_health_report
+
     db_path = _resolve_db_path(args.config, args.db_path)
     initialize_database(db_path)
     report = generate_health_report(db_path)
 
     if args.format == "json":
-        print(json.dumps(report, indent=2))
+        _emit_json(report)
     else:
         lines = [
             "┌──────────────────────────────────────────┐",
@@ -487,16 +738,27 @@ def _handle_report(args: argparse.Namespace) -> int:
     return 0
 
 
+def _load_cases(path: Path) -> list[dict[str, object]] | None:
+    """Parse a cases file (a JSON array) straight from bytes; prints the problem and returns None if unusable."""
+    try:
+        with open(path, "rb") as handle:
+            payload = loads(handle.read())
+    except OSError:
+        print(f"Cases file not found: {path}")
+        return None
+    if not isinstance(payload, list):
+        print("Cases file must be a JSON array")
+        return None
+    return payload
+
+
 def _handle_semantic_benchmark(args: argparse.Namespace) -> int:
+    from markdownkeeper.storage.repository import benchmark_semantic_queries
+
     db_path = _resolve_db_path(args.config, args.db_path)
     initialize_database(db_path)
-    if not args.cases_file.exists() or not args.cases_file.is_file():
-        print(f"Cases file not found: {args.cases_file}")
-        return 1
-
-    payload = json.loads(args.cases_file.read_text(encoding="utf-8"))
-    if not isinstance(payload, list):
-        print("Cases file must be a JSON array")
+    payload = _load_cases(args.cases_file)
+    if payload is None:
         return 1
 
     result = benchmark_semantic_queries(
@@ -506,7 +768,7 @@ def _handle_semantic_benchmark(args: argparse.Namespace) -> int:
         iterations=max(1, int(args.iterations)),
     )
     if args.format == "json":
-        print(json.dumps(result, indent=2))
+        _emit_json(result)
     else:
         lat = result["latency_ms"]
         print(
@@ -517,20 +779,17 @@ def _handle_semantic_benchmark(args: argparse.Namespace) -> int:
 
 
 def _handle_embeddings_eval(args: argparse.Namespace) -> int:
+    from markdownkeeper.storage.repository import evaluate_semantic_precision
+
     db_path = _resolve_db_path(args.config, args.db_path)
     initialize_database(db_path)
-    if not args.cases_file.exists() or not args.cases_file.is_file():
-        print(f"Cases file not found: {args.cases_file}")
-        return 1
-
-    payload = json.loads(args.cases_file.read_text(encoding="utf-8"))
-    if not isinstance(payload, list):
-        print("Cases file must be a JSON array")
+    payload = _load_cases(args.cases_file)
+    if payload is None:
         return 1
 
     result = evaluate_semantic_precision(db_path, payload, k=max(1, int(args.k)))
     if args.format == "json":
-        print(json.dumps(result, indent=2))
+        _emit_json(result)
     else:
         print(
             f"precision@{result['k']}={result['precision_at_k']:.3f} "
@@ -549,41 +808,40 @@ def _handle_write_systemd(args: argparse.Namespace) -> int:
     return 0
 
 
-def main() -> int:
-    parser = build_parser()
-    args = parser.parse_args()
-
-    handlers = {
-        "init-db": _handle_init_db,
-        "show-config": _handle_show_config,
-        "scan-file": _handle_scan_file,
-        "query": _handle_query,
-        "get-doc": _handle_get_doc,
-        "check-links": _handle_check_links,
-        "find-concept": _handle_find_concept,
-        "build-index": _handle_build_index,
-        "watch": _handle_watch,
-        "serve-api": _handle_serve_api,
-        "daemon-start": _handle_daemon_start,
-        "daemon-stop": _handle_daemon_stop,
-        "daemon-status": _handle_daemon_status,
-        "daemon-restart": _handle_daemon_restart,
-        "daemon-reload": _handle_daemon_reload,
-        "embeddings-generate": _handle_embeddings_generate,
-        "embeddings-status": _handle_embeddings_status,
-        "embeddings-eval": _handle_embeddings_eval,
-        "stats": _handle_stats,
-        "report": _handle_report,
-        "semantic-benchmark": _handle_semantic_benchmark,
-        "write-systemd": _handle_write_systemd,
-    }
+# Same keys and order as _COMMAND_SPECS; tests keep the two tables in step.
+_HANDLERS: dict[str, Callable[[argparse.Namespace], int]] = {
+    "init-db": _handle_init_db,
+    "show-config": _handle_show_config,
+    "scan-file": _handle_scan_file,
+    "scan-dir": _handle_scan_dir,
+    "query": _handle_query,
+    "get-doc": _handle_get_doc,
+    "check-links": _handle_check_links,
+    "find-concept": _handle_find_concept,
+    "build-index": _handle_build_index,
+    "watch": _handle_watch,
+    "serve-api": _handle_serve_api,
+    "daemon-start": _handle_daemon_start,
+    "daemon-stop": _handle_daemon_stop,
+    "daemon-status": _handle_daemon_status,
+    "daemon-restart": _handle_daemon_restart,
+    "daemon-reload": _handle_daemon_reload,
+    "embeddings-generate": _handle_embeddings_generate,
+    "embeddings-status": _handle_embeddings_status,
+    "embeddings-eval": _handle_embeddings_eval,
+    "semantic-benchmark": _handle_semantic_benchmark,
+    "stats": _handle_stats,
+    "report": _handle_report,
+    "write-systemd": _handle_write_systemd,
+}
 
-    handler = handlers.get(args.command)
-    if handler is None:
-        parser.error(f"Unknown command: {args.command}")
-        return 2
 
-    return handler(args)
+def main() -> int:
+    argv = sys.argv[1:]
+    args = fast_parse(argv)
+    if args is None:
+        args = build_parser(argv).parse_args(argv)
+    return _HANDLERS[args.command](args)
 
 
 if __name__ == "__main__":
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
+import sys
 try:
     import tomllib
 except ModuleNotFoundError:  # pragma: no cover
     import tomli as tomllib
 
 
+_DEFAULT_ROOTS = (".",)
+_DEFAULT_EXTENSIONS = (".md", ".markdown")
+_DEFAULT_REQUIRED_FIELDS = ("title",)
+
+
 @dataclass(slots=True)
 class WatchConfig:
-    roots: list[str] = field(default_factory=lambda: ["."])
-    extensions: list[str] = field(default_factory=lambda: [".md", ".markdown"])
+    roots: tuple[str, ...] = _DEFAULT_ROOTS
+    extensions: tuple[str, ...] = _DEFAULT_EXTENSIONS
     debounce_ms: int = 500
 
 
@@ -28,7 +35,7 @@ class ApiConfig:
 
 @dataclass(slots=True)
 class MetadataConfig:
-    required_frontmatter_fields: list[str] = field(default_factory=lambda: ["title"])
+    required_frontmatter_fields: tuple[str, ...] = _DEFAULT_REQUIRED_FIELDS
     auto_fill_category: bool = True
 
 
@@ -36,6 +43,8 @@ class MetadataConfig:
 class CacheConfig:
     enabled: bool = True
     ttl_seconds: int = 3600
+    max_entries: int = 256
+    distance_threshold: float = 0.05
 
 
 @dataclass(slots=True)
@@ -51,9 +60,19 @@ DEFAULT_CONFIG_PATH = Path("markdownkeeper.toml")
 
 
 def load_config(path: Path = DEFAULT_CONFIG_PATH) -> AppConfig:
-    if not path.exists():
+    """Parse the TOML config; repeated calls for an unchanged file return the cached result.
+
+    The returned config is shared between callers and must not be mutated.
+    """
+    try:
+        stat = path.stat()
+    except OSError:
         return AppConfig()
+    return _load_config_file(path.resolve(), stat.st_mtime_ns, stat.st_size)
+
 
+@lru_cache(maxsize=4)
+def _load_config_file(path: Path, mtime_ns: int, size: int) -> AppConfig:
     with path.open("rb") as handle:
         raw = tomllib.load(handle)
 
@@ -65,8 +84,8 @@ def load_config(path: Path = DEFAULT_CONFIG_PATH) -> AppConfig:
 
     return AppConfig(
         watch=WatchConfig(
-            roots=list(watch.get("roots", ["."])),
-            extensions=list(watch.get("extensions", [".md", ".markdown"])),
+            roots=tuple(watch.get("roots", _DEFAULT_ROOTS)),
+            extensions=tuple(sys.intern(str(ext)) for ext in watch.get("extensions", _DEFAULT_EXTENSIONS)),
             debounce_ms=int(watch.get("debounce_ms", 500)),
         ),
         storage=StorageConfig(
@@ -77,11 +96,13 @@ def load_config(path: Path = DEFAULT_CONFIG_PATH) -> AppConfig:
             port=int(api.get("port", 8765)),
         ),
         metadata=MetadataConfig(
-            required_frontmatter_fields=list(metadata.get("required_frontmatter_fields", ["title"])),
+            required_frontmatter_fields=tuple(metadata.get("required_frontmatter_fields", _DEFAULT_REQUIRED_FIELDS)),
             auto_fill_category=bool(metadata.get("auto_fill_category", True)),
         ),
         cache=CacheConfig(
             enabled=bool(cache.get("enabled", True)),
             ttl_seconds=int(cache.get("ttl_seconds", 3600)),
+            max_entries=int(cache.get("max_entries", 256)),
+            distance_threshold=float(cache.get("distance_threshold", 0.05)),
         ),
     )
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 import os
+import select
 import signal
 import subprocess
 import time
@@ -29,6 +30,36 @@ def _is_pid_running(pid: int) -> bool:
     return True
 
 
+def _wait_for_exit(pid: int, timeout_s: float) -> bool:
+    """Block until ``pid`` exits or ``timeout_s`` passes; True if it exited.
+
+    Uses a pidfd on Linux 5.3+, so the kernel wakes us at exit (an unreaped zombie
+    counts as exited). Elsewhere, or if pidfd_open is refused, polls every 50 ms.
+    """
+    pidfd_open = getattr(os, "pidfd_open", None)
+    if pidfd_open is not None:
+        try:
+            fd = pidfd_open(pid)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            fd = None
+        if fd is not None:
+            try:
+                poller = select.poll()
+                poller.register(fd, select.POLLIN)
+                return bool(poller.poll(max(0, int(timeout_s * 1000))))
+            finally:
+                os.close(fd)
+
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if not _is_pid_running(pid):
+            return True
+        time.sleep(0.05)
+    return False
+
+
 def start_background(command: list[str], pid_file: Path) -> int:
     existing = _read_pid(pid_file)
     if existing is not None and _is_pid_running(existing):
@@ -56,12 +87,9 @@ def stop_background(pid_file: Path, timeout_s: float = 5.0) -> bool:
         return False
 
     os.kill(pid, signal.SIGTERM)
-    deadline = time.monotonic() + timeout_s
-    while time.monotonic() < deadline:
-        if not _is_pid_running(pid):
-            pid_file.unlink(missing_ok=True)
-            return True
-        time.sleep(0.05)
+    if _wait_for_exit(pid, timeout_s):
+        pid_file.unlink(missing_ok=True)
+        return True
 
     os.kill(pid, signal.SIGKILL)
     pid_file.unlink(missing_ok=True)
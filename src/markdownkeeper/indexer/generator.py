@@ -2,110 +2,143 @@ from __future__ import annotations
 
 from pathlib import Path
 import sqlite3
-
-from markdownkeeper.storage.repository import list_documents
-
-
-def _write(path: Path, lines: list[str]) -> Path:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
-    return path
-
-
-def generate_master_index(database_path: Path, output_dir: Path) -> Path:
-    out = output_dir / "master.md"
-    docs = list_documents(database_path)
-
-    lines = ["# MarkdownKeeper Master Index", ""]
-    if not docs:
-        lines.append("_No indexed documents found._")
-    else:
-        for doc in docs:
-            summary = doc.summary.replace("\n", " ").strip()
-            lines.append(f"- [{doc.id}] **{doc.title or 'Untitled'}** (`{doc.path}`)")
-            if summary:
-                lines.append(f"  - {summary[:180]}")
-
-    return _write(out, lines)
-
-
-def generate_category_index(database_path: Path, output_dir: Path) -> Path:
-    out = output_dir / "by-category.md"
-    lines = ["# Documents by Category", ""]
-    with sqlite3.connect(database_path) as connection:
-        rows = connection.execute(
-            """
-            SELECT COALESCE(category, 'uncategorized') AS category, id, title, path
-            FROM documents
-            ORDER BY category, title
-            """
-        ).fetchall()
-
-    current = None
-    for category, doc_id, title, path in rows:
-        if category != current:
-            lines.extend([f"## {category}", ""])
-            current = category
-        lines.append(f"- [{int(doc_id)}] **{title or 'Untitled'}** (`{path}`)")
-    if len(rows) == 0:
-        lines.append("_No indexed documents found._")
-    return _write(out, lines)
-
-
-def generate_tag_index(database_path: Path, output_dir: Path) -> Path:
-    out = output_dir / "by-tag.md"
-    lines = ["# Documents by Tag", ""]
-    with sqlite3.connect(database_path) as connection:
-        rows = connection.execute(
-            """
-            SELECT t.name, d.id, d.title, d.path
-            FROM tags t
-            JOIN document_tags dt ON dt.tag_id = t.id
-            JOIN documents d ON d.id = dt.document_id
-            ORDER BY t.name, d.title
-            """
-        ).fetchall()
-
+from typing import TextIO
+
+from markdownkeeper.storage.connections import open_read_connection
+from markdownkeeper.storage.schema import refresh_planner_stats
+
+# Rows pulled per fetchmany call; output is written as rows arrive, so memory stays
+# bounded however many documents are indexed.
+FETCH_BATCH_SIZE = 1000
+# Large write buffer so a big index is flushed in few syscalls.
+WRITE_BUFFER_BYTES = 1 << 20
+
+# Kept as constants so a shared connection's statement cache reuses the compiled SQL.
+_MASTER_SQL = "SELECT id, title, summary, path FROM documents ORDER BY updated_at DESC"
+# The ORDER BY repeats the indexed expression so idx_documents_category_title serves it.
+_CATEGORY_SQL = """
+    SELECT COALESCE(category, 'uncategorized'), id, title, path
+    FROM documents
+    ORDER BY COALESCE(category, 'uncategorized'), title
+"""
+_TAG_SQL = """
+    SELECT t.name, d.id, d.title, d.path
+    FROM tags t
+    JOIN document_tags dt ON dt.tag_id = t.id
+    JOIN documents d ON d.id = dt.document_id
+    ORDER BY t.name, d.title
+"""
+_CONCEPT_SQL = """
+    SELECT c.name, d.id, d.title, d.path
+    FROM concepts c
+    JOIN document_concepts dc ON dc.concept_id = c.id
+    JOIN documents d ON d.id = dc.document_id
+    ORDER BY c.name, d.title
+"""
+
+
+def _connect(database_path: Path, connection: sqlite3.Connection | None) -> sqlite3.Connection:
+    return connection if connection is not None else sqlite3.connect(database_path)
+
+
+def _write_grouped(handle: TextIO, cursor: sqlite3.Cursor) -> bool:
+    """Write ``(group, id, title, path)`` rows under ``## group`` headings; False if there were none."""
     current = None
-    for tag, doc_id, title, path in rows:
-        if tag != current:
-            lines.extend([f"## {tag}", ""])
-            current = tag
-        lines.append(f"- [{int(doc_id)}] **{title or 'Untitled'}** (`{path}`)")
-    if len(rows) == 0:
-        lines.append("_No tagged documents found._")
-    return _write(out, lines)
-
-
-def generate_concept_index(database_path: Path, output_dir: Path) -> Path:
-    out = output_dir / "by-concept.md"
-    lines = ["# Documents by Concept", ""]
-    with sqlite3.connect(database_path) as connection:
-        rows = connection.execute(
-            """
-            SELECT c.name, d.id, d.title, d.path
-            FROM concepts c
-            JOIN document_concepts dc ON dc.concept_id = c.id
-            JOIN documents d ON d.id = dc.document_id
-            ORDER BY c.name, d.title
-            """
-        ).fetchall()
-
-    current = None
-    for concept, doc_id, title, path in rows:
-        if concept != current:
-            lines.extend([f"## {concept}", ""])
-            current = concept
-        lines.append(f"- [{int(doc_id)}] **{title or 'Untitled'}** (`{path}`)")
-    if len(rows) == 0:
-        lines.append("_No concept mappings found._")
-    return _write(out, lines)
+    wrote = False
+    while batch := cursor.fetchmany(FETCH_BATCH_SIZE):
+        for group, doc_id, title, path in batch:
+            if group != current:
+                handle.write(f"## {group}\n\n")
+                current = group
+            handle.write(f"- [{int(doc_id)}] **{title or 'Untitled'}** (`{path}`)\n")
+        wrote = True
+    return wrote
+
+
+def _generate_grouped_index(
+    database_path: Path,
+    out: Path,
+    heading: str,
+    empty_message: str,
+    query: str,
+    connection: sqlite3.Connection | None,
+) -> Path:
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with _connect(database_path, connection) as conn, out.open("w", encoding="utf-8", buffering=WRITE_BUFFER_BYTES) as handle:
+        handle.write(f"# {heading}\n\n")
+        if not _write_grouped(handle, conn.execute(query)):
+            handle.write(f"{empty_message}\n")
+    return out
+
+
+def generate_master_index(
+    database_path: Path, output_dir: Path, connection: sqlite3.Connection | None = None
+) -> Path:
+    out = output_dir / "master.md"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with _connect(database_path, connection) as conn, out.open("w", encoding="utf-8", buffering=WRITE_BUFFER_BYTES) as handle:
+        handle.write("# MarkdownKeeper Master Index\n\n")
+        cursor = conn.execute(_MASTER_SQL)
+        wrote = False
+        while batch := cursor.fetchmany(FETCH_BATCH_SIZE):
+            for doc_id, title, summary, path in batch:
+                handle.write(f"- [{int(doc_id)}] **{title or 'Untitled'}** (`{path}`)\n")
+                summary = (summary or "").replace("\n", " ").strip()
+                if summary:
+                    handle.write(f"  - {summary[:180]}\n")
+            wrote = True
+        if not wrote:
+            handle.write("_No indexed documents found._\n")
+    return out
+
+
+def generate_category_index(
+    database_path: Path, output_dir: Path, connection: sqlite3.Connection | None = None
+) -> Path:
+    return _generate_grouped_index(
+        database_path,
+        output_dir / "by-category.md",
+        "Documents by Category",
+        "_No indexed documents found._",
+        _CATEGORY_SQL,
+        connection,
+    )
+
+
+def generate_tag_index(
+    database_path: Path, output_dir: Path, connection: sqlite3.Connection | None = None
+) -> Path:
+    return _generate_grouped_index(
+        database_path,
+        output_dir / "by-tag.md",
+        "Documents by Tag",
+        "_No tagged documents found._",
+        _TAG_SQL,
+        connection,
+    )
+
+
+def generate_concept_index(
+    database_path: Path, output_dir: Path, connection: sqlite3.Connection | None = None
+) -> Path:
+    return _generate_grouped_index(
+        database_path,
+        output_dir / "by-concept.md",
+        "Documents by Concept",
+        "_No concept mappings found._",
+        _CONCEPT_SQL,
+        connection,
+    )
 
 
 def generate_all_indexes(database_path: Path, output_dir: Path) -> list[Path]:
-    return [
-        generate_master_index(database_path, output_dir),
-        generate_category_index(database_path, output_dir),
-        generate_tag_index(database_path, output_dir),
-        generate_concept_index(database_path, output_dir),
-    ]
+    """Write every index file over one connection, sharing its schema and page cache."""
+    with open_read_connection(database_path) as connection:
+        paths = [
+            generate_master_index(database_path, output_dir, connection),
+            generate_category_index(database_path, output_dir, connection),
+            generate_tag_index(database_path, output_dir, connection),
+            generate_concept_index(database_path, output_dir, connection),
+        ]
+        refresh_planner_stats(connection)
+    return paths
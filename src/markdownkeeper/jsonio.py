@@ -0,0 +1,82 @@
+"""JSON encoding and decoding for API requests/responses and CLI output.
+
+Uses orjson when installed (``pip install -e ".[speedups]"``) and falls back to the
+stdlib ``json`` module otherwise. Both paths serialize dataclasses directly, so
+callers do not need ``dataclasses.asdict`` (a recursive deep copy) before encoding;
+``to_dict`` gives a shallow dict when a payload needs extra keys.
+"""
+
+from __future__ import annotations
+
+from dataclasses import fields, is_dataclass
+import json
+from types import ModuleType
+from typing import Any, BinaryIO
+
+orjson: ModuleType | None
+try:
+    import orjson  # type: ignore[import-not-found, no-redef]
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def is_orjson_available() -> bool:
+    return orjson is not None
+
+
+_FIELD_NAMES: dict[type, tuple[str, ...]] = {}
+
+
+def _field_names(cls: type) -> tuple[str, ...]:
+    names = _FIELD_NAMES.get(cls)
+    if names is None:
+        names = _FIELD_NAMES[cls] = tuple(item.name for item in fields(cls))
+    return names
+
+
+def to_dict(value: object) -> dict[str, Any]:
+    """Shallow field-name -> value dict for a dataclass instance; nested values are shared, not copied."""
+    return {name: getattr(value, name) for name in _field_names(type(value))}
+
+
+def _default(value: Any) -> Any:
+    if is_dataclass(value) and not isinstance(value, type):
+        return to_dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(payload: Any, indent: bool = False) -> bytes:
+    """UTF-8 encoded JSON, compact unless ``indent=True``; suitable for sockets and stdout.buffer."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(payload, indent=2 if indent else None, default=_default).encode("utf-8")
+
+
+def dump(payload: Any, stream: BinaryIO, indent: bool = False) -> None:
+    """Write JSON to a binary stream.
+
+    orjson encodes in one call. The stdlib fallback writes encoder chunks as they are
+    produced, so the full document never exists as both a str and a bytes copy.
+    """
+    if orjson is not None:
+        stream.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2 if indent else 0))
+        return
+    encoder = json.JSONEncoder(indent=2 if indent else None, default=_default)
+    for chunk in encoder.iterencode(payload):
+        stream.write(chunk.encode("utf-8"))
+
+
+def dumps(payload: Any, indent: bool = False) -> str:
+    """JSON text; ``indent=True`` pretty-prints with two-space indentation."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2 if indent else 0).decode("utf-8")
+    return json.dumps(payload, indent=2 if indent else None, default=_default)
+
+
+def loads(raw: bytes | bytearray | memoryview | str) -> Any:
+    """Parse JSON straight from bytes; raises ``ValueError`` on malformed or non-UTF-8 input."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    if isinstance(raw, memoryview):
+        raw = raw.tobytes()
+    return json.loads(raw)
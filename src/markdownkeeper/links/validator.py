@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
+import http.client
+import os
 from pathlib import Path
+import socket
 import sqlite3
+import ssl
+import sys
 import time
 from urllib.error import HTTPError, URLError
-from urllib.parse import urlparse
-from urllib.request import Request, urlopen
+from urllib.parse import urlparse, urlsplit
+from urllib.request import Request, getproxies, urlopen
+
+from markdownkeeper.storage.schema import refresh_planner_stats
+
+_USER_AGENT = f"Python-urllib/{sys.version_info[0]}.{sys.version_info[1]}"
 
 
 @dataclass(slots=True)
@@ -38,8 +48,78 @@ def _now_iso() -> str:
     return datetime.now(tz=timezone.utc).isoformat()
 
 
-def _check_external(target: str, timeout_s: float = 3.0) -> str:
-    """Check external URL. Tries HEAD first, falls back to GET on 405."""
+class _HostConnection:
+    """Keep-alive connection reused for every URL checked on one scheme://host:port.
+
+    Only used by the single worker that owns the host, so it needs no locking.
+    """
+
+    def __init__(self, scheme: str, netloc: str, timeout_s: float) -> None:
+        self.scheme = scheme
+        self.netloc = netloc
+        self.timeout_s = timeout_s
+        self._connection: http.client.HTTPConnection | None = None
+        self._context = ssl.create_default_context() if scheme == "https" else None
+
+    def _open(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            if self._context is not None:
+                self._connection = http.client.HTTPSConnection(self.netloc, timeout=self.timeout_s, context=self._context)
+            else:
+                self._connection = http.client.HTTPConnection(self.netloc, timeout=self.timeout_s)
+        return self._connection
+
+    def status(self, method: str, path: str) -> int | None:
+        """Response status, or ``None`` when the request fails at the transport level."""
+        # A reused socket may have been closed by the server while idle; retry that once.
+        for attempt in range(2):
+            reused = self._connection is not None
+            try:
+                # The constructor raises InvalidURL (an HTTPException) for a bad port.
+                connection = self._open()
+                connection.request(method, path, headers={"User-Agent": _USER_AGENT})
+                response = connection.getresponse()
+                if method == "HEAD":
+                    response.read()
+                if method != "HEAD" or response.will_close:
+                    self.close()
+                return response.status
+            except (http.client.HTTPException, OSError):
+                self.close()
+                if not reused or attempt:
+                    return None
+        return None
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def _pooled_status(target: str, connection: _HostConnection) -> str | None:
+    """ok/broken from the reused connection; ``None`` defers to urlopen (redirects)."""
+    parts = urlsplit(target)
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    code = connection.status("HEAD", path)
+    if code == 405:
+        code = connection.status("GET", path)
+    if code is None:
+        return "broken"
+    if 300 <= code < 400:
+        return None
+    return "ok" if 200 <= code < 300 else "broken"
+
+
+def _check_external(target: str, timeout_s: float = 3.0, connection: _HostConnection | None = None) -> str:
+    """Check external URL. Tries HEAD first, falls back to GET on 405.
+
+    With ``connection`` the request goes over that host's keep-alive connection;
+    redirects are still followed through urlopen.
+    """
+    if connection is not None:
+        status = _pooled_status(target, connection)
+        if status is not None:
+            return status
     try:
         req = Request(target, method="HEAD")
         with urlopen(req, timeout=timeout_s) as response:  # noqa: S310
@@ -60,7 +140,69 @@ def _check_external(target: str, timeout_s: float = 3.0) -> str:
         return "broken"
 
 
-def _check_internal(document_path: str, target: str) -> str:
+def _host_resolves(host: str) -> bool:
+    """One DNS lookup for a host; False when name resolution fails."""
+    try:
+        socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError):
+        return False
+    return True
+
+
+def _check_external_targets(
+    targets: list[str],
+    timeout_s: float = 3.0,
+    max_workers: int = 16,
+    min_delay: float = 1.0,
+) -> dict[str, str]:
+    """Check unique http(s) URLs; hosts run concurrently, each host's URLs in sequence behind its rate limiter.
+
+    A host's URLs share one keep-alive connection, so TCP/TLS setup is paid once per host,
+    and a host whose name does not resolve is marked broken after a single lookup.
+    """
+    by_host: dict[str, list[str]] = {}
+    for target in dict.fromkeys(targets):
+        by_host.setdefault(urlparse(target).hostname or "", []).append(target)
+    if not by_host:
+        return {}
+
+    # urlopen honours proxy environment variables; bypassing it would skip the proxy.
+    proxies = getproxies()
+
+    def check_host(host: str, urls: list[str]) -> dict[str, str]:
+        # A host that does not resolve fails every URL; settle them with one lookup
+        # instead of one failed lookup and rate-limit delay per URL. Proxied requests
+        # resolve on the proxy, so they are not pre-checked.
+        if not any(urlsplit(url).scheme in proxies for url in urls) and not _host_resolves(host):
+            return {url: "broken" for url in urls}
+        limiter = _DomainRateLimiter(min_delay=min_delay)
+        connections: dict[tuple[str, str], _HostConnection] = {}
+        statuses: dict[str, str] = {}
+        try:
+            for url in urls:
+                limiter.wait(host)
+                parts = urlsplit(url)
+                connection = None
+                if parts.scheme not in proxies:
+                    key = (parts.scheme, parts.netloc)
+                    connection = connections.get(key)
+                    if connection is None:
+                        connection = connections[key] = _HostConnection(parts.scheme, parts.netloc, timeout_s)
+                statuses[url] = _check_external(url, timeout_s=timeout_s, connection=connection)
+        finally:
+            for connection in connections.values():
+                connection.close()
+        return statuses
+
+    statuses: dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(by_host)))) as pool:
+        for host_statuses in pool.map(check_host, by_host.keys(), by_host.values()):
+            statuses.update(host_statuses)
+    return statuses
+
+
+def _check_internal(document_path: str, target: str, seen: dict[str, bool] | None = None) -> str:
+    """ok/broken for a relative link; ``seen`` memoizes existence per joined path across calls."""
     if target.startswith("#"):
         return "ok"
 
@@ -68,19 +210,24 @@ def _check_internal(document_path: str, target: str) -> str:
     if not target_path:
         return "ok"
 
-    doc = Path(document_path)
-    resolved = (doc.parent / target_path).resolve()
-    return "ok" if resolved.exists() else "broken"
+    # One stat; the kernel follows symlinks and ".." just as resolve() + exists() did.
+    candidate = os.path.join(os.path.dirname(document_path), target_path)
+    if seen is None:
+        return "ok" if os.path.exists(candidate) else "broken"
+    exists = seen.get(candidate)
+    if exists is None:
+        exists = seen[candidate] = os.path.exists(candidate)
+    return "ok" if exists else "broken"
 
 
 def validate_links(
     database_path: Path,
     timeout_s: float = 3.0,
     check_external: bool = False,
+    max_workers: int = 16,
 ) -> list[LinkCheckResult]:
     now = _now_iso()
     results: list[LinkCheckResult] = []
-    limiter = _DomainRateLimiter(min_delay=1.0)
 
     with sqlite3.connect(database_path) as connection:
         rows = connection.execute(
@@ -92,26 +239,34 @@ def validate_links(
             """
         ).fetchall()
 
+        external_statuses: dict[str, str] = {}
+        if check_external:
+            external_statuses = _check_external_targets(
+                [
+                    str(target)
+                    for _, target, is_external, _ in rows
+                    if int(is_external) and urlparse(str(target)).scheme in {"http", "https"}
+                ],
+                timeout_s=timeout_s,
+                max_workers=max_workers,
+            )
+
+        updates: list[tuple[str, str, int]] = []
+        seen: dict[str, bool] = {}
         for link_id, target, is_external, document_path in rows:
             t = str(target)
             if int(is_external):
                 if not check_external:
                     continue
-                parsed = urlparse(t)
-                if parsed.scheme in {"http", "https"}:
-                    limiter.wait(parsed.hostname or "")
-                    status = _check_external(t, timeout_s=timeout_s)
-                else:
-                    status = "broken"
+                status = external_statuses.get(t, "broken")
             else:
-                status = _check_internal(str(document_path), t)
+                status = _check_internal(str(document_path), t, seen)
 
-            connection.execute(
-                "UPDATE links SET status = ?, checked_at = ? WHERE id = ?",
-                (status, now, int(link_id)),
-            )
+            updates.append((status, now, int(link_id)))
             results.append(LinkCheckResult(link_id=int(link_id), target=t, status=status))
 
+        connection.executemany("UPDATE links SET status = ?, checked_at = ? WHERE id = ?", updates)
         connection.commit()
+        refresh_planner_stats(connection)
 
     return results
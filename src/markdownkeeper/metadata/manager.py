@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+from collections import Counter
+import heapq
 import re
 from pathlib import Path
 
 from markdownkeeper.processor.parser import ParsedDocument
 
 _WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9_-]{2,}")
-_STOPWORDS = {
+_STOPWORDS = frozenset({
     "the", "and", "for", "with", "this", "that", "from", "into",
     "your", "guide", "docs", "markdown", "are", "was", "were",
     "been", "being", "have", "has", "had", "does", "did", "will",
@@ -15,7 +17,7 @@ _STOPWORDS = {
     "what", "which", "who", "whom", "why", "all", "each", "every",
     "both", "few", "more", "most", "other", "some", "such", "only",
     "own", "same", "too", "very", "just", "use", "using", "used",
-}
+})
 
 
 def enforce_schema(parsed: ParsedDocument, required_fields: list[str]) -> list[str]:
@@ -47,11 +49,9 @@ def extract_concepts(text: str) -> list[str]:
     """Extract key concepts from body text via term frequency."""
     if not text.strip():
         return []
-    words = [w.lower() for w in _WORD_RE.findall(text)]
-    counts: dict[str, int] = {}
-    for w in words:
-        if w in _STOPWORDS:
-            continue
-        counts[w] = counts.get(w, 0) + 1
-    ranked = sorted(counts.items(), key=lambda it: (-it[1], it[0]))
-    return [item[0] for item in ranked[:10]]
+    counts = Counter(map(str.lower, _WORD_RE.findall(text)))
+    for stopword in _STOPWORDS & counts.keys():
+        del counts[stopword]
+    # Words are unique keys, so this matches a full (-count, word) sort truncated to ten.
+    ranked = heapq.nsmallest(10, counts.items(), key=lambda it: (-it[1], it[0]))
+    return [item[0] for item in ranked]
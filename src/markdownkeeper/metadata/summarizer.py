@@ -1,7 +1,22 @@
 from __future__ import annotations
 
+from itertools import islice
+import re
+from typing import Iterator
+
 from markdownkeeper.processor.parser import ParsedDocument
 
+_WORD_RE = re.compile(r"\S+")
+
+
+def _paragraphs(body: str) -> Iterator[str]:
+    """Lazy ``body.split("\\n\\n")``; stops as soon as the caller does."""
+    start = 0
+    while (end := body.find("\n\n", start)) != -1:
+        yield body[start:end]
+        start = end + 2
+    yield body[start:]
+
 
 def generate_summary(parsed: ParsedDocument, max_tokens: int = 150) -> str:
     """Generate a structured summary. Preserves frontmatter summary if present."""
@@ -21,18 +36,17 @@ def generate_summary(parsed: ParsedDocument, max_tokens: int = 150) -> str:
         parts.append("Covers: " + ", ".join(h2s) + ".")
 
     # First non-empty paragraph from body
-    paragraphs = [p.strip() for p in parsed.body.split("\n\n") if p.strip()]
-    for para in paragraphs:
-        # Skip lines that are headings
-        if para.startswith("#"):
+    for para in map(str.strip, _paragraphs(parsed.body)):
+        # Skip empty paragraphs and lines that are headings
+        if not para or para.startswith("#"):
             continue
         parts.append(para)
         break
 
     result = " ".join(parts)
 
-    # Truncate to max_tokens (approximate by word count)
-    words = result.split()
+    # Truncate to max_tokens (approximate by word count); only tokenizes one word past the limit
+    words = [match.group() for match in islice(_WORD_RE.finditer(result), max_tokens + 1)]
     if len(words) > max_tokens:
         result = " ".join(words[:max_tokens])
 
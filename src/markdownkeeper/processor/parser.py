@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from hashlib import sha256
+import heapq
+import os
+from pathlib import Path
 import re
-from typing import Any
+import stat
+from typing import Any, Sequence
 
 
 @dataclass(slots=True)
@@ -37,26 +44,33 @@ class ParsedDocument:
 
 _HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*$", re.MULTILINE)
 _LINK_RE = re.compile(r"\[[^\]]+\]\(([^)]+)\)")
+_EXTERNAL_PREFIXES = ("http://", "https://")
 _WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9_-]{2,}")
-_STOPWORDS = {
-    "the",
-    "and",
-    "for",
-    "with",
-    "this",
-    "that",
-    "from",
-    "into",
-    "your",
-    "guide",
-    "docs",
-    "markdown",
-}
-
-
+_SLUG_STRIP_RE = re.compile(r"[^a-z0-9\s-]")
+_SLUG_SPACE_RE = re.compile(r"\s+")
+_STOPWORDS = frozenset(
+    {
+        "the",
+        "and",
+        "for",
+        "with",
+        "this",
+        "that",
+        "from",
+        "into",
+        "your",
+        "guide",
+        "docs",
+        "markdown",
+    }
+)
+
+
+@lru_cache(maxsize=4096)
 def _slugify(value: str) -> str:
-    slug = re.sub(r"[^a-z0-9\s-]", "", value.lower())
-    return re.sub(r"\s+", "-", slug).strip("-")
+    # Heading text like "Usage" or "Installation" repeats across a corpus.
+    slug = _SLUG_STRIP_RE.sub("", value.lower())
+    return _SLUG_SPACE_RE.sub("-", slug).strip("-")
 
 
 def _parse_frontmatter(text: str) -> tuple[dict[str, Any], str]:
@@ -78,10 +92,9 @@ def _parse_frontmatter(text: str) -> tuple[dict[str, Any], str]:
 
     frontmatter: dict[str, Any] = {}
     for line in raw_fm.splitlines():
-        if ":" not in line:
-            continue
-        key, value = line.split(":", 1)
-        frontmatter[key.strip()] = value.strip().strip('"')
+        key, sep, value = line.partition(":")
+        if sep:
+            frontmatter[key.strip()] = value.strip().strip('"')
     return frontmatter, body
 
 
@@ -92,54 +105,47 @@ def _split_list(value: str | None) -> list[str]:
 
 
 def _extract_concepts(body: str, headings: list[ParsedHeading]) -> list[str]:
-    words = [word.lower() for word in _WORD_RE.findall(body)]
-    counts: dict[str, int] = {}
-    for w in words:
-        if w in _STOPWORDS:
-            continue
-        counts[w] = counts.get(w, 0) + 1
+    counts = Counter(map(str.lower, _WORD_RE.findall(body)))
+    for stopword in _STOPWORDS & counts.keys():
+        del counts[stopword]
 
     for heading in headings:
-        for w in _WORD_RE.findall(heading.text):
-            lw = w.lower()
-            if lw in _STOPWORDS:
-                continue
-            counts[lw] = counts.get(lw, 0) + 2
+        boost = [w for w in map(str.lower, _WORD_RE.findall(heading.text)) if w not in _STOPWORDS]
+        # Heading words count double.
+        counts.update(boost)
+        counts.update(boost)
 
-    ranked = sorted(counts.items(), key=lambda it: (-it[1], it[0]))
-    return [item[0] for item in ranked[:10]]
+    # Words are unique keys, so this matches a full (-count, word) sort truncated to ten.
+    ranked = heapq.nsmallest(10, counts.items(), key=lambda it: (-it[1], it[0]))
+    return [item[0] for item in ranked]
 
 
-def parse_markdown(text: str) -> ParsedDocument:
-    frontmatter, body = _parse_frontmatter(text)
+def parse_markdown(text: str, *, raw_bytes: bytes | None = None) -> ParsedDocument:
+    """Parse markdown text.
 
-    headings: list[ParsedHeading] = []
-    for idx, match in enumerate(_HEADING_RE.finditer(body), start=1):
-        heading_text = match.group(2).strip()
-        headings.append(
-            ParsedHeading(
-                level=len(match.group(1)),
-                text=heading_text,
-                anchor=_slugify(heading_text),
-                position=idx,
-            )
-        )
+    ``raw_bytes``, when given, must equal ``text.encode("utf-8")``; it is hashed
+    directly instead of encoding the document again.
+    """
+    frontmatter, body = _parse_frontmatter(text)
 
-    links: list[ParsedLink] = []
-    for match in _LINK_RE.finditer(body):
-        target = match.group(1).strip()
-        links.append(
-            ParsedLink(
-                target=target,
-                is_external=target.startswith("http://") or target.startswith("https://"),
-            )
+    headings = [
+        ParsedHeading(
+            level=len(match.group(1)),
+            text=(heading_text := match.group(2).strip()),
+            anchor=_slugify(heading_text),
+            position=idx,
         )
+        for idx, match in enumerate(_HEADING_RE.finditer(body), start=1)
+    ]
+    links = [
+        ParsedLink(target=(target := match.group(1).strip()), is_external=target.startswith(_EXTERNAL_PREFIXES))
+        for match in _LINK_RE.finditer(body)
+    ]
 
-    lines = [ln.strip() for ln in body.splitlines() if ln.strip()]
     title = str(frontmatter.get("title") or (headings[0].text if headings else "Untitled"))
     summary = str(frontmatter.get("summary") or "")
     token_estimate = max(1, len(body.split()))
-    content_hash = sha256(text.encode("utf-8")).hexdigest()
+    content_hash = sha256(raw_bytes if raw_bytes is not None else text.encode("utf-8")).hexdigest()
     tags = _split_list(frontmatter.get("tags"))
     category = frontmatter.get("category") or None
     concepts = _split_list(frontmatter.get("concepts")) or _extract_concepts(body, headings)
@@ -157,3 +163,70 @@ def parse_markdown(text: str) -> ParsedDocument:
         category=str(category) if category else None,
         concepts=concepts,
     )
+
+
+def parse_markdown_bytes(raw: bytes) -> ParsedDocument:
+    """Parse UTF-8 file contents, normalizing newlines the way ``Path.read_text`` does.
+
+    When no normalization is needed the file bytes are hashed as they are.
+    """
+    text = raw.decode("utf-8")
+    if "\r" in text:
+        return parse_markdown(text.replace("\r\n", "\n").replace("\r", "\n"))
+    return parse_markdown(text, raw_bytes=raw)
+
+
+def _read_regular_file(path: Path) -> bytes | None:
+    """Contents of a regular file, or ``None`` if missing or not a regular file.
+
+    One stat and one sized unbuffered read.
+    """
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(info.st_mode):
+        return None
+    with open(path, "rb", buffering=0) as handle:
+        # One byte past the stat size detects a file that grew after the stat.
+        raw = handle.read(info.st_size + 1)
+        if len(raw) > info.st_size:
+            raw += handle.readall()
+    return raw
+
+
+def parse_markdown_file(path: Path) -> ParsedDocument | None:
+    """Read and parse one file; ``None`` if it is missing or not a regular file."""
+    raw = _read_regular_file(path)
+    return None if raw is None else parse_markdown_bytes(raw)
+
+
+def _parse_any(source: str | bytes) -> ParsedDocument:
+    return parse_markdown_bytes(source) if isinstance(source, bytes) else parse_markdown(source)
+
+
+# Below this many documents, process start-up and pickling cost more than parsing.
+PARALLEL_PARSE_MIN_DOCUMENTS = 32
+
+
+def parse_markdown_many(texts: Sequence[str | bytes], max_workers: int | None = None) -> list[ParsedDocument]:
+    """Parse many documents in order, on a process pool when the batch is large enough.
+
+    ``bytes`` items go through ``parse_markdown_bytes``, so decoding also happens in the workers.
+    """
+    if max_workers == 1 or len(texts) < PARALLEL_PARSE_MIN_DOCUMENTS:
+        return [_parse_any(text) for text in texts]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_parse_any, texts, chunksize=8))
+
+
+def parse_markdown_files(paths: Sequence[Path], max_workers: int | None = None) -> list[ParsedDocument | None]:
+    """``parse_markdown_file`` over many paths, in order.
+
+    On the process pool each worker reads its own files, so document contents are
+    never pickled from the parent and file reads overlap with parsing.
+    """
+    if max_workers == 1 or len(paths) < PARALLEL_PARSE_MIN_DOCUMENTS:
+        return [parse_markdown_file(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(parse_markdown_file, paths, chunksize=8))
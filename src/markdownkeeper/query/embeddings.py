@@ -1,32 +1,55 @@
 from __future__ import annotations
 
+from array import array
+from functools import lru_cache
 import hashlib
 import math
 import re
-from typing import Iterable
+import sys
+from types import ModuleType
+from typing import Any, Iterable
 
+np: ModuleType | None
+try:
+    import numpy as np  # type: ignore[import-not-found, no-redef]
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
 
-_MODEL_CACHE: dict[str, object] = {}
 
+_MODEL_CACHE: dict[str, Any] = {}
 
-def _tokenize(text: str) -> set[str]:
-    return {token for token in re.findall(r"[a-z0-9]+", text.lower()) if len(token) > 1}
+
+# Lowercase alphanumeric runs of two or more characters. The hash embedding and the
+# document_tokens table behind semantic search's lexical term both split text this way.
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> set[str]:
+    return {token for token in _TOKEN_RE.findall(text.lower()) if len(token) > 1}
+
+
+@lru_cache(maxsize=65536)
+def _token_hash(token: str) -> int:
+    # Document vocabularies repeat heavily, so most tokens skip the SHA-256 call.
+    return int.from_bytes(hashlib.sha256(token.encode("utf-8")).digest()[:2], "big")
 
 
 def _hash_embedding(text: str, dimensions: int = 64) -> list[float]:
-    vector = [0.0] * dimensions
-    for token in _tokenize(text):
-        digest = hashlib.sha256(token.encode("utf-8")).digest()
-        bucket = int.from_bytes(digest[:2], "big") % dimensions
-        vector[bucket] += 1.0
+    counts = [0] * dimensions
+    for token in tokenize(text):
+        counts[_token_hash(token) % dimensions] += 1
 
-    norm = math.sqrt(sum(value * value for value in vector))
+    norm = math.sqrt(sum(count * count for count in counts))
     if norm == 0.0:
-        return vector
-    return [value / norm for value in vector]
+        return [0.0] * dimensions
+    return [count / norm for count in counts]
 
 
 def _normalize(vector: Iterable[float]) -> list[float]:
+    if np is not None:
+        values = np.asarray(vector, dtype=np.float64).ravel()
+        norm = math.sqrt(float(np.vdot(values, values)))
+        return (values / norm if norm else values).tolist()
     values = [float(item) for item in vector]
     norm = math.sqrt(sum(value * value for value in values))
     if norm == 0.0:
@@ -34,7 +57,7 @@ def _normalize(vector: Iterable[float]) -> list[float]:
     return [value / norm for value in values]
 
 
-def _load_model(model_name: str) -> object | None:
+def _load_model(model_name: str) -> Any | None:
     if model_name in _MODEL_CACHE:
         return _MODEL_CACHE[model_name]
 
@@ -43,6 +66,8 @@ def _load_model(model_name: str) -> object | None:
 
         model = SentenceTransformer(model_name)
         _MODEL_CACHE[model_name] = model
+        # Query vectors memoized before this load came from the hash fallback.
+        clear_query_embedding_cache()
         return model
     except Exception:
         return None
@@ -65,7 +90,155 @@ def compute_embedding(text: str, model_name: str = "all-MiniLM-L6-v2") -> tuple[
         return _hash_embedding(text), "token-hash-v1"
 
 
+def compute_embeddings_batch(
+    texts: list[str], model_name: str = "all-MiniLM-L6-v2", batch_size: int = 64
+) -> list[tuple[list[float], str]]:
+    """Like compute_embedding for many texts, with a single ``model.encode`` call."""
+    if not texts:
+        return []
+    model = _load_model(model_name)
+    if model is not None:
+        try:
+            matrix = model.encode(
+                [text or "" for text in texts],
+                batch_size=batch_size,
+                show_progress_bar=False,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+            )
+            return [(_normalize(vector), model_name) for vector in matrix]
+        except Exception:
+            pass
+    return [(_hash_embedding(text), "token-hash-v1") for text in texts]
+
+
 def cosine_similarity(left: list[float], right: list[float]) -> float:
     if len(left) != len(right) or not left or not right:
         return 0.0
     return float(sum(a * b for a, b in zip(left, right)))
+
+
+def cosine_similarities(query: list[float], vectors: list[list[float]]) -> list[float]:
+    """Score many stored vectors against one query; one float32 matrix-vector product with numpy.
+
+    Vectors whose dimension differs from the query (or are empty) score 0.0, as in
+    cosine_similarity.
+    """
+    if np is None or not query:
+        return [cosine_similarity(query, vector) for vector in vectors]
+
+    dimensions = len(query)
+    scores = [0.0] * len(vectors)
+    positions = [idx for idx, vector in enumerate(vectors) if len(vector) == dimensions]
+    if positions:
+        matrix = np.asarray([vectors[idx] for idx in positions], dtype=np.float32)
+        values = matrix @ np.asarray(query, dtype=np.float32)
+        for idx, value in zip(positions, values.tolist()):
+            scores[idx] = value
+    return scores
+
+
+def pack_embedding(vector: Iterable[float]) -> bytes:
+    """Little-endian float32 bytes; the storage format of the ``embedding`` columns."""
+    packed = array("f", vector)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_embedding(blob: bytes | memoryview) -> list[float]:
+    """Inverse of pack_embedding; a blob that is not whole float32 values gives []."""
+    if len(blob) % 4:
+        return []
+    vector = array("f")
+    vector.frombytes(blob)
+    if sys.byteorder == "big":
+        vector.byteswap()
+    return vector.tolist()
+
+
+def packed_similarities(query: list[float], blobs: list[bytes | None]) -> list[float]:
+    """cosine_similarities for vectors stored via pack_embedding.
+
+    With numpy the matching BLOBs are joined and read as one matrix, so no per-float
+    Python objects are created. Missing blobs and dimension mismatches score 0.0.
+    """
+    dimensions = len(query)
+    scores = [0.0] * len(blobs)
+    matches = [(idx, blob) for idx, blob in enumerate(blobs) if blob is not None and dimensions and len(blob) == 4 * dimensions]
+    if not matches:
+        return scores
+
+    positions = [idx for idx, _ in matches]
+    values: list[float]
+    if np is not None:
+        matrix = np.frombuffer(b"".join(blob for _, blob in matches), dtype="<f4").reshape(len(matches), dimensions)
+        values = (matrix @ np.asarray(query, dtype=np.float32)).tolist()
+    else:
+        values = [cosine_similarity(query, unpack_embedding(blob)) for _, blob in matches]
+    for idx, value in zip(positions, values):
+        scores[idx] = float(value)
+    return scores
+
+
+def quantize_embedding(vector: list[float]) -> tuple[bytes, float]:
+    """Symmetric int8 quantization with a per-vector scale, so ``vector ~= int8 * scale``."""
+    peak = max((abs(value) for value in vector), default=0.0)
+    if peak == 0.0:
+        return bytes(len(vector)), 0.0
+    scale = peak / 127.0
+    quantized = array("b", (max(-127, min(127, round(value / scale))) for value in vector))
+    return quantized.tobytes(), scale
+
+
+def quantized_similarities(
+    query: list[float],
+    blobs: list[bytes | None],
+    scales: list[float | None],
+) -> list[float]:
+    """Int8 counterpart of cosine_similarities for vectors stored via quantize_embedding.
+
+    Dot products accumulate in int32 and are rescaled by both per-vector scales.
+    Missing blobs and dimension mismatches score 0.0.
+    """
+    query_blob, query_scale = quantize_embedding(query)
+    dimensions = len(query_blob)
+    scores = [0.0] * len(blobs)
+    matches = [(idx, blob) for idx, blob in enumerate(blobs) if blob is not None and dimensions and len(blob) == dimensions]
+    if not matches or query_scale == 0.0:
+        return scores
+
+    positions = [idx for idx, _ in matches]
+    values: list[float]
+    if np is not None:
+        matrix = np.frombuffer(b"".join(blob for _, blob in matches), dtype=np.int8)
+        matrix = matrix.reshape(len(positions), dimensions).astype(np.int32)
+        dots = matrix @ np.frombuffer(query_blob, dtype=np.int8).astype(np.int32)
+        weights = np.asarray([scales[idx] or 0.0 for idx in positions], dtype=np.float64) * query_scale
+        values = (dots * weights).tolist()
+    else:
+        query_values = array("b", query_blob)
+        values = [
+            sum(a * b for a, b in zip(array("b", blob), query_values)) * (scales[idx] or 0.0) * query_scale
+            for idx, blob in matches
+        ]
+    for idx, value in zip(positions, values):
+        scores[idx] = float(value)
+    return scores
+
+
+@lru_cache(maxsize=4096)
+def _cached_query_embedding(text: str, model_name: str) -> tuple[tuple[float, ...], str]:
+    vector, resolved_model = compute_embedding(text, model_name=model_name)
+    return tuple(vector), resolved_model
+
+
+def embed_query(text: str, model_name: str = "all-MiniLM-L6-v2") -> tuple[list[float], str]:
+    """Like compute_embedding, memoized on case/whitespace-normalized query text."""
+    normalized = " ".join(text.lower().split())
+    vector, resolved_model = _cached_query_embedding(normalized, model_name)
+    return list(vector), resolved_model
+
+
+def clear_query_embedding_cache() -> None:
+    _cached_query_embedding.cache_clear()
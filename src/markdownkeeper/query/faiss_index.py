@@ -1,87 +1,224 @@
 """Optional FAISS-backed vector index for accelerated similarity search.
 
 Used by repository.py to rebuild a FAISS index after embedding regeneration.
-Falls back to brute-force cosine similarity when faiss-cpu is not installed.
+Falls back to brute-force cosine similarity when faiss-cpu is not installed: one
+float32 matrix-vector product with numpy, or a pure-Python loop without it.
 If this module's API changes, update the import in storage/repository.py.
 """
 
 from __future__ import annotations
 
-import json
+import heapq
 import math
 from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+from markdownkeeper.jsonio import dumps_bytes, loads
 
 try:
-    import faiss  # type: ignore[import-untyped]
     import numpy as np  # type: ignore[import-untyped]
 except ImportError:
-    faiss = None
     np = None
 
+try:
+    import faiss  # type: ignore[import-untyped]
+except ImportError:
+    faiss = None
+
+
+# Precisions a built index can store its rows in.
+INDEX_DTYPES = ("fp32", "fp16", "int8")
+_NUMPY_DTYPES = {"fp32": "float32", "fp16": "float16", "int8": "int8"}
+
+# Above this many vectors faiss builds an HNSW graph (about log N per query) instead of
+# a flat index scanned in full; below it the flat scan is fast and exact.
+HNSW_MIN_VECTORS = 50_000
+HNSW_NEIGHBORS = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Rows are converted this many at a time when building, and quantized rows are
+# widened to float32 this many at a time when scoring.
+_SCORE_BLOCK_ROWS = 8192
+
 
 def is_faiss_available() -> bool:
     return faiss is not None and np is not None
 
 
 class FaissIndex:
-    """Optional FAISS-backed vector index. Falls back to brute-force when FAISS not installed."""
+    """Optional FAISS-backed vector index. Falls back to brute-force when FAISS not installed.
+
+    Vectors are kept as parallel arrays: ``_ids`` holds document ids and, with numpy,
+    ``_matrix`` holds one unit-length float32 row per id. Without numpy (or when
+    dimensions differ) ``_vectors`` keeps unit-length Python lists instead.
+    """
 
     def __init__(self) -> None:
         self._index: object | None = None
-        self._id_map: list[int] = []
-        self._embeddings: list[tuple[int, list[float]]] = []
+        self._ids: Any = []
+        self._matrix: Any = None
+        self._vectors: list[list[float]] = []
         self._dimensions: int = 0
 
-    def build(self, embeddings: list[tuple[int, list[float]]]) -> None:
-        self._embeddings = list(embeddings)
-        if not embeddings:
-            self._index = None
-            self._id_map = []
-            self._dimensions = 0
+    def _store(self, pairs: Iterable[Sequence[Any]], dtype: str = "fp32") -> None:
+        """Load ``(doc_id, vector)`` pairs as unit-length rows stored in ``dtype``.
+
+        Rows are converted and normalized one block at a time straight into the final
+        array, so no full-size float32 intermediate exists for fp16/int8 storage.
+        """
+        if not isinstance(pairs, Sequence):
+            pairs = list(pairs)
+        self._index = None
+        self._matrix = None
+        self._vectors = []
+        self._dimensions = len(pairs[0][1]) if pairs else 0
+        if np is None or not pairs or not all(len(vec) == self._dimensions for _, vec in pairs):
+            self._ids = [doc_id for doc_id, _ in pairs]
+            self._vectors = [self._normalize([float(v) for v in vec]) for _, vec in pairs]
             return
 
-        self._dimensions = len(embeddings[0][1])
-        self._id_map = [doc_id for doc_id, _ in embeddings]
+        count = len(pairs)
+        self._ids = np.fromiter((doc_id for doc_id, _ in pairs), dtype=np.int64, count=count)
+        matrix = np.empty((count, self._dimensions), dtype=_NUMPY_DTYPES[dtype])
+        for start in range(0, count, _SCORE_BLOCK_ROWS):
+            block = np.array([vec for _, vec in pairs[start : start + _SCORE_BLOCK_ROWS]], dtype=np.float32)
+            norms = np.sqrt(np.einsum("ij,ij->i", block, block))[:, None]
+            np.divide(block, norms, out=block, where=norms != 0)
+            if dtype == "int8":
+                block = np.clip(np.rint(block * 127.0), -127, 127)
+            matrix[start : start + len(block)] = block
+        self._matrix = matrix
 
-        if is_faiss_available():
-            vectors = np.array([vec for _, vec in embeddings], dtype=np.float32)
-            faiss.normalize_L2(vectors)
-            index = faiss.IndexFlatIP(self._dimensions)
-            index.add(vectors)
-            self._index = index
-        else:
-            self._index = None
+    def build(self, embeddings: Iterable[tuple[int, Sequence[float]]], dtype: str = "fp32") -> None:
+        """Index ``(doc_id, vector)`` pairs; ``dtype`` fp16/int8 trades exactness for memory.
 
-    def search(self, query_vector: list[float], k: int = 10) -> list[tuple[int, float]]:
-        if not self._id_map:
-            return []
+        With faiss the rows go into a scalar-quantizer index; the numpy fallback keeps
+        float16 rows or int8 codes scaled by 127. The pure-Python path ignores ``dtype``.
+        """
+        if dtype not in INDEX_DTYPES:
+            raise ValueError(f"Unsupported index dtype: {dtype}")
+        use_faiss = is_faiss_available()
+        # faiss quantizes internally and takes float32 input.
+        self._store(embeddings, "fp32" if use_faiss else dtype)
+        if self._matrix is None or not use_faiss:
+            return
+        index = self._faiss_index(dtype, len(self._ids))
+        if not index.is_trained:
+            index.train(self._matrix)
+        index.add(self._matrix)
+        self._index = index
+        # The faiss index keeps its own copy of the rows.
+        self._matrix = None
+
+    def _faiss_index(self, dtype: str, count: int) -> Any:
+        d = self._dimensions
+        metric = faiss.METRIC_INNER_PRODUCT
+        quantizer = {"fp16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}.get(dtype)
+        if count >= HNSW_MIN_VECTORS:
+            if quantizer is None:
+                index = faiss.IndexHNSWFlat(d, HNSW_NEIGHBORS, metric)
+            else:
+                index = faiss.IndexHNSWSQ(d, quantizer, HNSW_NEIGHBORS, metric)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            return index
+        if quantizer is None:
+            return faiss.IndexFlatIP(d)
+        return faiss.IndexScalarQuantizer(d, quantizer, metric)
+
+    def _row_scores(self, q: Any) -> Any:
+        """Inner products of every stored row with float32 ``q``.
+
+        Shape (N,) for one query of shape (d,), or (N, Q) for queries stacked as the
+        columns of a (d, Q) array.
+        """
+        matrix = self._matrix
+        if matrix.dtype == np.float32:
+            return matrix @ q
+        scores = np.empty((len(matrix),) + q.shape[1:], dtype=np.float32)
+        for start in range(0, len(matrix), _SCORE_BLOCK_ROWS):
+            block = matrix[start : start + _SCORE_BLOCK_ROWS]
+            scores[start : start + len(block)] = block.astype(np.float32) @ q
+        if matrix.dtype == np.int8:
+            scores /= 127.0
+        return scores
+
+    def search(
+        self, query_vector: Sequence[float] | Any, k: int = 10, *, normalized: bool = False
+    ) -> list[tuple[int, float]]:
+        """Top-k ``(doc_id, score)`` pairs; ``query_vector`` may be a list or a 1-D ndarray.
 
-        k = min(k, len(self._id_map))
+        Pass ``normalized=True`` only for unit-length queries (e.g. from ``embed_query``);
+        the normalization pass is then skipped and other norms skew the scores.
+        """
+        if np is not None and isinstance(query_vector, np.ndarray):
+            # A (1, d) view: search_batch's float32 cast is then one buffer copy
+            # instead of converting a nested Python sequence element by element.
+            return self.search_batch(query_vector.reshape(1, -1), k, normalized=normalized)[0]
+        return self.search_batch([query_vector], k, normalized=normalized)[0]
 
-        if is_faiss_available() and self._index is not None:
-            q = np.array([query_vector], dtype=np.float32)
-            faiss.normalize_L2(q)
+    def search_batch(
+        self, queries: Sequence[Sequence[float]] | Any, k: int = 10, *, normalized: bool = False
+    ) -> list[list[tuple[int, float]]]:
+        """Top-k ``(doc_id, score)`` lists for several queries at once.
+
+        faiss gets one ``(Q, d)`` search call and the numpy fallback one ``(N, d) @ (d, Q)``
+        product, so the stored rows are read once for the whole batch. ``normalized``
+        has the same contract as in ``search``.
+        """
+        if not len(self._ids) or not len(queries):
+            return [[] for _ in queries]
+
+        k = min(k, len(self._ids))
+
+        # _index is only ever set from faiss, so it doubles as the availability check here.
+        if self._index is not None:
+            if normalized:
+                # Nothing is written to q, so a float32 C-contiguous input is used as is.
+                q = np.ascontiguousarray(queries, dtype=np.float32)
+            else:
+                q = np.array(queries, dtype=np.float32)
+                faiss.normalize_L2(q)
+            hnsw = getattr(self._index, "hnsw", None)
+            if hnsw is not None:
+                # The candidate list must hold at least k entries.
+                hnsw.efSearch = max(HNSW_EF_SEARCH, k)
             distances, indices = self._index.search(q, k)
-            results: list[tuple[int, float]] = []
-            for i in range(k):
-                idx = int(indices[0][i])
-                if idx < 0 or idx >= len(self._id_map):
-                    continue
-                results.append((self._id_map[idx], float(distances[0][i])))
-            return results
+            return [
+                [
+                    (int(self._ids[idx]), float(distance))
+                    for distance, idx in zip(row_distances.tolist(), row_indices.tolist())
+                    if 0 <= idx < len(self._ids)
+                ]
+                for row_distances, row_indices in zip(distances, indices)
+            ]
 
         # Brute-force fallback
-        return self._brute_force_search(query_vector, k)
-
-    def _brute_force_search(self, query_vector: list[float], k: int) -> list[tuple[int, float]]:
-        q_norm = self._normalize(query_vector)
-        scored: list[tuple[float, int]] = []
-        for doc_id, vec in self._embeddings:
-            v_norm = self._normalize(vec)
-            sim = sum(a * b for a, b in zip(q_norm, v_norm))
-            scored.append((sim, doc_id))
-        scored.sort(reverse=True)
-        return [(doc_id, score) for score, doc_id in scored[:k]]
+        if self._matrix is not None:
+            q = np.asarray(queries, dtype=np.float32) if normalized else np.array(queries, dtype=np.float32)
+            if q.ndim != 2 or q.shape[1] != self._matrix.shape[1] or k <= 0:
+                return [[] for _ in queries]
+            if not normalized:
+                norms = np.sqrt(np.einsum("ij,ij->i", q, q))[:, None]
+                np.divide(q, norms, out=q, where=norms != 0)
+            scores = self._row_scores(q.T)
+            return [self._top_k(scores[:, col], k) for col in range(len(q))]
+        return [self._python_search(query, k, normalized) for query in queries]
+
+    def _top_k(self, scores: Any, k: int) -> list[tuple[int, float]]:
+        ids = self._ids
+        # Partition down to scores tied with or above the k-th best, then order by
+        # (score, doc_id) descending like the pure-Python selection below.
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        candidates = np.flatnonzero(scores >= threshold)
+        order = candidates[np.lexsort((-ids[candidates], -scores[candidates]))][:k]
+        return [(int(ids[idx]), float(scores[idx])) for idx in order]
+
+    def _python_search(self, query_vector: Sequence[float], k: int, normalized: bool = False) -> list[tuple[int, float]]:
+        # Stored vectors were normalized by _store, so each score is a plain dot product.
+        q_norm = query_vector if normalized else self._normalize(list(query_vector))
+        scored = [(sum(a * b for a, b in zip(q_norm, vec)), doc_id) for doc_id, vec in zip(self._ids, self._vectors)]
+        return [(doc_id, score) for score, doc_id in heapq.nlargest(k, scored)]
 
     @staticmethod
     def _normalize(vector: list[float]) -> list[float]:
@@ -90,38 +227,61 @@ class FaissIndex:
             return vector
         return [v / norm for v in vector]
 
+    def _id_list(self) -> list[int]:
+        return self._ids.tolist() if np is not None and isinstance(self._ids, np.ndarray) else list(self._ids)
+
+    @staticmethod
+    def _array_paths(path: Path) -> tuple[Path, Path]:
+        return path.with_suffix(".ids.npy"), path.with_suffix(".vectors.npy")
+
     def save(self, path: Path) -> None:
         path.parent.mkdir(parents=True, exist_ok=True)
-        if is_faiss_available() and self._index is not None:
+        ids_path, vectors_path = self._array_paths(path)
+        json_path = path.with_suffix(".json")
+        if self._index is not None:
             faiss.write_index(self._index, str(path))
             meta_path = path.with_suffix(".meta.json")
-            meta_path.write_text(
-                json.dumps({"id_map": self._id_map, "dimensions": self._dimensions}),
-                encoding="utf-8",
-            )
+            meta_path.write_bytes(dumps_bytes({"id_map": self._id_list(), "dimensions": self._dimensions}))
+        elif self._matrix is not None:
+            # Raw .npy files: no float formatting on save, and load can memory-map them.
+            np.save(ids_path, self._ids)
+            np.save(vectors_path, self._matrix)
+            json_path.unlink(missing_ok=True)
         else:
-            # Save as JSON for brute-force fallback
+            # Save as JSON for the pure-Python fallback
             data = {
-                "id_map": self._id_map,
+                "id_map": self._id_list(),
                 "dimensions": self._dimensions,
-                "embeddings": [[doc_id, vec] for doc_id, vec in self._embeddings],
+                "embeddings": [[doc_id, vec] for doc_id, vec in zip(self._id_list(), self._vectors)],
             }
-            path.with_suffix(".json").write_text(json.dumps(data), encoding="utf-8")
+            json_path.write_bytes(dumps_bytes(data))
+            ids_path.unlink(missing_ok=True)
+            vectors_path.unlink(missing_ok=True)
 
     def load(self, path: Path) -> None:
         if is_faiss_available() and path.exists():
             self._index = faiss.read_index(str(path))
             meta_path = path.with_suffix(".meta.json")
             if meta_path.exists():
-                meta = json.loads(meta_path.read_text(encoding="utf-8"))
-                self._id_map = meta["id_map"]
+                meta = loads(meta_path.read_bytes())
+                self._ids = np.asarray(meta["id_map"], dtype=np.int64)
                 self._dimensions = meta["dimensions"]
             return
 
+        ids_path, vectors_path = self._array_paths(path)
+        if np is not None and ids_path.exists() and vectors_path.exists():
+            # Rows were normalized (and possibly quantized) before saving; the
+            # read-only map pages in lazily.
+            self._index = None
+            self._vectors = []
+            self._ids = np.load(ids_path)
+            self._matrix = np.load(vectors_path, mmap_mode="r")
+            self._dimensions = int(self._matrix.shape[1])
+            return
+
         # Fallback: load from JSON
         json_path = path.with_suffix(".json")
         if json_path.exists():
-            data = json.loads(json_path.read_text(encoding="utf-8"))
-            self._id_map = data["id_map"]
+            data = loads(json_path.read_bytes())
+            self._store(data["embeddings"])
             self._dimensions = data["dimensions"]
-            self._embeddings = [(e[0], e[1]) for e in data["embeddings"]]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 
@@ -10,6 +11,7 @@ class SystemdUnitPaths:
     api_unit: Path
 
 
+@lru_cache(maxsize=8)
 def _watcher_unit_text(exec_path: str, config_path: str) -> str:
     return f"""[Unit]
 Description=MarkdownKeeper watcher service
@@ -37,6 +39,7 @@ WantedBy=multi-user.target
 """
 
 
+@lru_cache(maxsize=8)
 def _api_unit_text(exec_path: str, config_path: str) -> str:
     return f"""[Unit]
 Description=MarkdownKeeper API service
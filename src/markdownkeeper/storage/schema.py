@@ -1,8 +1,24 @@
 from __future__ import annotations
 
+from contextlib import closing
 import sqlite3
 from pathlib import Path
 
+from markdownkeeper.query.embeddings import tokenize
+
+# Precisions the embeddings table stores: float32 BLOB vectors and int8 codes with a per-vector scale.
+EMBEDDING_DTYPES = ("fp32", "int8")
+
+# document_tokens holds what semantic search's lexical term matches: the tokens of a
+# document's path, title, summary and content.
+def document_tokens(path: object, title: object, summary: object, content: object) -> set[str]:
+    return tokenize(" ".join(str(value or "") for value in (path, title, summary, content)))
+
+
+# Stored in PRAGMA user_version once initialize_database has run. Bump it whenever
+# SCHEMA_STATEMENTS, FTS_STATEMENTS or the migrations in initialize_database change.
+SCHEMA_VERSION = 4
+
 SCHEMA_STATEMENTS = [
     """
     CREATE TABLE IF NOT EXISTS documents (
@@ -80,20 +96,38 @@ SCHEMA_STATEMENTS = [
         heading_path TEXT,
         content TEXT NOT NULL,
         token_count INTEGER NOT NULL,
-        embedding TEXT,
+        embedding BLOB,
         FOREIGN KEY(document_id) REFERENCES documents(id) ON DELETE CASCADE
     )
     """,
     """
     CREATE TABLE IF NOT EXISTS embeddings (
         document_id INTEGER PRIMARY KEY,
-        embedding TEXT,
+        embedding BLOB,
+        embedding_q8 BLOB,
+        embedding_scale REAL,
         model_name TEXT,
         generated_at TEXT,
         FOREIGN KEY(document_id) REFERENCES documents(id) ON DELETE CASCADE
     )
     """,
     """
+    CREATE TABLE IF NOT EXISTS document_tokens (
+        token TEXT NOT NULL,
+        document_id INTEGER NOT NULL,
+        PRIMARY KEY(token, document_id),
+        FOREIGN KEY(document_id) REFERENCES documents(id) ON DELETE CASCADE
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS embedding_cache (
+        content_hash TEXT NOT NULL,
+        model_name TEXT NOT NULL,
+        embedding BLOB NOT NULL,
+        PRIMARY KEY(content_hash, model_name)
+    ) WITHOUT ROWID
+    """,
+    """
     CREATE TABLE IF NOT EXISTS query_cache (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         query_hash TEXT NOT NULL UNIQUE,
@@ -117,12 +151,31 @@ SCHEMA_STATEMENTS = [
     )
     """,
     """
+    CREATE TABLE IF NOT EXISTS index_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO index_state(id, version) VALUES(1, 0)
+    """,
+    """
     CREATE INDEX IF NOT EXISTS idx_documents_path ON documents(path)
     """,
     """
     CREATE INDEX IF NOT EXISTS idx_documents_category ON documents(category)
     """,
     """
+    CREATE INDEX IF NOT EXISTS idx_documents_category_title
+    ON documents(COALESCE(category, 'uncategorized'), title)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_document_tags_tag ON document_tags(tag_id, document_id)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_document_concepts_concept ON document_concepts(concept_id, document_id)
+    """,
+    """
     CREATE INDEX IF NOT EXISTS idx_headings_document_id ON headings(document_id)
     """,
     """
@@ -132,6 +185,9 @@ SCHEMA_STATEMENTS = [
     CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON document_chunks(document_id)
     """,
     """
+    CREATE INDEX IF NOT EXISTS idx_document_tokens_document_id ON document_tokens(document_id)
+    """,
+    """
     CREATE INDEX IF NOT EXISTS idx_query_cache_hash ON query_cache(query_hash)
     """,
     """
@@ -139,11 +195,76 @@ SCHEMA_STATEMENTS = [
     """,
 ]
 
+# Full-text index over the columns search_documents matches. External content:
+# rows live in ``documents`` and the triggers keep the index in step.
+FTS_STATEMENTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+        title, summary, path, content='documents', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS documents_fts_ai AFTER INSERT ON documents BEGIN
+        INSERT INTO documents_fts(rowid, title, summary, path)
+        VALUES (new.id, new.title, new.summary, new.path);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS documents_fts_ad AFTER DELETE ON documents BEGIN
+        INSERT INTO documents_fts(documents_fts, rowid, title, summary, path)
+        VALUES ('delete', old.id, old.title, old.summary, old.path);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS documents_fts_au AFTER UPDATE ON documents BEGIN
+        INSERT INTO documents_fts(documents_fts, rowid, title, summary, path)
+        VALUES ('delete', old.id, old.title, old.summary, old.path);
+        INSERT INTO documents_fts(rowid, title, summary, path)
+        VALUES (new.id, new.title, new.summary, new.path);
+    END
+    """,
+]
+
+
+def _backfill_document_tokens(connection: sqlite3.Connection) -> None:
+    cursor = connection.execute("SELECT id, path, title, summary, content FROM documents")
+    while batch := cursor.fetchmany(500):
+        connection.executemany(
+            "INSERT OR IGNORE INTO document_tokens(token, document_id) VALUES(?, ?)",
+            [(token, row[0]) for row in batch for token in document_tokens(*row[1:])],
+        )
+
+
+def _initialize_fts(connection: sqlite3.Connection) -> None:
+    existed = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='documents_fts'"
+    ).fetchone()
+    try:
+        for statement in FTS_STATEMENTS:
+            connection.execute(statement)
+    except sqlite3.OperationalError:  # pragma: no cover - SQLite built without FTS5
+        return
+    if not existed:
+        connection.execute("INSERT INTO documents_fts(documents_fts) VALUES('rebuild')")
+
+
+def _is_current(database_path: Path) -> bool:
+    if not database_path.is_file():
+        return False
+    with closing(sqlite3.connect(database_path)) as connection:
+        return connection.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
 
 def initialize_database(database_path: Path) -> None:
+    """Create or migrate the schema; a database already at SCHEMA_VERSION is left untouched."""
+    if _is_current(database_path):
+        return
     database_path.parent.mkdir(parents=True, exist_ok=True)
     with sqlite3.connect(database_path) as connection:
         connection.execute("PRAGMA foreign_keys = ON;")
+        tokens_existed = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='document_tokens'"
+        ).fetchone()
         for statement in SCHEMA_STATEMENTS:
             connection.execute(statement)
 
@@ -161,7 +282,16 @@ def initialize_database(database_path: Path) -> None:
             for row in connection.execute("PRAGMA table_info(document_chunks)").fetchall()
         }
         if "embedding" not in chunk_columns:
-            connection.execute("ALTER TABLE document_chunks ADD COLUMN embedding TEXT")
+            connection.execute("ALTER TABLE document_chunks ADD COLUMN embedding BLOB")
+
+        embedding_columns = {
+            row[1]
+            for row in connection.execute("PRAGMA table_info(embeddings)").fetchall()
+        }
+        if "embedding_q8" not in embedding_columns:
+            connection.execute("ALTER TABLE embeddings ADD COLUMN embedding_q8 BLOB")
+        if "embedding_scale" not in embedding_columns:
+            connection.execute("ALTER TABLE embeddings ADD COLUMN embedding_scale REAL")
 
         event_columns = {
             row[1]
@@ -178,4 +308,27 @@ def initialize_database(database_path: Path) -> None:
             "CREATE INDEX IF NOT EXISTS idx_events_status_created ON events(status, created_at)"
         )
 
+        _initialize_fts(connection)
+        if not tokens_existed:
+            _backfill_document_tokens(connection)
+
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         connection.commit()
+
+
+def refresh_planner_stats(connection: sqlite3.Connection) -> None:
+    """Keep sqlite_stat1 current so the planner picks the composite indexes.
+
+    The first call runs a sampled ANALYZE. Later calls use PRAGMA optimize, which
+    re-analyzes only tables this connection queried whose size has drifted. Run it
+    on the connection that just did the bulk work.
+    """
+    connection.execute("PRAGMA analysis_limit = 1000")
+    analyzed = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'"
+    ).fetchone()
+    if analyzed is None or connection.execute("SELECT 1 FROM sqlite_stat1 WHERE tbl='documents'").fetchone() is None:
+        connection.execute("ANALYZE")
+    else:
+        connection.execute("PRAGMA optimize")
+    connection.commit()
@@ -4,9 +4,11 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 import sqlite3
+import threading
 import time
+from typing import Sequence
 
-from markdownkeeper.processor.parser import parse_markdown
+from markdownkeeper.processor.parser import parse_markdown_bytes
 from markdownkeeper.storage.repository import delete_document_by_path, upsert_document
 
 try:
@@ -16,6 +18,11 @@ except Exception:  # pragma: no cover - optional dependency
     FileSystemEventHandler = object  # type: ignore[assignment]
     Observer = None  # type: ignore[assignment]
 
+# Defaults for the CLI's --interval: full-tree rescans are spaced out, while the
+# event-driven path only waits for a burst of writes to settle.
+POLL_INTERVAL_SECONDS = 2.0
+WATCHDOG_DEBOUNCE_SECONDS = 1.0
+
 
 @dataclass(slots=True)
 class WatchRunResult:
@@ -45,12 +52,11 @@ def _snapshot(roots: list[Path], extensions: set[str]) -> dict[Path, float]:
 
 
 
-def _document_exists(database_path: Path, path: Path) -> bool:
-    with sqlite3.connect(database_path) as connection:
-        row = connection.execute(
-            "SELECT 1 FROM documents WHERE path = ? LIMIT 1",
-            (str(path),),
-        ).fetchone()
+def _document_exists(connection: sqlite3.Connection, path: Path) -> bool:
+    row = connection.execute(
+        "SELECT 1 FROM documents WHERE path = ? LIMIT 1",
+        (str(path),),
+    ).fetchone()
     return row is not None
 
 def _desired_event_type(path: Path, deleted_paths: set[Path]) -> str:
@@ -141,8 +147,8 @@ def _drain_event_queue(database_path: Path, batch_size: int = 256) -> WatchRunRe
                         result.deleted += 1
                     else:
                         if path.exists() and path.is_file():
-                            existed = _document_exists(database_path, path)
-                            parsed = parse_markdown(path.read_text(encoding="utf-8"))
+                            existed = _document_exists(connection, path)
+                            parsed = parse_markdown_bytes(path.read_bytes())
                             upsert_document(database_path, path, parsed)
                             if existed:
                                 result.modified += 1
@@ -173,7 +179,7 @@ def _drain_event_queue(database_path: Path, batch_size: int = 256) -> WatchRunRe
 def watch_once(
     database_path: Path,
     roots: list[Path],
-    extensions: list[str],
+    extensions: Sequence[str],
     previous_snapshot: dict[Path, float] | None = None,
 ) -> tuple[dict[Path, float], WatchRunResult]:
     ext_set = {ext.lower() for ext in extensions}
@@ -197,8 +203,8 @@ def watch_once(
 def watch_loop(
     database_path: Path,
     roots: list[Path],
-    extensions: list[str],
-    interval_s: float = 1.0,
+    extensions: Sequence[str],
+    interval_s: float = POLL_INTERVAL_SECONDS,
     iterations: int | None = None,
 ) -> WatchRunResult:
     total = WatchRunResult()
@@ -224,11 +230,15 @@ def watch_loop(
 
 
 class _MarkdownWatchEventHandler(FileSystemEventHandler):
+    """Collects markdown paths from observer callbacks, each stamped with its latest event time."""
+
     def __init__(self, extensions: set[str]) -> None:
         super().__init__()
         self.extensions = extensions
-        self.changed: set[Path] = set()
-        self.deleted: set[Path] = set()
+        self.changed: dict[Path, float] = {}
+        self.deleted: dict[Path, float] = {}
+        self.pending = threading.Event()
+        self._lock = threading.Lock()
 
     def _is_markdown_file(self, path: str) -> bool:
         candidate = Path(path)
@@ -237,14 +247,40 @@ class _MarkdownWatchEventHandler(FileSystemEventHandler):
     def _record_change(self, path: str) -> None:
         candidate = Path(path).resolve()
         if self._is_markdown_file(path):
-            self.changed.add(candidate)
-            self.deleted.discard(candidate)
+            with self._lock:
+                self.changed[candidate] = time.monotonic()
+                self.deleted.pop(candidate, None)
+            self.pending.set()
 
     def _record_delete(self, path: str) -> None:
         candidate = Path(path).resolve()
         if self._is_markdown_file(path):
-            self.deleted.add(candidate)
-            self.changed.discard(candidate)
+            with self._lock:
+                self.deleted[candidate] = time.monotonic()
+                self.changed.pop(candidate, None)
+            self.pending.set()
+
+    def take_settled(self, quiet_s: float = 0.0) -> tuple[list[Path], list[Path]]:
+        """Remove and return (changed, deleted) paths with no event for at least ``quiet_s``."""
+        now = time.monotonic()
+        with self._lock:
+            changed = sorted(path for path, stamp in self.changed.items() if now - stamp >= quiet_s)
+            deleted = sorted(path for path, stamp in self.deleted.items() if now - stamp >= quiet_s)
+            for path in changed:
+                del self.changed[path]
+            for path in deleted:
+                del self.deleted[path]
+            if not self.changed and not self.deleted:
+                self.pending.clear()
+        return changed, deleted
+
+    def seconds_until_settled(self, quiet_s: float) -> float | None:
+        """Time until the next pending path has been quiet for ``quiet_s``; None when nothing is pending."""
+        with self._lock:
+            stamps = list(self.changed.values()) + list(self.deleted.values())
+        if not stamps:
+            return None
+        return max(0.0, quiet_s - (time.monotonic() - min(stamps)))
 
     def on_created(self, event) -> None:  # type: ignore[override]
         if not event.is_directory:
@@ -267,11 +303,11 @@ class _MarkdownWatchEventHandler(FileSystemEventHandler):
 def _flush_pending_events(
     database_path: Path,
     handler: _MarkdownWatchEventHandler,
+    quiet_s: float = 0.0,
 ) -> WatchRunResult:
-    pending_delete = sorted(handler.deleted)
-    pending_change = sorted(handler.changed)
-    handler.deleted.clear()
-    handler.changed.clear()
+    pending_change, pending_delete = handler.take_settled(quiet_s)
+    if not pending_change and not pending_delete:
+        return WatchRunResult()
 
     _queue_events(
         database_path=database_path,
@@ -284,10 +320,15 @@ def _flush_pending_events(
 def watch_loop_watchdog(
     database_path: Path,
     roots: list[Path],
-    extensions: list[str],
+    extensions: Sequence[str],
     debounce_s: float = 0.25,
     duration_s: float | None = None,
 ) -> WatchRunResult:
+    """Index changes reported by watchdog once each path has been quiet for ``debounce_s``.
+
+    The loop sleeps until the next pending path settles, or until an event arrives
+    when nothing is pending, so an idle tree costs no wakeups.
+    """
     if not is_watchdog_available():
         raise RuntimeError("watchdog is not installed; use polling mode")
 
@@ -305,14 +346,19 @@ def watch_loop_watchdog(
 
     try:
         while True:
-            step = _flush_pending_events(database_path, handler)
+            step = _flush_pending_events(database_path, handler, quiet_s=debounce_s)
             total.created += step.created
             total.modified += step.modified
             total.deleted += step.deleted
 
-            if duration_s is not None and (time.monotonic() - started) >= duration_s:
+            time_left = None if duration_s is None else duration_s - (time.monotonic() - started)
+            if time_left is not None and time_left <= 0:
                 break
-            time.sleep(max(0.05, debounce_s))
+            settle_in = handler.seconds_until_settled(debounce_s)
+            if settle_in is None:
+                handler.pending.wait(time_left)
+            else:
+                time.sleep(max(0.01, settle_in if time_left is None else min(settle_in, time_left)))
     finally:
         observer.stop()
         observer.join(timeout=2)
@@ -9,14 +9,27 @@ if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
 import json
+import os
+import signal
+import socket
+import subprocess
 import tempfile
 import threading
+import time
 import unittest
 from urllib.request import Request, urlopen
 
+from http.client import HTTPConnection
 from http.server import ThreadingHTTPServer
 
-from markdownkeeper.api.server import build_handler
+from markdownkeeper.api.server import (
+    ROUTES,
+    ApiRequestHandler,
+    WorkerPoolHTTPServer,
+    build_handler,
+    default_http_threads,
+)
+from markdownkeeper.cache.semantic import SemanticCache
 from markdownkeeper.processor.parser import parse_markdown
 from markdownkeeper.storage.repository import upsert_document
 from markdownkeeper.storage.schema import initialize_database
@@ -217,6 +230,298 @@ class ApiTests(unittest.TestCase):
                 server.shutdown()
                 server.server_close()
 
+    def test_post_body_over_limit_returns_413(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            db = root / ".markdownkeeper" / "index.db"
+            initialize_database(db)
+
+            server = ThreadingHTTPServer(("127.0.0.1", 0), build_handler(db, max_body_bytes=32))
+            port = server.server_address[1]
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                req = Request(
+                    f"http://127.0.0.1:{port}/api/v1/query",
+                    data=json.dumps({
+                        "jsonrpc": "2.0",
+                        "method": "semantic_query",
+                        "params": {"query": "x" * 64},
+                        "id": 1,
+                    }).encode("utf-8"),
+                    headers={"Content-Type": "application/json"},
+                    method="POST",
+                )
+                from urllib.error import HTTPError
+                with self.assertRaises(HTTPError) as ctx:
+                    urlopen(req, timeout=5)  # noqa: S310
+                self.assertEqual(ctx.exception.code, 413)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_build_handler_binds_routes_per_database(self) -> None:
+        first = build_handler(Path("first.db"), max_body_bytes=64)
+        second = build_handler(Path("second.db"))
+
+        self.assertTrue(issubclass(first, ApiRequestHandler))
+        self.assertIs(first.do_POST, second.do_POST)
+        self.assertEqual(first.max_body_bytes, 64)
+        self.assertNotEqual(second.max_body_bytes, 64)
+        self.assertEqual(ApiRequestHandler.routes, {})
+        self.assertEqual(set(first.routes), set(ROUTES))
+        self.assertIsNot(first.routes, second.routes)
+
+    def test_worker_pool_server_serves_concurrent_requests(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            db = root / ".markdownkeeper" / "index.db"
+            initialize_database(db)
+
+            server = WorkerPoolHTTPServer(("127.0.0.1", 0), build_handler(db), max_workers=2)
+            self.assertEqual(server.max_workers, 2)
+            port = server.server_address[1]
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            statuses: list[str] = []
+
+            def fetch() -> None:
+                req = Request(f"http://127.0.0.1:{port}/health", method="GET")
+                with urlopen(req, timeout=5) as resp:  # noqa: S310
+                    statuses.append(json.loads(resp.read().decode("utf-8"))["status"])
+
+            try:
+                clients = [threading.Thread(target=fetch) for _ in range(6)]
+                for client in clients:
+                    client.start()
+                for client in clients:
+                    client.join(timeout=10)
+                self.assertEqual(statuses, ["ok"] * 6)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_semantic_query_served_from_query_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            db = root / ".markdownkeeper" / "index.db"
+            initialize_database(db)
+            doc = root / "doc.md"
+            doc.write_text("# Cached Doc\nkubernetes cluster setup", encoding="utf-8")
+            upsert_document(db, doc, parse_markdown(doc.read_text(encoding="utf-8")))
+
+            cache = SemanticCache()
+            server = ThreadingHTTPServer(("127.0.0.1", 0), build_handler(db, query_cache=cache))
+            port = server.server_address[1]
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+
+            def query(text: str) -> dict:
+                req = Request(
+                    f"http://127.0.0.1:{port}/api/v1/query",
+                    data=json.dumps({
+                        "jsonrpc": "2.0",
+                        "method": "semantic_query",
+                        "params": {"query": text, "max_results": 5},
+                        "id": 1,
+                    }).encode("utf-8"),
+                    headers={"Content-Type": "application/json"},
+                    method="POST",
+                )
+                with urlopen(req, timeout=5) as resp:  # noqa: S310
+                    return json.loads(resp.read().decode("utf-8"))
+
+            try:
+                first = query("kubernetes cluster")
+                second = query("Kubernetes  Cluster")
+                self.assertEqual(first["result"]["documents"], second["result"]["documents"])
+                self.assertEqual(cache.hits, 1)
+
+                doc.write_text("# Renamed Doc\nkubernetes cluster setup", encoding="utf-8")
+                upsert_document(db, doc, parse_markdown(doc.read_text(encoding="utf-8")))
+                third = query("kubernetes cluster")
+                self.assertEqual(third["result"]["documents"][0]["title"], "Renamed Doc")
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_batch_get_document_returns_responses_in_order(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            db = root / ".markdownkeeper" / "index.db"
+            initialize_database(db)
+            ids = []
+            for name in ("one", "two"):
+                doc = root / f"{name}.md"
+                doc.write_text(f"# Doc {name}\nbody {name}", encoding="utf-8")
+                ids.append(upsert_document(db, doc, parse_markdown(doc.read_text(encoding="utf-8"))))
+
+            server = ThreadingHTTPServer(("127.0.0.1", 0), build_handler(db))
+            port = server.server_address[1]
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                batch = [
+                    {"jsonrpc": "2.0", "method": "get_document", "params": {"document_id": ids[1]}, "id": "a"},
+                    {"jsonrpc": "2.0", "method": "get_document", "params": {"document_id": 99999}, "id": "b"},
+                    "not a request",
+                    {"jsonrpc": "2.0", "method": "get_document", "params": {"document_id": ids[0], "include_content": True}, "id": "c"},
+                    {"jsonrpc": "2.0", "method": "semantic_query", "params": {}, "id": "d"},
+                ]
+                req = Request(
+                    f"http://127.0.0.1:{port}/api/v1/get_doc",
+                    data=json.dumps(batch).encode("utf-8"),
+                    headers={"Content-Type": "application/json"},
+                    method="POST",
+                )
+                with urlopen(req, timeout=5) as resp:  # noqa: S310
+                    payload = json.loads(resp.read().decode("utf-8"))
+
+                self.assertEqual([item["id"] for item in payload], ["a", "b", None, "c", "d"])
+                self.assertEqual(payload[0]["result"]["title"], "Doc two")
+                self.assertEqual(payload[1]["error"]["code"], -32004)
+                self.assertEqual(payload[2]["error"]["code"], -32600)
+                self.assertEqual(payload[3]["result"]["title"], "Doc one")
+                self.assertIn("body one", payload[3]["result"]["content"])
+                self.assertEqual(payload[4]["error"]["code"], -32601)
+
+                empty = Request(
+                    f"http://127.0.0.1:{port}/api/v1/get_doc",
+                    data=b"[]",
+                    headers={"Content-Type": "application/json"},
+                    method="POST",
+                )
+                from urllib.error import HTTPError
+                with self.assertRaises(HTTPError) as ctx:
+                    urlopen(empty, timeout=5)  # noqa: S310
+                self.assertEqual(ctx.exception.code, 400)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_keep_alive_reuses_connection(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db)
+
+            server = WorkerPoolHTTPServer(("127.0.0.1", 0), build_handler(db, max_body_bytes=128), max_workers=2)
+            port = server.server_address[1]
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            conn = HTTPConnection("127.0.0.1", port, timeout=5)
+            try:
+                conn.request("GET", "/health")
+                first = conn.getresponse()
+                self.assertEqual(first.getheader("Connection"), "keep-alive")
+                first.read()
+                sock = conn.sock
+
+                body = json.dumps({"jsonrpc": "2.0", "method": "get_document", "params": {"document_id": 9}, "id": 1})
+                conn.request("POST", "/api/v1/get_doc", body=body, headers={"Content-Type": "application/json"})
+                second = conn.getresponse()
+                self.assertEqual(second.status, 404)
+                second.read()
+                self.assertIs(conn.sock, sock)
+
+                conn.request("POST", "/api/v1/get_doc", body="x" * 256, headers={"Content-Type": "application/json"})
+                too_large = conn.getresponse()
+                self.assertEqual(too_large.status, 413)
+                self.assertEqual(too_large.getheader("Connection"), "close")
+                too_large.read()
+            finally:
+                conn.close()
+                server.shutdown()
+                server.server_close()
+
+    def test_idle_keep_alive_clients_do_not_starve_the_pool(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db)
+
+            server = WorkerPoolHTTPServer(("127.0.0.1", 0), build_handler(db), max_workers=2)
+            port = server.server_address[1]
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            idle = [HTTPConnection("127.0.0.1", port, timeout=5) for _ in range(server.max_workers)]
+            try:
+                headers = []
+                for conn in idle:
+                    conn.request("GET", "/health")
+                    response = conn.getresponse()
+                    response.read()
+                    headers.append(response.getheader("Connection"))
+                # Keep-alive is offered while a worker is left over, not to the client that fills the pool.
+                self.assertEqual(headers, ["keep-alive", "close"])
+
+                start = time.monotonic()
+                with urlopen(f"http://127.0.0.1:{port}/health", timeout=5) as resp:  # noqa: S310
+                    self.assertEqual(json.loads(resp.read().decode("utf-8"))["status"], "ok")
+                self.assertLess(time.monotonic() - start, 1.0)
+            finally:
+                for conn in idle:
+                    conn.close()
+                server.shutdown()
+                server.server_close()
+
+    @unittest.skipUnless(hasattr(socket, "SO_REUSEPORT"), "SO_REUSEPORT not supported")
+    def test_reuse_port_servers_share_address(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db)
+            handler = build_handler(db)
+            first = WorkerPoolHTTPServer(("127.0.0.1", 0), handler, max_workers=1, reuse_port=True)
+            try:
+                port = first.server_address[1]
+                second = WorkerPoolHTTPServer(("127.0.0.1", port), handler, max_workers=1, reuse_port=True)
+                second.server_close()
+            finally:
+                first.server_close()
+
+    @unittest.skipUnless(hasattr(socket, "SO_REUSEPORT") and hasattr(os, "fork"), "needs fork and SO_REUSEPORT")
+    def test_run_api_server_with_workers_serves_and_stops_on_sigterm(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db)
+            with socket.socket() as probe:
+                probe.bind(("127.0.0.1", 0))
+                port = probe.getsockname()[1]
+
+            code = (
+                "from pathlib import Path; from markdownkeeper.api.server import run_api_server; "
+                f"run_api_server('127.0.0.1', {port}, Path({str(db)!r}), threads=2, workers=2)"
+            )
+            env = dict(os.environ, PYTHONPATH=str(SRC))
+            proc = subprocess.Popen([sys.executable, "-c", code], env=env)
+            try:
+                deadline = time.monotonic() + 10
+                status = None
+                while status is None and time.monotonic() < deadline:
+                    try:
+                        with urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as resp:  # noqa: S310
+                            status = json.loads(resp.read())["status"]
+                    except OSError:
+                        time.sleep(0.1)
+                self.assertEqual(status, "ok")
+            finally:
+                proc.send_signal(signal.SIGTERM)
+                self.assertEqual(proc.wait(timeout=10), 0)
+
+            with self.assertRaises(OSError):
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+
+    def test_routes_table_covers_rpc_endpoints(self) -> None:
+        self.assertEqual(
+            set(ROUTES),
+            {
+                ("/api/v1/query", "semantic_query"),
+                ("/api/v1/get_doc", "get_document"),
+                ("/api/v1/find_concept", "find_by_concept"),
+            },
+        )
+
+    def test_default_http_threads_has_floor(self) -> None:
+        self.assertGreaterEqual(default_http_threads(), 8)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -11,14 +11,78 @@ if str(SRC) not in sys.path:
 import contextlib
 import io
 import json
+import os
+import sqlite3
+import subprocess
 import tempfile
 import unittest
 from unittest import mock
 
-from markdownkeeper.cli.main import main
+from markdownkeeper.cli.main import _COMMAND_SPECS, _HANDLERS, build_parser, fast_parse, main
 
 
 class CliTests(unittest.TestCase):
+    def test_build_parser_only_adds_arguments_for_selected_command(self) -> None:
+        argv = ["--config", "query", "get-doc", "7"]
+        parser = build_parser(argv)
+        args = parser.parse_args(argv)
+        self.assertEqual(args.command, "get-doc")
+        self.assertEqual(args.id, 7)
+        self.assertEqual(args.config, Path("query"))
+
+        subparsers = next(action for action in parser._actions if action.dest == "command")
+        query_parser = subparsers.choices["query"]
+        self.assertEqual([action.dest for action in query_parser._actions], ["help"])
+        self.assertIn("write-systemd", parser.format_help())
+
+    def test_every_command_spec_has_a_handler(self) -> None:
+        self.assertEqual(list(_HANDLERS), list(_COMMAND_SPECS))
+
+    def test_fast_parse_matches_argparse(self) -> None:
+        cases = [
+            ["stats"],
+            ["--config", "cfg.toml", "get-doc", "7", "--include-content", "--max-tokens=50"],
+            ["--config=cfg.toml", "query", "install guide", "--limit", "3", "--search-mode", "lexical"],
+            ["daemon-start", "api", "--pid-file", "/tmp/api.pid"],
+            ["serve-api", "--embedding-dtype", "int8", "--workers", "2"],
+            ["write-systemd"],
+        ]
+        for argv in cases:
+            with self.subTest(argv=argv):
+                self.assertEqual(fast_parse(argv), build_parser(argv).parse_args(argv))
+
+    def test_fast_parse_defers_unusual_argv_to_argparse(self) -> None:
+        for argv in (
+            [],
+            ["--help"],
+            ["query", "-h"],
+            ["nope"],
+            ["query"],
+            ["query", "a", "b"],
+            ["get-doc", "x"],
+            ["query", "a", "--lim", "3"],
+            ["query", "a", "--format", "xml"],
+            ["query", "a", "--include-content=yes"],
+            ["daemon-stop", "db"],
+        ):
+            with self.subTest(argv=argv):
+                self.assertIsNone(fast_parse(argv))
+
+    def test_importing_cli_defers_heavy_modules(self) -> None:
+        code = (
+            "import sys; import markdownkeeper.cli.main; "
+            "print(sorted(m for m in ('markdownkeeper.storage.repository', 'markdownkeeper.api.server', "
+            "'markdownkeeper.watcher.service') if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={**os.environ, "PYTHONPATH": str(SRC)},
+        ).stdout
+        self.assertEqual(output.strip(), "[]")
+
     def test_show_config_outputs_json(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             cfg = Path(tmp) / "markdownkeeper.toml"
@@ -33,6 +97,22 @@ class CliTests(unittest.TestCase):
         payload = json.loads(buf.getvalue())
         self.assertEqual(payload["api"]["port"], 9001)
 
+    def test_json_output_is_compact_bytes_when_piped(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = Path(tmp) / "markdownkeeper.toml"
+            cfg.write_text("[api]\nport=9002\n", encoding="utf-8")
+
+            raw = io.BytesIO()
+            stdout = io.TextIOWrapper(raw, encoding="utf-8")
+            with mock.patch("sys.argv", ["mdkeeper", "--config", str(cfg), "show-config"]):
+                with contextlib.redirect_stdout(stdout):
+                    code = main()
+
+        self.assertEqual(code, 0)
+        output = raw.getvalue()
+        self.assertEqual(output.count(b"\n"), 1)
+        self.assertEqual(json.loads(output)["api"]["port"], 9002)
+
     def test_scan_file_indexes_document_and_outputs_json(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             db_path = Path(tmp) / ".markdownkeeper" / "index.db"
@@ -75,6 +155,23 @@ class CliTests(unittest.TestCase):
             self.assertEqual(code, 1)
             self.assertIn("File not found", buf.getvalue())
 
+    def test_scan_file_normalizes_newlines_and_rejects_directories(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "index.db"
+            md_file = Path(tmp) / "crlf.md"
+            md_file.write_bytes(b"# CRLF Doc\r\n\r\nBody line\r\n")
+            with contextlib.redirect_stdout(io.StringIO()):
+                with mock.patch("sys.argv", ["mdkeeper", "scan-file", str(md_file), "--db-path", str(db_path)]):
+                    self.assertEqual(main(), 0)
+                with mock.patch("sys.argv", ["mdkeeper", "scan-file", tmp, "--db-path", str(db_path)]):
+                    self.assertEqual(main(), 1)
+
+            with sqlite3.connect(db_path) as connection:
+                title, content = connection.execute("SELECT title, content FROM documents").fetchone()
+            self.assertEqual(title, "CRLF Doc")
+            self.assertEqual(content, md_file.read_text(encoding="utf-8"))
+            self.assertNotIn("\r", content)
+
     def test_query_and_get_doc_round_trip(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             db_path = Path(tmp) / ".markdownkeeper" / "index.db"
@@ -140,6 +237,51 @@ class CliTests(unittest.TestCase):
             self.assertEqual(code, 0)
             self.assertIn("No documents matched query", buf.getvalue())
 
+    def test_scan_dir_indexes_markdown_tree(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "docs"
+            (root / "nested").mkdir(parents=True)
+            (root / "a.md").write_text("# Alpha\nbody", encoding="utf-8")
+            (root / "nested" / "b.markdown").write_text("# Beta\nbody", encoding="utf-8")
+            (root / "notes.txt").write_text("skip me", encoding="utf-8")
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+
+            buf = io.StringIO()
+            with mock.patch(
+                "sys.argv",
+                ["mdkeeper", "scan-dir", str(root), "--db-path", str(db_path), "--format", "json"],
+            ):
+                with contextlib.redirect_stdout(buf):
+                    code = main()
+
+            self.assertEqual(code, 0)
+            payload = json.loads(buf.getvalue())
+            self.assertEqual(payload["indexed"], 2)
+
+            missing = io.StringIO()
+            with mock.patch("sys.argv", ["mdkeeper", "scan-dir", str(Path(tmp) / "nope"), "--db-path", str(db_path)]):
+                with contextlib.redirect_stdout(missing):
+                    self.assertEqual(main(), 1)
+
+    def test_query_text_format_skips_content_fetch(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            md_file = Path(tmp) / "doc.md"
+            md_file.write_text("# Deployment Guide\nUse docker compose.", encoding="utf-8")
+            with mock.patch("sys.argv", ["mdkeeper", "scan-file", str(md_file), "--db-path", str(db_path)]):
+                main()
+
+            buf = io.StringIO()
+            with mock.patch(
+                "sys.argv",
+                ["mdkeeper", "query", "Deployment", "--db-path", str(db_path), "--include-content"],
+            ), mock.patch("markdownkeeper.storage.repository.get_documents_bulk") as bulk:
+                with contextlib.redirect_stdout(buf):
+                    code = main()
+            self.assertEqual(code, 0)
+            self.assertIn("Deployment Guide", buf.getvalue())
+            bulk.assert_not_called()
+
     def test_get_doc_not_found_returns_error(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             db_path = Path(tmp) / ".markdownkeeper" / "index.db"
@@ -345,8 +487,8 @@ roots=["{docs.as_posix()}"]
 extensions=[".md"]
 ''', encoding="utf-8")
 
-            with mock.patch("markdownkeeper.cli.main.is_watchdog_available", return_value=False), mock.patch(
-                "markdownkeeper.cli.main.watch_loop"
+            with mock.patch("markdownkeeper.watcher.service.is_watchdog_available", return_value=False), mock.patch(
+                "markdownkeeper.watcher.service.watch_loop"
             ) as watch_loop_mock:
                 watch_loop_mock.return_value.created = 0
                 watch_loop_mock.return_value.modified = 0
@@ -360,6 +502,29 @@ extensions=[".md"]
             self.assertEqual(code, 0)
             watch_loop_mock.assert_called_once()
 
+    def test_watch_auto_falls_back_to_polling_when_watchdog_fails_to_start(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            cfg = Path(tmp) / "markdownkeeper.toml"
+            cfg.write_text(f'[watch]\nroots=["{(Path(tmp) / "docs").as_posix()}"]\n', encoding="utf-8")
+            err = io.StringIO()
+
+            with mock.patch("markdownkeeper.watcher.service.is_watchdog_available", return_value=True), \
+                 mock.patch("markdownkeeper.watcher.service.watch_loop_watchdog",
+                            side_effect=OSError(24, "inotify instance limit reached")), \
+                 mock.patch("markdownkeeper.watcher.service.watch_loop") as poll_mock, \
+                 contextlib.redirect_stderr(err), contextlib.redirect_stdout(io.StringIO()) as out:
+                poll_mock.return_value.created = 0
+                poll_mock.return_value.modified = 0
+                poll_mock.return_value.deleted = 0
+                with mock.patch("sys.argv", ["mdkeeper", "--config", str(cfg), "watch", "--db-path", str(db_path)]):
+                    code = main()
+
+            self.assertEqual(code, 0)
+            self.assertEqual(poll_mock.call_args.kwargs["interval_s"], 2.0)
+            self.assertIn("falling back to polling", err.getvalue())
+            self.assertIn("mode=polling", out.getvalue())
+
     def test_watch_watchdog_mode_with_iterations_derives_duration(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             db_path = Path(tmp) / ".markdownkeeper" / "index.db"
@@ -368,8 +533,8 @@ extensions=[".md"]
             cfg = Path(tmp) / "markdownkeeper.toml"
             cfg.write_text(f'[watch]\nroots=["{docs.as_posix()}"]\nextensions=[".md"]\n', encoding="utf-8")
 
-            with mock.patch("markdownkeeper.cli.main.is_watchdog_available", return_value=True), \
-                 mock.patch("markdownkeeper.cli.main.watch_loop_watchdog") as wd_mock:
+            with mock.patch("markdownkeeper.watcher.service.is_watchdog_available", return_value=True), \
+                 mock.patch("markdownkeeper.watcher.service.watch_loop_watchdog") as wd_mock:
                 wd_mock.return_value.created = 0
                 wd_mock.return_value.modified = 0
                 wd_mock.return_value.deleted = 0
@@ -396,8 +561,8 @@ roots=["{docs.as_posix()}"]
 extensions=[".md"]
 ''', encoding="utf-8")
 
-            with mock.patch("markdownkeeper.cli.main.is_watchdog_available", return_value=True), mock.patch(
-                "markdownkeeper.cli.main.watch_loop_watchdog"
+            with mock.patch("markdownkeeper.watcher.service.is_watchdog_available", return_value=True), mock.patch(
+                "markdownkeeper.watcher.service.watch_loop_watchdog"
             ) as watch_watchdog_mock:
                 watch_watchdog_mock.return_value.created = 0
                 watch_watchdog_mock.return_value.modified = 0
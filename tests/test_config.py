@@ -8,6 +8,7 @@ SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
+import os
 import tempfile
 import unittest
 
@@ -22,6 +23,18 @@ class ConfigTests(unittest.TestCase):
             self.assertEqual(config.watch.debounce_ms, 500)
             self.assertEqual(config.storage.database_path, ".markdownkeeper/index.db")
 
+    def test_load_config_reuses_parse_until_file_changes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = Path(tmp) / "markdownkeeper.toml"
+            config_path.write_text("[api]\nport = 9001\n", encoding="utf-8")
+            first = load_config(config_path)
+            self.assertIs(load_config(config_path), first)
+
+            config_path.write_text("[api]\nport = 9002\n", encoding="utf-8")
+            stat = config_path.stat()
+            os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            self.assertEqual(load_config(config_path).api.port, 9002)
+
     def test_load_custom_values(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             config_path = Path(tmp) / "markdownkeeper.toml"
@@ -44,8 +57,8 @@ port = 9999
 
             config = load_config(config_path)
 
-            self.assertEqual(config.watch.roots, ["docs", "runbooks"])
-            self.assertEqual(config.watch.extensions, [".md"])
+            self.assertEqual(config.watch.roots, ("docs", "runbooks"))
+            self.assertEqual(config.watch.extensions, (".md",))
             self.assertEqual(config.watch.debounce_ms, 900)
             self.assertEqual(config.storage.database_path, "state/custom.db")
             self.assertEqual(config.api.host, "0.0.0.0")
@@ -57,8 +70,8 @@ port = 9999
             config_path.write_text("[watch]\nroots=[\"docs\"]\n", encoding="utf-8")
             config = load_config(config_path)
 
-            self.assertEqual(config.watch.roots, ["docs"])
-            self.assertEqual(config.watch.extensions, [".md", ".markdown"])
+            self.assertEqual(config.watch.roots, ("docs",))
+            self.assertEqual(config.watch.extensions, (".md", ".markdown"))
             self.assertEqual(config.api.host, "127.0.0.1")
 
     def test_empty_config_file_returns_defaults(self) -> None:
@@ -69,10 +82,19 @@ port = 9999
             self.assertEqual(config.watch.debounce_ms, 500)
             self.assertEqual(config.api.port, 8765)
 
+    def test_cache_section_values(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = Path(tmp) / "markdownkeeper.toml"
+            config_path.write_text("[cache]\nmax_entries = 32\ndistance_threshold = 0.1\n", encoding="utf-8")
+            config = load_config(config_path)
+            self.assertEqual(config.cache.max_entries, 32)
+            self.assertAlmostEqual(config.cache.distance_threshold, 0.1)
+            self.assertEqual(config.cache.ttl_seconds, 3600)
+
     def test_default_config_slots(self) -> None:
         from markdownkeeper.config import WatchConfig, StorageConfig, ApiConfig, AppConfig
         wc = WatchConfig()
-        self.assertEqual(wc.roots, ["."])
+        self.assertEqual(wc.roots, (".",))
         sc = StorageConfig()
         self.assertEqual(sc.database_path, ".markdownkeeper/index.db")
         ac = ApiConfig()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+import tempfile
+import threading
+import unittest
+
+from markdownkeeper.processor.parser import parse_markdown
+from markdownkeeper.storage.connections import close_thread_connections, open_read_connection, thread_connection
+from markdownkeeper.storage.repository import get_document, search_documents, upsert_document
+from markdownkeeper.storage.schema import initialize_database
+
+
+class ThreadConnectionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self._tmp.name) / ".markdownkeeper" / "index.db"
+        initialize_database(self.db_path)
+
+    def tearDown(self) -> None:
+        close_thread_connections()
+        self._tmp.cleanup()
+
+    def test_same_thread_reuses_connection(self) -> None:
+        first = thread_connection(self.db_path)
+        self.assertIs(thread_connection(self.db_path), first)
+        mode = first.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_other_threads_get_their_own_connection(self) -> None:
+        main = thread_connection(self.db_path)
+        seen: list[object] = []
+
+        def worker() -> None:
+            seen.append(thread_connection(self.db_path))
+            close_thread_connections()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(seen), 1)
+        self.assertIsNot(seen[0], main)
+
+    def test_close_thread_connections_opens_fresh_connection(self) -> None:
+        first = thread_connection(self.db_path)
+        close_thread_connections()
+        self.assertIsNot(thread_connection(self.db_path), first)
+
+    def test_open_read_connection_applies_read_pragmas(self) -> None:
+        connection = open_read_connection(self.db_path)
+        try:
+            self.assertEqual(connection.execute("PRAGMA cache_size").fetchone()[0], -65536)
+            self.assertEqual(connection.execute("PRAGMA temp_store").fetchone()[0], 2)
+        finally:
+            connection.close()
+
+    def test_repository_reads_use_passed_connection_and_see_new_writes(self) -> None:
+        connection = thread_connection(self.db_path)
+        self.assertEqual(search_documents(self.db_path, "pooled", connection=connection), [])
+        doc_id = upsert_document(self.db_path, Path(self._tmp.name) / "a.md", parse_markdown("# Pooled\nbody"))
+        self.assertEqual([d.id for d in search_documents(self.db_path, "pooled", connection=connection)], [doc_id])
+        detail = get_document(self.db_path, doc_id, connection=connection)
+        assert detail is not None
+        self.assertEqual(detail.title, "Pooled")
+
+
+if __name__ == "__main__":
+    unittest.main()
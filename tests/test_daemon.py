@@ -8,12 +8,13 @@ SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
+import os
 import tempfile
 import time
 import unittest
 import warnings
 
-from markdownkeeper.daemon import reload_background, restart_background, start_background, status_background, stop_background, _read_pid, _is_pid_running
+from markdownkeeper.daemon import reload_background, restart_background, start_background, status_background, stop_background, _read_pid, _is_pid_running, _wait_for_exit
 
 
 class DaemonTests(unittest.TestCase):
@@ -35,6 +36,26 @@ class DaemonTests(unittest.TestCase):
             running2, _ = status_background(pid_file)
             self.assertFalse(running2)
 
+    @unittest.skipUnless(hasattr(os, "pidfd_open"), "exit of an unreaped child is only visible through a pidfd")
+    def test_wait_for_exit_returns_when_process_exits(self) -> None:
+        import subprocess
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.2)"])
+        try:
+            start = time.monotonic()
+            self.assertTrue(_wait_for_exit(process.pid, timeout_s=5.0))
+            self.assertLess(time.monotonic() - start, 2.0)
+        finally:
+            process.wait()
+
+    def test_wait_for_exit_times_out_for_running_process(self) -> None:
+        import subprocess
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        try:
+            self.assertFalse(_wait_for_exit(process.pid, timeout_s=0.1))
+        finally:
+            process.kill()
+            process.wait()
+
     def test_restart_background_replaces_pid(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             pid_file = Path(tmp) / "watch.pid"
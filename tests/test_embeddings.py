@@ -8,6 +8,7 @@ SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
+import hashlib
 import math
 import unittest
 from unittest import mock
@@ -15,10 +16,20 @@ from unittest import mock
 from markdownkeeper.query.embeddings import (
     _hash_embedding,
     _normalize,
-    _tokenize,
+    _cached_query_embedding,
+    clear_query_embedding_cache,
     compute_embedding,
+    compute_embeddings_batch,
+    cosine_similarities,
     cosine_similarity,
+    embed_query,
     is_model_embedding_available,
+    pack_embedding,
+    packed_similarities,
+    quantize_embedding,
+    quantized_similarities,
+    tokenize,
+    unpack_embedding,
 )
 
 
@@ -44,7 +55,7 @@ class EmbeddingTests(unittest.TestCase):
         self.assertEqual(cosine_similarity([], [1.0]), 0.0)
 
     def test_tokenize_filters_short_tokens(self) -> None:
-        tokens = _tokenize("I am a big fox")
+        tokens = tokenize("I am a big fox")
         self.assertNotIn("i", tokens)
         self.assertNotIn("a", tokens)
         self.assertIn("am", tokens)
@@ -52,7 +63,7 @@ class EmbeddingTests(unittest.TestCase):
         self.assertIn("fox", tokens)
 
     def test_tokenize_lowercases_and_extracts_alphanumeric(self) -> None:
-        tokens = _tokenize("Hello-World! Test123")
+        tokens = tokenize("Hello-World! Test123")
         self.assertIn("hello", tokens)
         self.assertIn("world", tokens)
         self.assertIn("test123", tokens)
@@ -73,6 +84,16 @@ class EmbeddingTests(unittest.TestCase):
         v2 = _hash_embedding("kubernetes cluster")
         self.assertEqual(v1, v2)
 
+    def test_hash_embedding_matches_sha256_buckets(self) -> None:
+        expected = [0.0] * 8
+        for token in ("alpha", "beta"):  # tokens are deduplicated
+            bucket = int.from_bytes(hashlib.sha256(token.encode("utf-8")).digest()[:2], "big") % 8
+            expected[bucket] += 1.0
+        norm = math.sqrt(sum(v * v for v in expected))
+        vector = _hash_embedding("alpha beta alpha", dimensions=8)
+        for actual, want in zip(vector, expected):
+            self.assertAlmostEqual(actual, want / norm, places=12)
+
     def test_normalize_zero_vector_unchanged(self) -> None:
         zero = [0.0, 0.0, 0.0]
         result = _normalize(zero)
@@ -92,6 +113,86 @@ class EmbeddingTests(unittest.TestCase):
         self.assertEqual(model, "token-hash-v1")
         self.assertEqual(len(vector), 64)
 
+    def test_compute_embeddings_batch_falls_back_per_text(self) -> None:
+        with mock.patch.dict(sys.modules, {"sentence_transformers": None}):
+            results = compute_embeddings_batch(["alpha beta", ""])
+        self.assertEqual(results, [compute_embedding("alpha beta"), compute_embedding("")])
+        self.assertEqual(compute_embeddings_batch([]), [])
+
+    def test_compute_embeddings_batch_encodes_once_with_cached_model(self) -> None:
+        model = mock.Mock()
+        model.encode.return_value = [[3.0, 4.0], [1.0, 0.0]]
+        with mock.patch.dict("markdownkeeper.query.embeddings._MODEL_CACHE", {"fake-model": model}):
+            results = compute_embeddings_batch(["one", "two"], model_name="fake-model")
+        model.encode.assert_called_once()
+        self.assertEqual(model.encode.call_args.args[0], ["one", "two"])
+        self.assertEqual(results, [([0.6, 0.8], "fake-model"), ([1.0, 0.0], "fake-model")])
+
+    def test_embed_query_memoizes_normalized_text(self) -> None:
+        clear_query_embedding_cache()
+        first, model = embed_query("Kubernetes  Cluster")
+        second, _ = embed_query("kubernetes cluster")
+        self.assertEqual(first, second)
+        self.assertEqual(first, compute_embedding("kubernetes cluster")[0])
+        self.assertEqual(model, compute_embedding("kubernetes cluster")[1])
+        info = _cached_query_embedding.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_embed_query_returns_independent_lists(self) -> None:
+        vector, _ = embed_query("mutation check")
+        vector[0] = 42.0
+        self.assertNotEqual(embed_query("mutation check")[0][0], 42.0)
+
+    def test_clear_query_embedding_cache_resets(self) -> None:
+        embed_query("something cached")
+        clear_query_embedding_cache()
+        self.assertEqual(_cached_query_embedding.cache_info().currsize, 0)
+
+    def test_cosine_similarities_matches_pairwise_scores(self) -> None:
+        query = _hash_embedding("vector search")
+        vectors = [_hash_embedding("vector search"), _hash_embedding("other words"), [1.0, 0.0], []]
+        scores = cosine_similarities(query, vectors)
+        self.assertEqual(len(scores), 4)
+        for score, vector in zip(scores, vectors):
+            self.assertAlmostEqual(score, cosine_similarity(query, vector), places=5)
+        self.assertEqual(scores[2:], [0.0, 0.0])
+
+    def test_packed_similarities_match_cosine_similarities(self) -> None:
+        query = _hash_embedding("vector search")
+        vectors = [_hash_embedding("vector search"), _hash_embedding("other words"), [1.0, 0.0]]
+        blobs: list[bytes | None] = [pack_embedding(vector) for vector in vectors] + [None]
+        scores = packed_similarities(query, blobs)
+        expected = cosine_similarities(query, vectors)
+        for score, want in zip(scores, expected):
+            self.assertAlmostEqual(score, want, places=5)
+        self.assertEqual(scores[2:], [0.0, 0.0])
+        self.assertEqual(unpack_embedding(pack_embedding([0.5, -2.0])), [0.5, -2.0])
+
+    def test_quantize_embedding_round_trips_within_scale(self) -> None:
+        vector = _hash_embedding("quantize this vector")
+        blob, scale = quantize_embedding(vector)
+        self.assertEqual(len(blob), len(vector))
+        restored = [value * scale for value in memoryview(blob).cast("b")]
+        for original, approx in zip(vector, restored):
+            self.assertLessEqual(abs(original - approx), scale / 2 + 1e-9)
+        self.assertEqual(quantize_embedding([0.0, 0.0]), (bytes(2), 0.0))
+
+    def test_quantized_similarities_approximate_cosine(self) -> None:
+        query = _hash_embedding("vector search")
+        vectors = [_hash_embedding("vector search"), _hash_embedding("other words")]
+        blobs: list[bytes | None] = []
+        scales: list[float | None] = []
+        for vector in vectors:
+            blob, scale = quantize_embedding(vector)
+            blobs.append(blob)
+            scales.append(scale)
+        blobs.append(None)
+        scales.append(None)
+        scores = quantized_similarities(query, blobs, scales)
+        self.assertAlmostEqual(scores[0], cosine_similarity(query, vectors[0]), places=2)
+        self.assertAlmostEqual(scores[1], cosine_similarity(query, vectors[1]), places=2)
+        self.assertEqual(scores[2], 0.0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -4,12 +4,14 @@ from pathlib import Path
 import sys
 import tempfile
 import unittest
+from unittest import mock
 
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
+from markdownkeeper.query import faiss_index
 from markdownkeeper.query.faiss_index import FaissIndex, is_faiss_available
 
 
@@ -46,6 +48,96 @@ class FaissIndexTests(unittest.TestCase):
             results = loaded.search([1.0, 0.0], k=1)
             self.assertEqual(results[0][0], 1)
 
+    @unittest.skipUnless(faiss_index.np is not None, "numpy not installed")
+    def test_numpy_fallback_saves_memory_mappable_arrays(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, mock.patch("markdownkeeper.query.faiss_index.faiss", None):
+            path = Path(tmp) / "test.index"
+            index = FaissIndex()
+            index.build([(7, [3.0, 4.0]), (9, [0.0, 1.0])])
+            index.save(path)
+            self.assertTrue(path.with_suffix(".vectors.npy").exists())
+            self.assertFalse(path.with_suffix(".json").exists())
+
+            loaded = FaissIndex()
+            loaded.load(path)
+            self.assertEqual(loaded._dimensions, 2)
+            results = loaded.search([0.6, 0.8], k=2)
+        self.assertEqual([doc_id for doc_id, _ in results], [7, 9])
+        self.assertAlmostEqual(results[0][1], 1.0, places=5)
+
+    @unittest.skipUnless(faiss_index.np is not None, "numpy not installed")
+    def test_quantized_builds_keep_ranking(self) -> None:
+        embeddings = [(1, [1.0, 0.0, 0.0]), (2, [0.0, 1.0, 0.0]), (3, [0.9, 0.1, 0.0]), (4, [0.5, 0.5, 0.7])]
+        for faiss_module in (faiss_index.faiss, None):
+            for dtype in ("fp16", "int8"):
+                with self.subTest(faiss=faiss_module is not None, dtype=dtype), mock.patch(
+                    "markdownkeeper.query.faiss_index.faiss", faiss_module
+                ):
+                    index = FaissIndex()
+                    index.build(embeddings, dtype=dtype)
+                    results = index.search([1.0, 0.0, 0.0], k=2)
+                    self.assertEqual([doc_id for doc_id, _ in results], [1, 3])
+                    self.assertAlmostEqual(results[0][1], 1.0, delta=0.02)
+        with self.assertRaises(ValueError):
+            FaissIndex().build(embeddings, dtype="int4")
+
+    @unittest.skipUnless(is_faiss_available(), "faiss not installed")
+    def test_large_builds_use_hnsw_graph(self) -> None:
+        embeddings = [(idx, [1.0, idx / 10.0, 0.0]) for idx in range(20)]
+        with mock.patch("markdownkeeper.query.faiss_index.HNSW_MIN_VECTORS", 10):
+            for dtype in ("fp32", "int8"):
+                with self.subTest(dtype=dtype):
+                    index = FaissIndex()
+                    index.build(embeddings, dtype=dtype)
+                    self.assertTrue(hasattr(index._index, "hnsw"))
+                    self.assertEqual(index.search([1.0, 0.0, 0.0], k=1)[0][0], 0)
+
+    def test_search_batch_matches_single_searches(self) -> None:
+        embeddings = [(1, [1.0, 0.0]), (2, [0.0, 1.0]), (3, [0.7, 0.7]), (4, [-1.0, 0.2])]
+        queries = [[1.0, 0.1], [0.0, 2.0], [-1.0, 0.0]]
+        for faiss_module in {faiss_index.faiss, None}:
+            with self.subTest(faiss=faiss_module is not None), mock.patch(
+                "markdownkeeper.query.faiss_index.faiss", faiss_module
+            ):
+                index = FaissIndex()
+                index.build(embeddings)
+                batch = index.search_batch(queries, k=2)
+                self.assertEqual(len(batch), 3)
+                for query, results in zip(queries, batch):
+                    single = index.search(query, k=2)
+                    self.assertEqual([doc_id for doc_id, _ in results], [doc_id for doc_id, _ in single])
+                self.assertEqual(index.search_batch([], k=2), [])
+
+    @unittest.skipUnless(faiss_index.np is not None, "numpy not installed")
+    def test_search_accepts_numpy_query(self) -> None:
+        embeddings = [(1, [1.0, 0.0]), (2, [0.0, 1.0]), (3, [0.7, 0.7])]
+        for faiss_module in {faiss_index.faiss, None}:
+            with self.subTest(faiss=faiss_module is not None), mock.patch(
+                "markdownkeeper.query.faiss_index.faiss", faiss_module
+            ):
+                index = FaissIndex()
+                index.build(embeddings)
+                query = faiss_index.np.array([0.9, 0.2], dtype=faiss_index.np.float64)
+                self.assertEqual(index.search(query, k=2), index.search([0.9, 0.2], k=2))
+                self.assertEqual(query.tolist(), [0.9, 0.2])
+
+    def test_search_normalized_skips_query_normalization(self) -> None:
+        embeddings = [(1, [1.0, 0.0]), (2, [0.0, 1.0]), (3, [0.6, 0.8])]
+        for faiss_module in {faiss_index.faiss, None}:
+            with self.subTest(faiss=faiss_module is not None), mock.patch(
+                "markdownkeeper.query.faiss_index.faiss", faiss_module
+            ):
+                index = FaissIndex()
+                index.build(embeddings)
+                expected = index.search([3.0, 4.0], k=3)
+                results = index.search([0.6, 0.8], k=3, normalized=True)
+                self.assertEqual([doc_id for doc_id, _ in results], [doc_id for doc_id, _ in expected])
+                for (_, got), (_, want) in zip(results, expected):
+                    self.assertAlmostEqual(got, want, places=5)
+                # The caller vouches for the norm, so an unnormalized query scales the scores.
+                scaled = index.search([3.0, 4.0], k=1, normalized=True)
+                self.assertAlmostEqual(scaled[0][1], 5.0, places=4)
+
     def test_is_faiss_available_returns_bool(self) -> None:
         self.assertIsInstance(is_faiss_available(), bool)
 
@@ -56,5 +148,28 @@ class FaissIndexTests(unittest.TestCase):
         self.assertEqual(len(results), 2)
 
 
+    @unittest.skipUnless(faiss_index.np is not None, "numpy not installed")
+    def test_numpy_fallback_matches_python_ranking(self) -> None:
+        embeddings = [(1, [1.0, 0.0]), (2, [0.0, 1.0]), (3, [2.0, 0.0]), (4, [0.6, 0.8]), (5, [0.0, 0.0])]
+        with mock.patch("markdownkeeper.query.faiss_index.faiss", None):
+            index = FaissIndex()
+            index.build(embeddings)
+            fast = index.search([1.0, 0.0], k=3)
+            with mock.patch("markdownkeeper.query.faiss_index.np", None):
+                index.build(embeddings)
+                slow = index.search([1.0, 0.0], k=3)
+        self.assertEqual([doc_id for doc_id, _ in fast], [3, 1, 4])
+        self.assertEqual([doc_id for doc_id, _ in fast], [doc_id for doc_id, _ in slow])
+        for (_, fast_score), (_, slow_score) in zip(fast, slow):
+            self.assertAlmostEqual(fast_score, slow_score, places=5)
+
+
+    def test_mixed_dimensions_fall_back_to_python_lists(self) -> None:
+        index = FaissIndex()
+        index.build([(1, [1.0, 0.0]), (2, [0.0, 1.0, 0.0])])
+        results = index.search([1.0, 0.0], k=2)
+        self.assertEqual([doc_id for doc_id, _ in results], [1, 2])
+
+
 if __name__ == "__main__":
     unittest.main()
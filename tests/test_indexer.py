@@ -10,6 +10,7 @@ if str(SRC) not in sys.path:
 
 import tempfile
 import unittest
+from unittest import mock
 
 from markdownkeeper.indexer.generator import (
     generate_all_indexes,
@@ -92,6 +93,27 @@ class IndexerTests(unittest.TestCase):
             content = out.read_text(encoding="utf-8")
             self.assertIn("My Document", content)
 
+    def test_category_index_groups_across_fetch_batches(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            db = root / ".markdownkeeper" / "index.db"
+            initialize_database(db)
+            for name, front in (("b", "category: ops\n"), ("a", "category: ops\n"), ("c", ""), ("d", "category: api\n")):
+                doc = root / f"{name}.md"
+                doc.write_text(f"---\n{front}---\n# {name.upper()}\nbody", encoding="utf-8")
+                upsert_document(db, doc, parse_markdown(doc.read_text(encoding="utf-8")))
+
+            with mock.patch("markdownkeeper.indexer.generator.FETCH_BATCH_SIZE", 1):
+                content = generate_category_index(db, root / "_index").read_text(encoding="utf-8")
+
+        headings = [line for line in content.splitlines() if line.startswith("## ")]
+        titles = [line.split("**")[1] for line in content.splitlines() if line.startswith("- ")]
+        self.assertTrue(content.startswith("# Documents by Category\n\n## "))
+        self.assertEqual(headings[0], "## api")
+        self.assertEqual(len(headings), len(set(headings)))
+        self.assertEqual(titles[:3], ["D", "A", "B"])
+        self.assertTrue(content.endswith("`)\n"))
+
 
 if __name__ == "__main__":
     unittest.main()
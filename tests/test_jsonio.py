@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+import io
+import json
+import unittest
+from unittest import mock
+
+from markdownkeeper import jsonio
+from markdownkeeper.storage.repository import DocumentDetail, DocumentRecord
+
+
+def _record() -> DocumentRecord:
+    return DocumentRecord(
+        id=1,
+        path="/docs/a.md",
+        title="A",
+        summary="café",
+        category="ops",
+        token_estimate=3,
+        updated_at="2026-01-01T00:00:00+00:00",
+    )
+
+
+class JsonIoTests(unittest.TestCase):
+    def test_dumps_bytes_serializes_dataclasses(self) -> None:
+        payload = json.loads(jsonio.dumps_bytes({"documents": [_record()]}))
+        self.assertEqual(payload["documents"][0]["id"], 1)
+        self.assertEqual(payload["documents"][0]["summary"], "café")
+
+    def test_dumps_serializes_inherited_slots_dataclass(self) -> None:
+        detail = DocumentDetail(
+            id=2, path="/b.md", title="B", summary="", category="", token_estimate=1,
+            updated_at="", headings=[{"level": 1, "text": "B"}], links=[], tags=["x"],
+            concepts=[], content="",
+        )
+        payload = json.loads(jsonio.dumps(detail, indent=True))
+        self.assertEqual(payload["tags"], ["x"])
+        self.assertEqual(payload["headings"][0]["text"], "B")
+
+    def test_to_dict_is_shallow(self) -> None:
+        detail = DocumentDetail(
+            id=3, path="/c.md", title="C", summary="", category="", token_estimate=1,
+            updated_at="", headings=[], links=[], tags=["y"], concepts=[], content="",
+        )
+        payload = jsonio.to_dict(detail)
+        self.assertEqual(payload["id"], 3)
+        self.assertEqual(set(payload), {"id", "path", "title", "summary", "category", "token_estimate",
+                                        "updated_at", "headings", "links", "tags", "concepts", "content"})
+        self.assertIs(payload["tags"], detail.tags)
+
+    def test_stdlib_fallback_matches_orjson_output(self) -> None:
+        expected = json.loads(jsonio.dumps({"documents": [_record()]}))
+        with mock.patch.object(jsonio, "orjson", None):
+            self.assertFalse(jsonio.is_orjson_available())
+            compact = jsonio.dumps_bytes({"documents": [_record()]})
+            indented = jsonio.dumps({"documents": [_record()]}, indent=True)
+        self.assertEqual(json.loads(compact), expected)
+        self.assertEqual(json.loads(indented), expected)
+        self.assertIn("\n  ", indented)
+
+    def test_dump_writes_same_document_to_binary_stream(self) -> None:
+        expected = jsonio.dumps_bytes({"documents": [_record()]})
+        for orjson_module in (jsonio.orjson, None):
+            with self.subTest(orjson=orjson_module is not None), mock.patch.object(jsonio, "orjson", orjson_module):
+                stream = io.BytesIO()
+                jsonio.dump({"documents": [_record()]}, stream)
+                self.assertEqual(json.loads(stream.getvalue()), json.loads(expected))
+
+    def test_stdlib_fallback_rejects_unknown_types(self) -> None:
+        with mock.patch.object(jsonio, "orjson", None):
+            with self.assertRaises(TypeError):
+                jsonio.dumps_bytes({"value": object()})
+
+    def test_loads_accepts_memoryview_in_both_paths(self) -> None:
+        raw = memoryview(bytearray(b'{"method": "semantic_query", "id": 7}'))
+        self.assertEqual(jsonio.loads(raw)["id"], 7)
+        with mock.patch.object(jsonio, "orjson", None):
+            self.assertEqual(jsonio.loads(raw)["method"], "semantic_query")
+            with self.assertRaises(ValueError):
+                jsonio.loads(b"\xff not json")
+
+
+if __name__ == "__main__":
+    unittest.main()
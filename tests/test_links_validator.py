@@ -8,12 +8,15 @@ SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import socket
 import sqlite3
 import tempfile
+import threading
 import unittest
 from unittest import mock
 
-from markdownkeeper.links.validator import _check_internal, validate_links
+from markdownkeeper.links.validator import _check_external_targets, _check_internal, validate_links
 from markdownkeeper.processor.parser import parse_markdown
 from markdownkeeper.storage.repository import upsert_document
 from markdownkeeper.storage.schema import initialize_database
@@ -61,6 +64,18 @@ class LinkValidatorTests(unittest.TestCase):
             result = _check_internal(str(doc), "target.md#section")
             self.assertEqual(result, "ok")
 
+    def test_check_internal_memoizes_joined_paths(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "sub").mkdir()
+            (Path(tmp) / "target.md").write_text("# Target", encoding="utf-8")
+            doc = str(Path(tmp) / "sub" / "doc.md")
+            seen: dict[str, bool] = {}
+            self.assertEqual(_check_internal(doc, "../target.md", seen), "ok")
+            self.assertEqual(_check_internal(doc, "missing.md", seen), "broken")
+            (Path(tmp) / "sub" / "missing.md").write_text("late", encoding="utf-8")
+            self.assertEqual(_check_internal(doc, "missing.md", seen), "broken")
+            self.assertEqual(_check_internal(doc, "missing.md"), "ok")
+
     def test_validate_links_empty_database_returns_empty(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             db_path = Path(tmp) / ".markdownkeeper" / "index.db"
@@ -139,6 +154,124 @@ class ExternalLinkTests(unittest.TestCase):
             self.assertEqual(len(ext_results), 0)  # skipped
             self.assertEqual(len(int_results), 1)  # checked
 
+    def test_validate_links_checks_each_url_once_and_hosts_concurrently(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            db_path = tmp_path / ".markdownkeeper" / "index.db"
+            source = tmp_path / "source.md"
+            source.write_text(
+                "# S\n[a](https://a.example/x) [b](https://b.example/y) [again](https://a.example/x)"
+                " [ftp](ftp://c.example/z)",
+                encoding="utf-8",
+            )
+            initialize_database(db_path)
+            upsert_document(db_path, source, parse_markdown(source.read_text(encoding="utf-8")))
+
+            import threading
+            import time
+            calls: list[str] = []
+            barrier = threading.Barrier(2, timeout=2)
+
+            def fake_check(target: str, timeout_s: float = 3.0, connection: object = None) -> str:
+                calls.append(target)
+                barrier.wait()  # both hosts must be in flight at once
+                return "ok"
+
+            start = time.monotonic()
+            with mock.patch("markdownkeeper.links.validator._check_external", side_effect=fake_check), mock.patch(
+                "markdownkeeper.links.validator._host_resolves", return_value=True
+            ):
+                results = validate_links(db_path, check_external=True)
+            self.assertLess(time.monotonic() - start, 2.0)
+
+        self.assertEqual(sorted(calls), ["https://a.example/x", "https://b.example/y"])
+        statuses = [(item.target, item.status) for item in results]
+        self.assertEqual(statuses.count(("https://a.example/x", "ok")), 2)
+        self.assertIn(("ftp://c.example/z", "broken"), statuses)
+
+    def test_validate_links_marks_malformed_netloc_broken(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            db_path = tmp_path / ".markdownkeeper" / "index.db"
+            source = tmp_path / "source.md"
+            source.write_text(
+                "# S\n[creds](http://user:pw@localhost/x) [port](http://localhost:abc/x)", encoding="utf-8"
+            )
+            initialize_database(db_path)
+            upsert_document(db_path, source, parse_markdown(source.read_text(encoding="utf-8")))
+
+            with mock.patch("markdownkeeper.links.validator.getproxies", return_value={}), mock.patch(
+                "markdownkeeper.links.validator._host_resolves", return_value=True
+            ), mock.patch("markdownkeeper.links.validator.urlopen") as opener:
+                results = validate_links(db_path, check_external=True)
+
+        self.assertEqual(
+            sorted((item.target, item.status) for item in results),
+            [("http://localhost:abc/x", "broken"), ("http://user:pw@localhost/x", "broken")],
+        )
+        opener.assert_not_called()
+
+    def test_unresolvable_host_is_broken_after_one_lookup(self) -> None:
+        urls = [f"https://nowhere.invalid/{idx}" for idx in range(3)]
+        with mock.patch("markdownkeeper.links.validator.getproxies", return_value={}), mock.patch(
+            "markdownkeeper.links.validator.socket.getaddrinfo", side_effect=socket.gaierror
+        ) as lookup, mock.patch("markdownkeeper.links.validator._check_external") as check:
+            statuses = _check_external_targets(urls, min_delay=5.0)
+        self.assertEqual(statuses, {url: "broken" for url in urls})
+        lookup.assert_called_once()
+        check.assert_not_called()
+
+    def test_external_checks_reuse_one_connection_per_host(self) -> None:
+        connections: list[tuple[str, int]] = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                connections.append(self.client_address)
+
+            def do_HEAD(self) -> None:
+                if self.path == "/moved":
+                    self.send_response(301)
+                    self.send_header("Location", "/gone")
+                elif self.path == "/head-not-allowed":
+                    self.send_response(405)
+                else:
+                    self.send_response(404 if self.path == "/gone" else 200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self) -> None:
+                self.send_response(200 if self.path == "/head-not-allowed" else 404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format: str, *args: object) -> None:
+                return
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with mock.patch("markdownkeeper.links.validator.getproxies", return_value={}):
+                statuses = _check_external_targets(
+                    [f"{base}/a", f"{base}/b?q=1", f"{base}/gone", f"{base}/head-not-allowed", f"{base}/moved"],
+                    min_delay=0.0,
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(statuses[f"{base}/a"], "ok")
+        self.assertEqual(statuses[f"{base}/b?q=1"], "ok")
+        self.assertEqual(statuses[f"{base}/gone"], "broken")
+        self.assertEqual(statuses[f"{base}/head-not-allowed"], "ok")
+        self.assertEqual(statuses[f"{base}/moved"], "broken")  # redirect followed to the 404
+        # Without reuse every request opens its own connection (7 here).
+        self.assertLessEqual(len(connections), 4)
+
 
 class RateLimiterTests(unittest.TestCase):
     def test_rate_limiter_delays_same_domain(self) -> None:
@@ -8,9 +8,20 @@ SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
+import tempfile
 import unittest
 
-from markdownkeeper.processor.parser import _slugify, _split_list, _extract_concepts, ParsedHeading, parse_markdown
+from markdownkeeper.processor.parser import (
+    PARALLEL_PARSE_MIN_DOCUMENTS,
+    _slugify,
+    _split_list,
+    _extract_concepts,
+    ParsedHeading,
+    parse_markdown,
+    parse_markdown_bytes,
+    parse_markdown_files,
+    parse_markdown_many,
+)
 
 
 class ParserTests(unittest.TestCase):
@@ -98,6 +109,14 @@ More content.
         self.assertEqual(len(externals), 2)
         self.assertEqual(len(internals), 1)
 
+    def test_parse_markdown_keeps_links_inside_heading_lines(self) -> None:
+        parsed = parse_markdown("# See [guide](https://example.com/guide)\nbody [local](a.md)")
+        self.assertEqual([h.text for h in parsed.headings], ["See [guide](https://example.com/guide)"])
+        self.assertEqual(
+            [(link.target, link.is_external) for link in parsed.links],
+            [("https://example.com/guide", True), ("a.md", False)],
+        )
+
     def test_parse_markdown_summary_empty_without_frontmatter(self) -> None:
         long_line = "word " * 200
         parsed = parse_markdown(f"# Title\n{long_line}")
@@ -135,6 +154,35 @@ More content.
         parsed = parse_markdown('---\ntitle: "Quoted Title"\n---\n# Body')
         self.assertEqual(parsed.title, "Quoted Title")
 
+    def test_parse_markdown_bytes_matches_read_text_parse(self) -> None:
+        for raw in (b"# Caf\xc3\xa9\nbody [x](a.md)\n", b"# Windows\r\nline one\r\nline two\r"):
+            expected = parse_markdown(raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n"))
+            self.assertEqual(parse_markdown_bytes(raw), expected)
+        self.assertEqual(parse_markdown_many([b"# A\n", "# B\n"]), [parse_markdown("# A\n"), parse_markdown("# B\n")])
+
+    def test_parse_markdown_many_matches_serial_parse_in_order(self) -> None:
+        texts = [f"# Doc {idx}\nSee [next](doc{idx + 1}.md)" for idx in range(PARALLEL_PARSE_MIN_DOCUMENTS + 4)]
+        parallel = parse_markdown_many(texts, max_workers=2)
+        self.assertEqual(parallel, [parse_markdown(text) for text in texts])
+        self.assertEqual(parse_markdown_many(texts[:3]), [parse_markdown(text) for text in texts[:3]])
+
+
+    def test_parse_markdown_files_reads_in_workers_and_skips_missing(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            paths = []
+            for idx in range(PARALLEL_PARSE_MIN_DOCUMENTS + 2):
+                path = root / f"doc{idx}.md"
+                path.write_bytes(f"# Doc {idx}\r\nbody\r\n".encode("utf-8"))
+                paths.append(path)
+            paths.insert(3, root / "missing.md")
+            paths.insert(5, root)
+
+            parsed = parse_markdown_files(paths, max_workers=2)
+            expected = [parse_markdown(path.read_text(encoding="utf-8")) if path.is_file() else None for path in paths]
+            self.assertEqual(parsed, expected)
+            self.assertEqual(parse_markdown_files(paths[:6]), expected[:6])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -12,14 +12,18 @@ import json
 import sqlite3
 import tempfile
 import unittest
+from unittest import mock
 
 from markdownkeeper.processor.parser import parse_markdown
+from markdownkeeper.query.embeddings import pack_embedding
 from markdownkeeper.storage.repository import (
     _chunk_document,
     _deserialize_embedding,
     delete_document_by_path,
     find_documents_by_concept,
     get_document,
+    get_documents_bulk,
+    get_index_version,
     list_documents,
     search_documents,
     _compute_text_embedding,
@@ -30,6 +34,7 @@ from markdownkeeper.storage.repository import (
     semantic_search_documents,
     system_stats,
     upsert_document,
+    upsert_documents,
     generate_health_report,
 )
 from markdownkeeper.storage.schema import initialize_database
@@ -65,6 +70,74 @@ class RepositoryTests(unittest.TestCase):
             self.assertEqual(link_count, 1)
             self.assertEqual(title, "A2")
 
+    def test_upsert_documents_writes_batch_in_input_order(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            items = [(Path(tmp) / f"doc{idx}.md", parse_markdown(f"# Doc {idx}\nbody")) for idx in range(3)]
+            ids = upsert_documents(db_path, items)
+            self.assertEqual(len(set(ids)), 3)
+            self.assertEqual([get_document(db_path, doc_id).title for doc_id in ids], ["Doc 0", "Doc 1", "Doc 2"])
+            self.assertEqual(upsert_documents(db_path, []), [])
+
+    def test_upsert_documents_encodes_once_without_holding_write_lock(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            lock_free: list[bool] = []
+
+            def encode(texts: list[str], **kwargs: object) -> list[list[float]]:
+                # Another writer must get the lock while vectors are being computed.
+                with sqlite3.connect(db_path, timeout=0) as other:
+                    other.execute("UPDATE index_state SET version = version WHERE id = 1")
+                    other.commit()
+                lock_free.append(True)
+                return [[1.0, float(len(text))] for text in texts]
+
+            model = mock.Mock()
+            model.encode.side_effect = encode
+            items = [(Path(tmp) / f"doc{idx}.md", parse_markdown(f"# Doc {idx}\nbody {idx}")) for idx in range(3)]
+            with mock.patch.dict("markdownkeeper.query.embeddings._MODEL_CACHE", {"all-MiniLM-L6-v2": model}):
+                ids = upsert_documents(db_path, items)
+            self.assertEqual(lock_free, [True])
+            self.assertEqual(len(model.encode.call_args.args[0]), 6)  # one chunk + one document vector each
+            self.assertEqual(len(set(ids)), 3)
+
+    def test_upsert_shares_tag_and_concept_rows_across_documents(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            first = upsert_document(
+                db_path, Path(tmp) / "a.md", parse_markdown("---\ntags: Ops, api, ops\nconcepts: docker\n---\n# A\nbody")
+            )
+            second = upsert_document(
+                db_path, Path(tmp) / "b.md", parse_markdown("---\ntags: api\nconcepts: docker, helm\n---\n# B\nbody")
+            )
+            with sqlite3.connect(db_path) as connection:
+                tags = connection.execute("SELECT name FROM tags ORDER BY name").fetchall()
+            self.assertEqual(tags, [("api",), ("ops",)])
+            self.assertEqual(sorted(get_document(db_path, first).tags), ["api", "ops"])
+            self.assertEqual(get_document(db_path, second).tags, ["api"])
+            self.assertEqual(sorted(get_document(db_path, second).concepts), ["docker", "helm"])
+
+    def test_upsert_unchanged_content_only_refreshes_timestamps(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            file_path = Path(tmp) / "doc.md"
+            doc_id = upsert_document(db_path, file_path, parse_markdown("# Doc\nbody"))
+            with sqlite3.connect(db_path) as connection:
+                connection.execute("UPDATE documents SET updated_at = 'old' WHERE id = ?", (doc_id,))
+                connection.commit()
+
+            with mock.patch("markdownkeeper.storage.repository._write_document") as write:
+                self.assertEqual(upsert_document(db_path, file_path, parse_markdown("# Doc\nbody")), doc_id)
+            write.assert_not_called()
+            self.assertNotEqual(get_document(db_path, doc_id).updated_at, "old")
+
+            upsert_document(db_path, file_path, parse_markdown("# Doc\nnew body"))
+            self.assertIn("new body", get_document(db_path, doc_id, include_content=True).content)
+
     def test_search_documents_returns_expected_match(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             db_path = Path(tmp) / ".markdownkeeper" / "index.db"
@@ -77,6 +150,25 @@ class RepositoryTests(unittest.TestCase):
             self.assertEqual(len(results), 1)
             self.assertEqual(results[0].title, "Deployment")
 
+    def test_search_documents_ranks_title_matches_and_tracks_updates(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            summary_hit = upsert_document(
+                db_path, Path(tmp) / "a.md", parse_markdown("---\nsummary: notes on backups\n---\n# Ops Notes\nbody")
+            )
+            title_hit = upsert_document(db_path, Path(tmp) / "b.md", parse_markdown("# Backup Guide\nbody"))
+
+            results = search_documents(db_path, "backup", limit=5)
+            self.assertEqual([d.id for d in results], [title_hit, summary_hit])
+
+            upsert_document(db_path, Path(tmp) / "b.md", parse_markdown("# Restore Guide\nbody"))
+            self.assertEqual([d.id for d in search_documents(db_path, "backup", limit=5)], [summary_hit])
+            self.assertEqual([d.id for d in search_documents(db_path, "restore guide", limit=5)], [title_hit])
+
+            delete_document_by_path(db_path, Path(tmp) / "b.md")
+            self.assertEqual(search_documents(db_path, "restore", limit=5), [])
+
     def test_get_document_returns_detail_and_none_when_missing(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             db_path = Path(tmp) / ".markdownkeeper" / "index.db"
@@ -102,6 +194,47 @@ class RepositoryTests(unittest.TestCase):
             self.assertIsNone(missing)
 
 
+    def test_get_documents_bulk_returns_found_ids_only(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            first = upsert_document(
+                db_path,
+                Path(tmp) / "a.md",
+                parse_markdown("---\ntags: ops, api\nconcepts: zeta, alpha\n---\n# Alpha\n## Setup\nSee [b](b.md)"),
+            )
+            second = upsert_document(db_path, Path(tmp) / "b.md", parse_markdown("# Beta\nbody"))
+
+            docs = get_documents_bulk(db_path, [second, 424242, first, second])
+            self.assertEqual(set(docs), {first, second})
+            self.assertEqual(docs[first].tags, ["api", "ops"])
+            self.assertEqual(docs[first].concepts, ["alpha", "zeta"])
+            self.assertEqual([h["text"] for h in docs[first].headings], ["Alpha", "Setup"])
+            self.assertEqual(docs[first].links[0]["target"], "b.md")
+            self.assertEqual(docs[second].links, [])
+            self.assertEqual(get_documents_bulk(db_path, []), {})
+
+    def test_get_documents_bulk_splits_ids_across_slices(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            ids = [
+                upsert_document(
+                    db_path,
+                    Path(tmp) / f"{name}.md",
+                    parse_markdown(f"---\ntags: {name}\n---\n# {name}\n## Part {name}\nbody"),
+                )
+                for name in ("a", "b", "c")
+            ]
+
+            with mock.patch("markdownkeeper.storage.repository._SQL_IN_BATCH", 2):
+                docs = get_documents_bulk(db_path, [*reversed(ids), 424242])
+
+        self.assertEqual(sorted(docs), sorted(ids))
+        for document_id, name in zip(ids, ("a", "b", "c")):
+            self.assertEqual(docs[document_id].tags, [name])
+            self.assertEqual([h["text"] for h in docs[document_id].headings], [name, f"Part {name}"])
+
     def test_get_document_content_respects_token_budget(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             db_path = Path(tmp) / ".markdownkeeper" / "index.db"
@@ -149,7 +282,131 @@ class RepositoryTests(unittest.TestCase):
             self.assertIsNotNone(row)
             assert row is not None
             self.assertGreaterEqual(int(row[0]), 1)
+            self.assertEqual(second, first)
 
+            # A hit is served from the cached records without reading documents.
+            with sqlite3.connect(db_path) as connection:
+                connection.execute("UPDATE documents SET title = 'Renamed'")
+                connection.commit()
+            self.assertEqual(semantic_search_documents(db_path, "kubernetes rollout", limit=5), first)
+
+    def test_semantic_search_limit_returns_prefix_of_full_ranking(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            bodies = [
+                "# Kubernetes Rollout\nkubernetes rollout strategy for clusters",
+                "# Kubernetes\nkubernetes basics",
+                "# Rollout Notes\nrollout checklist",
+                "# Postgres\nbackup and restore",
+            ]
+            for idx, body in enumerate(bodies):
+                upsert_document(db_path, Path(tmp) / f"doc{idx}.md", parse_markdown(body))
+
+            full = semantic_search_documents(db_path, "kubernetes rollout", limit=10)
+            top_two = semantic_search_documents(db_path, "kubernetes rollout", limit=2)
+            self.assertEqual([d.id for d in top_two], [d.id for d in full[:2]])
+
+    def test_upsert_reuses_cached_model_embeddings(self) -> None:
+        model = mock.Mock()
+        model.encode.side_effect = lambda texts, **kwargs: [[1.0, float(len(text))] for text in texts]
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(
+            "markdownkeeper.query.embeddings._MODEL_CACHE", {"all-MiniLM-L6-v2": model}
+        ):
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            body = "# Shared\nshared paragraph text"
+            upsert_document(db_path, Path(tmp) / "a.md", parse_markdown(body))
+            self.assertEqual(len(model.encode.call_args.args[0]), 2)  # one chunk + document source
+
+            # Same content under another path: every vector comes from the cache.
+            model.encode.reset_mock()
+            upsert_document(db_path, Path(tmp) / "b.md", parse_markdown(body))
+            model.encode.assert_not_called()
+
+            # Both documents share one regenerate source, encoded once.
+            regenerate_embeddings(db_path)
+            self.assertEqual(len(model.encode.call_args.args[0]), 1)
+            with sqlite3.connect(db_path) as connection:
+                cached = connection.execute("SELECT COUNT(*), MIN(model_name) FROM embedding_cache").fetchone()
+            self.assertEqual(cached, (3, "all-MiniLM-L6-v2"))
+
+    def test_semantic_search_concept_match_breaks_tie(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            body = "# Guide\nkubernetes deployment guide"
+            first = upsert_document(db_path, Path(tmp) / "a.md", parse_markdown(body))
+            upsert_document(db_path, Path(tmp) / "b.md", parse_markdown(body))
+            with sqlite3.connect(db_path) as connection:
+                connection.execute("DELETE FROM document_concepts")
+                connection.execute("INSERT OR IGNORE INTO concepts(name) VALUES('kubernetes')")
+                connection.execute(
+                    "INSERT INTO document_concepts(document_id, concept_id, score) "
+                    "SELECT ?, id, 1.0 FROM concepts WHERE name = 'kubernetes'",
+                    (first,),
+                )
+                connection.commit()
+
+            results = semantic_search_documents(db_path, "kubernetes guide", limit=2)
+            self.assertEqual(results[0].id, first)
+
+    def test_upsert_replaces_document_tokens(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            file_path = Path(tmp) / "notes.md"
+            doc_id = upsert_document(db_path, file_path, parse_markdown("# Notes\nkubernetes rollout"))
+            upsert_document(db_path, file_path, parse_markdown("# Notes\npostgres backup"))
+            with sqlite3.connect(db_path) as connection:
+                tokens = {row[0] for row in connection.execute("SELECT token FROM document_tokens WHERE document_id = ?", (doc_id,))}
+            self.assertIn("postgres", tokens)
+            self.assertNotIn("kubernetes", tokens)
+            delete_document_by_path(db_path, file_path)
+            with sqlite3.connect(db_path) as connection:
+                self.assertEqual(connection.execute("SELECT COUNT(*) FROM document_tokens").fetchone()[0], 0)
+
+    def test_semantic_search_pruning_keeps_exact_top_k(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            words = ["kubernetes", "rollout", "postgres", "backup", "cluster", "ingress", "deploy", "metrics"]
+            for idx in range(24):
+                body = " ".join(words[(idx + offset) % len(words)] for offset in range(idx % 4 + 1))
+                front = "---\nconcepts: rollout\n---\n" if idx % 5 == 0 else ""
+                upsert_document(db_path, Path(tmp) / f"doc{idx}.md", parse_markdown(f"{front}# Doc {idx}\n{body}"))
+
+            full = semantic_search_documents(db_path, "kubernetes rollout", limit=100)
+            for limit in (1, 3, 5):
+                pruned = semantic_search_documents(db_path, "kubernetes rollout", limit=limit)
+                self.assertEqual([d.id for d in pruned], [d.id for d in full[:limit]])
+
+    def test_semantic_search_int8_matches_fp32_ranking(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            bodies = [
+                "# Kubernetes Rollout\nkubernetes rollout strategy for clusters",
+                "# Kubernetes\nkubernetes basics",
+                "# Postgres\nbackup and restore",
+            ]
+            ids = [
+                upsert_document(db_path, Path(tmp) / f"doc{idx}.md", parse_markdown(body))
+                for idx, body in enumerate(bodies)
+            ]
+            with sqlite3.connect(db_path) as connection:
+                # A row indexed before quantized columns existed is still scored.
+                connection.execute(
+                    "UPDATE embeddings SET embedding_q8 = NULL, embedding_scale = NULL WHERE document_id = ?",
+                    (ids[2],),
+                )
+                connection.commit()
+
+            fp32 = semantic_search_documents(db_path, "kubernetes rollout", limit=10)
+            int8 = semantic_search_documents(db_path, "kubernetes rollout", limit=10, embedding_dtype="int8")
+            self.assertEqual([d.id for d in int8], [d.id for d in fp32])
+            with self.assertRaises(ValueError):
+                semantic_search_documents(db_path, "kubernetes", embedding_dtype="fp8")
 
     def test_upsert_document_generates_embedding_row(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
@@ -214,8 +471,15 @@ class RepositoryTests(unittest.TestCase):
             coverage_missing = embedding_coverage(db_path)
             self.assertEqual(coverage_missing["missing"], 1)
 
+            semantic_search_documents(db_path, "runbook", limit=1)
+            with sqlite3.connect(db_path) as connection:
+                self.assertEqual(connection.execute("SELECT COUNT(*) FROM query_cache").fetchone()[0], 1)
+            version = get_index_version(db_path)
             regenerated = regenerate_embeddings(db_path)
             self.assertEqual(regenerated, 1)
+            self.assertGreater(get_index_version(db_path), version)
+            with sqlite3.connect(db_path) as connection:
+                self.assertEqual(connection.execute("SELECT COUNT(*) FROM query_cache").fetchone()[0], 0)
             coverage_after = embedding_coverage(db_path)
             self.assertEqual(coverage_after["missing"], 0)
 
@@ -271,6 +535,25 @@ class RepositoryTests(unittest.TestCase):
             self.assertIn("latency_ms", report)
             self.assertGreaterEqual(float(report["precision_at_k"]), 1.0)
 
+    def test_benchmark_semantic_queries_reuses_first_pass_for_precision(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            doc_id = upsert_document(db_path, Path(tmp) / "bench.md", parse_markdown("# Benchmark\nsemantic case"))
+            cases = [
+                {"query": "semantic case", "expected_ids": [doc_id, "x"]},
+                {"query": "unrelated", "expected_ids": []},
+            ]
+
+            with mock.patch(
+                "markdownkeeper.storage.repository.semantic_search_documents",
+                wraps=semantic_search_documents,
+            ) as search:
+                report = benchmark_semantic_queries(db_path, cases, k=1, iterations=3)
+
+            self.assertEqual(search.call_count, 6)
+            self.assertEqual(report["precision_at_k"], 0.5)
+
     def test_delete_document_by_path_removes_document(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             db_path = Path(tmp) / ".markdownkeeper" / "index.db"
@@ -315,6 +598,36 @@ class RepositoryTests(unittest.TestCase):
     def test_deserialize_embedding_handles_non_numeric_array(self) -> None:
         self.assertEqual(_deserialize_embedding(json.dumps(["a", "b"])), [])
 
+    def test_embedding_blob_round_trips_as_float32(self) -> None:
+        blob = pack_embedding([0.5, -1.0, 0.1])
+        self.assertEqual(blob[:4], b"\x00\x00\x00\x3f")
+        restored = _deserialize_embedding(blob)
+        self.assertEqual(restored[:2], [0.5, -1.0])
+        self.assertAlmostEqual(restored[2], 0.1, places=6)
+        self.assertEqual(_deserialize_embedding(memoryview(blob)), restored)
+        self.assertEqual(_deserialize_embedding(b"\x00\x00\x00"), [])
+
+    def test_upsert_stores_embedding_blobs_counted_by_coverage(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            initialize_database(db_path)
+            doc_id = upsert_document(db_path, Path(tmp) / "doc.md", parse_markdown("# Title\nSome body text"))
+            with sqlite3.connect(db_path) as connection:
+                types = connection.execute(
+                    "SELECT typeof(embedding) FROM embeddings WHERE document_id = ? "
+                    "UNION SELECT typeof(embedding) FROM document_chunks WHERE document_id = ?",
+                    (doc_id, doc_id),
+                ).fetchall()
+                # A vector whose first byte is zero must still count as present.
+                connection.execute(
+                    "UPDATE embeddings SET embedding = ? WHERE document_id = ?",
+                    (pack_embedding([0.5] * 64), doc_id),
+                )
+                connection.commit()
+            self.assertEqual(types, [("blob",)])
+            coverage = embedding_coverage(db_path)
+            self.assertEqual((coverage["embedded"], coverage["chunk_embedded"]), (1, coverage["chunks"]))
+
     def test_semantic_search_empty_query_returns_empty(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             db_path = Path(tmp) / ".markdownkeeper" / "index.db"
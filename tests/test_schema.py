@@ -12,7 +12,7 @@ import sqlite3
 import tempfile
 import unittest
 
-from markdownkeeper.storage.schema import initialize_database
+from markdownkeeper.storage.schema import SCHEMA_VERSION, document_tokens, initialize_database, refresh_planner_stats
 
 
 class SchemaTests(unittest.TestCase):
@@ -140,6 +140,85 @@ class SchemaTests(unittest.TestCase):
 
         self.assertIn("embedding", columns)
 
+    def test_initialize_database_backfills_fts_index_for_existing_documents(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / ".markdownkeeper" / "index.db"
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            with sqlite3.connect(db_path) as connection:
+                connection.execute(
+                    """
+                    CREATE TABLE documents (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        path TEXT NOT NULL UNIQUE,
+                        title TEXT,
+                        summary TEXT,
+                        category TEXT,
+                        content_hash TEXT NOT NULL,
+                        token_estimate INTEGER DEFAULT 0,
+                        updated_at TEXT NOT NULL,
+                        processed_at TEXT NOT NULL
+                    )
+                    """
+                )
+                connection.execute(
+                    "INSERT INTO documents(path, title, summary, content_hash, updated_at, processed_at) "
+                    "VALUES('a.md', 'Legacy Runbook', '', 'h', 't', 't')"
+                )
+                connection.commit()
+
+            initialize_database(db_path)
+            initialize_database(db_path)
+
+            with sqlite3.connect(db_path) as connection:
+                rows = connection.execute(
+                    "SELECT rowid FROM documents_fts WHERE documents_fts MATCH 'runbook'"
+                ).fetchall()
+                tokens = connection.execute("SELECT token FROM document_tokens WHERE document_id = 1 ORDER BY token").fetchall()
+        self.assertEqual(rows, [(1,)])
+        self.assertEqual(tokens, [("legacy",), ("md",), ("runbook",)])
+
+    def test_document_tokens_match_across_fields(self) -> None:
+        tokens = document_tokens("docs/K8s-Guide.md", "Rollout", None, "a Deploy step 2x")
+        self.assertEqual(tokens, {"docs", "k8s", "guide", "md", "rollout", "deploy", "step", "2x"})
+
+    def test_initialize_database_skips_databases_at_current_version(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "index.db"
+            initialize_database(db_path)
+            with sqlite3.connect(db_path) as connection:
+                self.assertEqual(connection.execute("PRAGMA user_version").fetchone()[0], SCHEMA_VERSION)
+                connection.execute("DROP INDEX idx_events_status_created")
+
+            initialize_database(db_path)
+            with sqlite3.connect(db_path) as connection:
+                index = "SELECT 1 FROM sqlite_master WHERE name='idx_events_status_created'"
+                self.assertIsNone(connection.execute(index).fetchone())
+                connection.execute("PRAGMA user_version = 0")
+
+            initialize_database(db_path)
+            with sqlite3.connect(db_path) as connection:
+                self.assertIsNotNone(connection.execute(index).fetchone())
+
+    def test_refresh_planner_stats_analyzes_once_then_optimizes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "index.db"
+            initialize_database(db_path)
+            with sqlite3.connect(db_path) as connection:
+                connection.executemany(
+                    "INSERT INTO documents(path, title, category, updated_at) VALUES(?, ?, ?, 't')",
+                    [(f"{i}.md", f"T{i}", f"c{i % 3}") for i in range(50)],
+                )
+                connection.commit()
+                statements: list[str] = []
+                connection.set_trace_callback(statements.append)
+
+                refresh_planner_stats(connection)
+                stats = dict(connection.execute("SELECT idx, stat FROM sqlite_stat1 WHERE tbl='documents'").fetchall())
+                refresh_planner_stats(connection)
+
+        self.assertIn("idx_documents_category_title", stats)
+        self.assertEqual([s for s in statements if s in ("ANALYZE", "PRAGMA optimize")], ["ANALYZE", "PRAGMA optimize"])
+
 
 if __name__ == "__main__":
     unittest.main()
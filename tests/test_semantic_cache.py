@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+import tempfile
+import unittest
+from unittest import mock
+
+from markdownkeeper.cache import semantic
+from markdownkeeper.cache.semantic import SemanticCache, normalize_query
+from markdownkeeper.processor.parser import parse_markdown
+from markdownkeeper.storage.repository import delete_document_by_path, get_index_version, upsert_document
+from markdownkeeper.storage.schema import initialize_database
+
+
+class SemanticCacheTests(unittest.TestCase):
+    def test_exact_hit_after_put(self) -> None:
+        cache = SemanticCache(distance_threshold=0.0)
+        self.assertIsNone(cache.get("Kubernetes Setup", 5, version=1))
+        cache.put("Kubernetes Setup", 5, version=1, results=[1, 2])
+        self.assertEqual(cache.get("  kubernetes   setup ", 5, version=1), [1, 2])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_limit_is_part_of_key(self) -> None:
+        cache = SemanticCache()
+        cache.put("docker", 5, version=1, results=[1])
+        self.assertIsNone(cache.get("docker", 10, version=1))
+
+    def test_similar_query_hits_within_threshold(self) -> None:
+        cache = SemanticCache(distance_threshold=0.05)
+        cache.put("setup kubernetes cluster", 5, version=1, results=[3])
+        # token-hash embeddings ignore word order, so this is cosine 1.0
+        self.assertEqual(cache.get("cluster kubernetes setup", 5, version=1), [3])
+        self.assertIsNone(cache.get("postgresql backup", 5, version=1))
+
+    def test_similarity_fallback_without_numpy(self) -> None:
+        cache = SemanticCache(distance_threshold=0.05)
+        with mock.patch.object(semantic, "np", None):
+            cache.put("setup kubernetes cluster", 5, version=1, results=[3])
+            self.assertEqual(cache.get("cluster setup kubernetes", 5, version=1), [3])
+
+    def test_version_change_drops_entries(self) -> None:
+        cache = SemanticCache()
+        cache.put("docker", 5, version=1, results=[1])
+        self.assertIsNone(cache.get("docker", 5, version=2))
+        self.assertEqual(len(cache), 0)
+
+    def test_ttl_expiry(self) -> None:
+        cache = SemanticCache(ttl_seconds=10)
+        with mock.patch.object(semantic.time, "monotonic", return_value=100.0):
+            cache.put("docker", 5, version=1, results=[1])
+        with mock.patch.object(semantic.time, "monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("docker", 5, version=1))
+
+    def test_lru_eviction(self) -> None:
+        cache = SemanticCache(max_entries=2, distance_threshold=0.0)
+        cache.put("alpha", 5, version=1, results=[1])
+        cache.put("beta", 5, version=1, results=[2])
+        cache.get("alpha", 5, version=1)
+        cache.put("gamma", 5, version=1, results=[3])
+        self.assertIsNone(cache.get("beta", 5, version=1))
+        self.assertEqual(cache.get("alpha", 5, version=1), [1])
+
+    def test_normalize_query_collapses_case_and_whitespace(self) -> None:
+        self.assertEqual(normalize_query("  Foo\tBAR  baz "), "foo bar baz")
+
+    def test_index_version_bumps_on_upsert_and_delete(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "index.db"
+            initialize_database(db_path)
+            v0 = get_index_version(db_path)
+            md = Path(tmp) / "doc.md"
+            md.write_text("# Doc\nbody", encoding="utf-8")
+            upsert_document(db_path, md, parse_markdown(md.read_text(encoding="utf-8")))
+            v1 = get_index_version(db_path)
+            delete_document_by_path(db_path, md)
+            v2 = get_index_version(db_path)
+        self.assertLess(v0, v1)
+        self.assertLess(v1, v2)
+
+
+if __name__ == "__main__":
+    unittest.main()
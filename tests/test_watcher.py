@@ -23,6 +23,7 @@ from markdownkeeper.watcher.service import (
     _snapshot,
     is_watchdog_available,
     watch_loop,
+    watch_loop_watchdog,
     watch_once,
 )
 
@@ -225,6 +226,45 @@ class WatcherTests(unittest.TestCase):
         self.assertEqual(len(handler.deleted), 1)
         self.assertEqual(len(handler.changed), 1)
 
+    def test_take_settled_holds_paths_inside_quiet_window(self) -> None:
+        handler = _MarkdownWatchEventHandler({".md"})
+        handler._record_change("/tmp/busy.md")
+        self.assertTrue(handler.pending.is_set())
+
+        self.assertEqual(handler.take_settled(quiet_s=60.0), ([], []))
+        settle_in = handler.seconds_until_settled(60.0)
+        assert settle_in is not None
+        self.assertGreater(settle_in, 59.0)
+
+        changed, deleted = handler.take_settled(quiet_s=0.0)
+        self.assertEqual(changed, [Path("/tmp/busy.md").resolve()])
+        self.assertEqual(deleted, [])
+        self.assertFalse(handler.pending.is_set())
+        self.assertIsNone(handler.seconds_until_settled(60.0))
+
+    @unittest.skipUnless(is_watchdog_available(), "watchdog not installed")
+    def test_watch_loop_watchdog_indexes_new_file(self) -> None:
+        import threading
+
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            docs = root / "docs"
+            docs.mkdir()
+            db = root / ".markdownkeeper" / "index.db"
+            initialize_database(db)
+
+            def write_later() -> None:
+                time.sleep(0.3)
+                (docs / "live.md").write_text("# Live", encoding="utf-8")
+
+            writer = threading.Thread(target=write_later)
+            writer.start()
+            result = watch_loop_watchdog(db, [docs], [".md"], debounce_s=0.1, duration_s=1.0)
+            writer.join()
+
+            self.assertEqual(result.created, 1)
+            self.assertEqual(len(list_documents(db)), 1)
+
     def test_handler_ignores_directory_events(self) -> None:
         handler = _MarkdownWatchEventHandler({".md"})
 